@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_state():
+    """The caches and metrics of ``manage.py test`` runs, for pytest."""
+    from core.testing import StateIsolation
+
+    isolation = StateIsolation()
+    isolation.enable()
+    yield
+    isolation.disable()
@@ -3,15 +3,42 @@ from rest_framework.relations import SlugRelatedField
 from rest_framework.generics import get_object_or_404
 
 
-from posts.models import Comment, Post, Group, User, Follow
+from posts.models import (
+    Comment, Follow, FollowSuggestion, Group, Post, User
+)
+from posts.relations import resolve
+
+
+def viewer(serializer):
+    request = serializer.context.get('request')
+    return getattr(request, 'user', None)
+
+
+class PostListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # One query per relationship for the whole page.
+        return super().to_representation(resolve(viewer(self), posts=data))
 
 
 class PostSerializer(serializers.ModelSerializer):
     author = SlugRelatedField(slug_field='username', read_only=True)
+    viewer_follows_author = serializers.BooleanField(read_only=True)
+    viewer_commented = serializers.BooleanField(read_only=True)
 
     class Meta:
         fields = '__all__'
         model = Post
+        list_serializer_class = PostListSerializer
+
+    def to_representation(self, instance):
+        if not hasattr(instance, 'viewer_commented'):
+            resolve(viewer(self), posts=[instance])
+        return super().to_representation(instance)
+
+
+class PostSearchSerializer(PostSerializer):
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+    snippet = serializers.CharField(source='search_snippet', read_only=True)
 
 
 class GroupSerializer(serializers.ModelSerializer):
@@ -31,6 +58,16 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
 
 
+class FollowSuggestionSerializer(serializers.ModelSerializer):
+    author = serializers.SlugRelatedField(
+        slug_field='username', read_only=True
+    )
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ('author', 'score', 'mutual')
+
+
 class FollowSerializer(serializers.ModelSerializer):
     user = serializers.SlugRelatedField(
         slug_field='username',
@@ -38,7 +75,7 @@ class FollowSerializer(serializers.ModelSerializer):
     )
 
     following = serializers.SlugRelatedField(
-        slug_field='username', queryset=User.objects.all()
+        source='author', slug_field='username', queryset=User.objects.all()
     )
 
     class Meta:
@@ -46,12 +83,14 @@ class FollowSerializer(serializers.ModelSerializer):
         fields = ('user', 'following')
 
     def validate(self, data):
-        user = get_object_or_404(User, username=data['following'].username)
+        user = get_object_or_404(User, username=data['author'].username)
         if user == self.context['request'].user:
-            raise serializers.ValidationError('You cannot subscribe to yourself')
+            raise serializers.ValidationError(
+                'You cannot subscribe to yourself'
+            )
 
         already_follow = Follow.objects.filter(
-            user=self.context['request'].user, following=user
+            user=self.context['request'].user, author=user
         ).exists()
 
         if already_follow:
@@ -1,7 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import CommentViewSet, GroupViewSet, PostViewSet, FollowViewSet
+from .views import (
+    CommentViewSet, GroupViewSet, PostViewSet, FollowViewSet, StatsViewSet
+)
 
 app_name = 'api'
 
@@ -10,6 +12,7 @@ router_v1 = DefaultRouter()
 router_v1.register('posts', PostViewSet, basename='posts')
 router_v1.register('groups', GroupViewSet, basename='groups')
 router_v1.register('follow', FollowViewSet, basename='follow')
+router_v1.register('stats', StatsViewSet, basename='stats')
 router_v1.register(
     r'posts/(?P<post_id>\d+)/comments', CommentViewSet, basename='comments'
 )
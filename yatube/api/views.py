@@ -1,14 +1,26 @@
+from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 
-from rest_framework import viewsets, permissions, filters, mixins
+from rest_framework import viewsets, permissions, filters, mixins, status
+from rest_framework.decorators import action
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
+from posts.forms import StatsPeriodForm
 from posts.models import Post, Group, Comment
+from posts.rollups import AUTHOR_COUNTERS, GROUP_COUNTERS, period
+from posts.trending import in_order, leaderboard
+from posts.search import SEARCH_COUNT, get_backend
+from posts.unread import mark_seen, unread_count
 from .permissions import IsOwnerOrReadOnly
 from .serializers import (
-    CommentSerializer, GroupSerializer, PostSerializer, FollowSerializer
+    CommentSerializer, GroupSerializer, PostSerializer, FollowSerializer,
+    FollowSuggestionSerializer, PostSearchSerializer
 )
 
+User = get_user_model()
+
 
 class PostViewSet(viewsets.ModelViewSet):
     queryset = Post.objects.all()
@@ -19,9 +31,46 @@ class PostViewSet(viewsets.ModelViewSet):
     )
     pagination_class = LimitOffsetPagination
 
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('search')
+        if not query:
+            return super().list(request, *args, **kwargs)
+        return self.search(request, query)
+
+    def search(self, request, query):
+        """Ranked full-text results, paginated by an ``after`` cursor."""
+        try:
+            size = min(int(request.query_params['limit']), 100)
+        except (KeyError, ValueError):
+            size = SEARCH_COUNT
+        posts, cursor = get_backend().search(
+            Post, query, request.query_params.get('after'), max(size, 1)
+        )
+        next_url = cursor and replace_query_param(
+            request.build_absolute_uri(), 'after', cursor
+        )
+        serializer = PostSearchSerializer(
+            posts, many=True, context=self.get_serializer_context()
+        )
+        return Response({'next': next_url, 'results': serializer.data})
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(detail=False)
+    def trending(self, request):
+        """The trending posts and groups, best first."""
+        board = leaderboard()
+        context = self.get_serializer_context()
+        posts = in_order(
+            Post.objects.select_related('author', 'group'), board['posts']
+        )
+        groups = in_order(Group.objects.all(), board['groups'])
+        return Response({
+            'posts': PostSerializer(posts, many=True, context=context).data,
+            'groups': GroupSerializer(groups, many=True).data,
+        })
+
 
 class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
@@ -58,11 +107,57 @@ class FollowViewSet(CreateRetrieveViewSet):
     serializer_class = FollowSerializer
     pagination_class = LimitOffsetPagination
     filter_backends = [filters.SearchFilter]
-    search_fields = ['user__username', 'following__username']
+    search_fields = ['user__username', 'author__username']
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return self.request.user.follower.all()
+        return self.request.user.follower.select_related('user', 'author')
 
     def perform_create(self, serializers):
         serializers.save(user=self.request.user)
+
+    @action(detail=False)
+    def suggestions(self, request):
+        """Authors to follow, best first, from posts.suggestions."""
+        queryset = request.user.follow_suggestions.select_related('author')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                FollowSuggestionSerializer(page, many=True).data
+            )
+        return Response(
+            FollowSuggestionSerializer(queryset, many=True).data
+        )
+
+    @action(detail=False, methods=['get', 'post'])
+    def unread(self, request):
+        """New posts of the followed authors; POST marks them as seen."""
+        if request.method == 'POST':
+            mark_seen(request)
+        return Response({'unread': unread_count(request)})
+
+
+class StatsViewSet(viewsets.ViewSet):
+    """Daily counters of a group or an author from the rollup tables,
+    for ``?since=`` and ``?until=`` (YYYY-MM-DD) days."""
+
+    @action(detail=False, url_path=r'groups/(?P<slug>[-\w]+)')
+    def group(self, request, slug):
+        group = get_object_or_404(Group, slug=slug)
+        return self.period(request, group.daily_stats, GROUP_COUNTERS)
+
+    @action(detail=False, url_path=r'authors/(?P<username>[\w.@+-]+)')
+    def author(self, request, username):
+        author = get_object_or_404(User, username=username)
+        return self.period(request, author.daily_stats, AUTHOR_COUNTERS)
+
+    def period(self, request, rows, counters):
+        form = StatsPeriodForm(request.query_params)
+        if not form.is_valid():
+            return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
+        since = form.cleaned_data['since']
+        until = form.cleaned_data['until']
+        days, totals = period(rows, since, until, counters)
+        return Response({
+            'since': since, 'until': until, 'totals': totals, 'days': days,
+        })
@@ -1,5 +0,0 @@
-from django.apps import AppConfig
-
-
-class BlogsConfig(AppConfig):
-    name = 'blogs'
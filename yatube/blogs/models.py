@@ -1,3 +0,0 @@
-# from django.db import models
-
-# Create your models here.
@@ -0,0 +1,21 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'run_at', 'attempts',
+                    'locked_by', 'created')
+    list_filter = ('status', 'name')
+    actions = ('requeue',)
+
+    def requeue(self, request, queryset):
+        updated = queryset.filter(status=Task.FAILED).update(
+            status=Task.QUEUED, run_at=timezone.now(), attempts=0
+        )
+        self.message_user(request, f'{updated} tasks queued again.')
+    requeue.short_description = 'Queue failed tasks again'
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,273 @@
+"""Cache backend in an SQLite file shared by the processes of a host.
+
+LOCATION is the path of the database file. Besides Django's TIMEOUT and
+KEY_PREFIX, OPTIONS may contain:
+
+* ``MAX_SIZE``: bytes of keys and pickled values kept (default 64 MB);
+* ``MAX_ENTRIES``: number of keys kept (default unlimited);
+* ``ACCESS_RESOLUTION``: seconds; a read records its time for LRU
+  eviction only if the last recorded read is older, so most reads don't
+  write (default 10).
+
+A write that takes the cache over a limit evicts expired keys, then the
+least recently used ones until the cache is at 90% of the limit.
+Increments run in a write transaction, so they are atomic across
+processes. Versioned keys come from Django's ``make_key``.
+"""
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+DEFAULT_ACCESS_RESOLUTION = 10
+CULL_TO = 0.9
+# Keys per SELECT ... IN (...), below SQLite's limit on parameters.
+CHUNK_SIZE = 500
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 64 * 1024 * 1024,
+}
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+CREATE TABLE IF NOT EXISTS cache_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL,
+    entries INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_stats VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_inserted AFTER INSERT ON cache BEGIN
+    UPDATE cache_stats SET size = size + new.size, entries = entries + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_updated AFTER UPDATE OF size ON cache
+BEGIN
+    UPDATE cache_stats SET size = size - old.size + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_deleted AFTER DELETE ON cache BEGIN
+    UPDATE cache_stats SET size = size - old.size, entries = entries - 1;
+END;
+'''
+UPSERT = '''
+INSERT INTO cache (key, value, size, expires, accessed)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value, size = excluded.size,
+    expires = excluded.expires, accessed = excluded.accessed
+'''
+# Least recently used keys until ``?`` bytes and ``?`` entries are freed.
+EVICT = '''
+DELETE FROM cache WHERE key IN (
+    SELECT key FROM (
+        SELECT key, size, SUM(size) OVER lru AS freed,
+               ROW_NUMBER() OVER lru AS number
+        FROM cache WINDOW lru AS (ORDER BY accessed, key)
+    ) WHERE freed - size < ? OR number <= ?
+)
+'''
+
+# Connections opened before a fork. The child must not use them, and
+# closing them there could disturb the parent's locks, so they are kept.
+_inherited = []
+
+
+class SQLiteCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location
+        self.max_size = int(options.get('MAX_SIZE', DEFAULT_MAX_SIZE))
+        self.max_entries = (
+            int(options['MAX_ENTRIES']) if 'MAX_ENTRIES' in options else None
+        )
+        self.access_resolution = options.get(
+            'ACCESS_RESOLUTION', DEFAULT_ACCESS_RESOLUTION
+        )
+        self._connection = None
+        self._pid = None
+
+    def _db(self):
+        if self._pid != os.getpid():
+            if self._connection is not None:
+                _inherited.append(self._connection)
+            self._connection = self._connect()
+            self._pid = os.getpid()
+        return self._connection
+
+    def _connect(self):
+        directory = os.path.dirname(self.location)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.location, isolation_level=None)
+        for name, value in PRAGMAS.items():
+            db.execute(f'PRAGMA {name} = {value}')
+        db.executescript(SCHEMA)
+        return db
+
+    @contextmanager
+    def _write(self):
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _row(self, key, value, timeout, now):
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = self.get_backend_timeout(timeout)
+        return key, value, len(key) + len(value), expires, now
+
+    def _fetch(self, keys):
+        """Live values of ``keys``, recording the reads for eviction."""
+        db = self._db()
+        now = time.time()
+        found = {}
+        read = []
+        for start in range(0, len(keys), CHUNK_SIZE):
+            chunk = keys[start:start + CHUNK_SIZE]
+            rows = db.execute(
+                'SELECT key, value, expires, accessed FROM cache '
+                f'WHERE key IN ({", ".join("?" * len(chunk))})', chunk
+            )
+            for key, value, expires, accessed in rows:
+                if expires is not None and expires <= now:
+                    continue
+                found[key] = pickle.loads(value)
+                if accessed < now - self.access_resolution:
+                    read.append((now, key))
+        if read:
+            with self._write() as db:
+                db.executemany(
+                    'UPDATE cache SET accessed = ? WHERE key = ?', read
+                )
+        return found
+
+    def _cull(self, db):
+        if not self._over_limit(db):
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        size, entries = db.execute(
+            'SELECT size, entries FROM cache_stats'
+        ).fetchone()
+        excess_size = max(size - int(self.max_size * CULL_TO), 0)
+        excess_entries = (
+            max(entries - int(self.max_entries * CULL_TO), 0)
+            if self.max_entries is not None else 0
+        )
+        if excess_size or excess_entries:
+            db.execute(EVICT, (excess_size, excess_entries))
+
+    def _over_limit(self, db):
+        size, entries = db.execute(
+            'SELECT size, entries FROM cache_stats'
+        ).fetchone()
+        return size > self.max_size or (
+            self.max_entries is not None and entries > self.max_entries
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as db:
+            added = db.execute(
+                f'{UPSERT} WHERE cache.expires <= ?',
+                (*self._row(key, value, timeout, now), now)
+            ).rowcount
+            self._cull(db)
+        return bool(added)
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._fetch([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        made = {self._key(key, version): key for key in keys}
+        return {
+            made[key]: value
+            for key, value in self._fetch(list(made)).items()
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        with self._write() as db:
+            db.execute(UPSERT, self._row(key, value, timeout, time.time()))
+            self._cull(db)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        rows = [
+            self._row(self._key(key, version), value, timeout, now)
+            for key, value in data.items()
+        ]
+        with self._write() as db:
+            db.executemany(UPSERT, rows)
+            self._cull(db)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        return self._db().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time())
+        ).rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        made_key = self._key(key, version)
+        with self._write() as db:
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (made_key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            db.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (pickled, len(made_key) + len(pickled), made_key)
+            )
+        return value
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._db().execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        return self._db().execute(
+            'DELETE FROM cache WHERE key = ?', (key,)
+        ).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [(self._key(key, version),) for key in keys]
+        with self._write() as db:
+            db.executemany('DELETE FROM cache WHERE key = ?', keys)
+
+    def clear(self):
+        self._db().execute('DELETE FROM cache')
@@ -0,0 +1,10 @@
+from django.utils.functional import SimpleLazyObject
+
+from posts.unread import unread_count
+
+
+def unread(request):
+    # Lazy: pages that don't show the badge don't read the cache.
+    return {
+        'unread_posts': SimpleLazyObject(lambda: unread_count(request))
+    }
@@ -0,0 +1,123 @@
+"""SQLite backend tuned for several concurrent web workers.
+
+Besides the sqlite3.connect() arguments, OPTIONS may contain:
+
+* ``pragmas``: PRAGMA name -> value applied to every new connection,
+  merged over ``DEFAULT_PRAGMAS``;
+* ``immediate_transactions``: open ``atomic`` blocks with
+  ``BEGIN IMMEDIATE`` so a transaction that reads before it writes can't
+  fail to upgrade its lock halfway through (default True);
+* ``busy_retries``: how many times a statement outside a transaction is
+  retried with exponential backoff after "database is locked" (default 5).
+* ``read_only``: open the file with ``mode=ro``, so a missing file is an
+  error instead of a new empty database (replicas; default False).
+
+Set CONN_MAX_AGE to keep the connections (and their page cache and mmap)
+across requests.
+"""
+import random
+import time
+from urllib.request import pathname2url
+
+from django.db.backends.sqlite3 import base
+from django.db.backends.sqlite3.base import Database
+
+DEFAULT_PRAGMAS = {
+    # readers don't block the writer and the writer doesn't block readers
+    'journal_mode': 'WAL',
+    # wait for a lock this many milliseconds before SQLITE_BUSY
+    'busy_timeout': 5000,
+    # in WAL mode NORMAL is durable across application crashes
+    'synchronous': 'NORMAL',
+    # negative values are KiB: 20 MB page cache per connection
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+CUSTOM_OPTIONS = ('pragmas', 'immediate_transactions', 'busy_retries',
+                  'read_only')
+BUSY_MESSAGES = ('database is locked', 'database table is locked')
+BACKOFF_BASE = 0.01
+BACKOFF_MAX = 0.5
+
+
+def is_busy_error(error):
+    return any(message in str(error) for message in BUSY_MESSAGES)
+
+
+def retry_on_busy(func, retries):
+    """Call ``func``, retrying with jittered exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except Database.OperationalError as error:
+            if attempt == retries or not is_busy_error(error):
+                raise
+            delay = min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX)
+            time.sleep(delay * random.uniform(0.5, 1.5))
+
+
+class RetryingCursorWrapper(base.SQLiteCursorWrapper):
+    busy_retries = 0
+
+    def execute(self, query, params=None):
+        execute = super().execute
+        if self.connection.in_transaction:
+            # Retrying one statement can't resolve a lock conflict held by
+            # the transaction as a whole.
+            return execute(query, params)
+        return retry_on_busy(
+            lambda: execute(query, params), self.busy_retries
+        )
+
+    def executemany(self, query, param_list):
+        executemany = super().executemany
+        if self.connection.in_transaction:
+            return executemany(query, param_list)
+        param_list = list(param_list)
+        return retry_on_busy(
+            lambda: executemany(query, param_list), self.busy_retries
+        )
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {**DEFAULT_PRAGMAS, **options.get('pragmas', {})}
+        self.immediate_transactions = options.get(
+            'immediate_transactions', True
+        )
+        self.busy_retries = options.get('busy_retries', 5)
+        for option in CUSTOM_OPTIONS:
+            params.pop(option, None)
+        self.read_only = options.get('read_only', False)
+        if self.read_only:
+            # BEGIN IMMEDIATE takes a write lock a read-only file refuses.
+            self.immediate_transactions = False
+            params['database'] = (
+                f"file:{pathname2url(params['database'])}?mode=ro"
+            )
+            params['uri'] = True
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            if self.read_only and name == 'journal_mode':
+                # The file's mode, which only a writer can change.
+                continue
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=RetryingCursorWrapper)
+        cursor.busy_retries = self.busy_retries
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        if self.immediate_transactions:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,87 @@
+"""Routing of read-only requests to replica databases.
+
+``ReplicaRoutingMiddleware`` marks the requests that may read from a
+replica; ``ReplicaRouter`` then spreads their reads over the healthy
+aliases of ``settings.DATABASE_REPLICAS`` by weight. Everything else,
+including every write, goes to ``default``.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.utils import ConnectionDoesNotExist
+
+HEALTH_CHECK_INTERVAL = 10
+
+
+class RoutingState:
+    def __init__(self, use_replica=False):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+routing_state = ContextVar('routing_state', default=None)
+
+# alias -> (healthy, checked at), shared by the threads of the process
+_health = {}
+
+
+def check_replica(alias):
+    """Whether a replica answers a query on one of the project's tables:
+    a missing or never synced copy has none."""
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+    except ConnectionDoesNotExist:
+        return False
+    except DatabaseError:
+        connections[alias].close()
+        return False
+    return True
+
+
+def is_healthy(alias):
+    interval = getattr(
+        settings, 'REPLICA_HEALTH_CHECK_INTERVAL', HEALTH_CHECK_INTERVAL
+    )
+    healthy, checked = _health.get(alias, (None, 0))
+    now = time.monotonic()
+    if healthy is None or now - checked > interval:
+        healthy = check_replica(alias)
+        _health[alias] = (healthy, now)
+    return healthy
+
+
+def choose_replica():
+    """A healthy replica picked by weight, or None to use the primary."""
+    replicas = getattr(settings, 'DATABASE_REPLICAS', {})
+    healthy = [alias for alias in replicas if is_healthy(alias)]
+    if not healthy:
+        return None
+    weights = [replicas[alias] for alias in healthy]
+    return random.choices(healthy, weights)[0]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return None
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            # read-your-writes: the rest of the request uses the primary
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, 'DATABASE_REPLICAS', {}):
+            return False
+        return None
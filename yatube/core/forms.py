@@ -0,0 +1,24 @@
+import re
+
+from django import forms
+
+
+class ProfilerForm(forms.Form):
+    pattern = forms.CharField(
+        label='Шаблон адреса',
+        help_text='Регулярное выражение, например ^/follow/',
+    )
+    requests = forms.IntegerField(
+        label='Запросов', min_value=1, max_value=100, initial=10
+    )
+    interval = forms.IntegerField(
+        label='Интервал, мс', min_value=1, max_value=100, initial=5
+    )
+
+    def clean_pattern(self):
+        pattern = self.cleaned_data['pattern']
+        try:
+            re.compile(pattern)
+        except re.error as error:
+            raise forms.ValidationError(f'Неверное выражение: {error}')
+        return pattern
@@ -0,0 +1,83 @@
+"""Jinja2 environment for the feed templates in ``jinja2/``.
+
+The helpers mirror the Django tags the templates in ``templates/`` use:
+``url()`` and ``static()`` for ``{% url %}`` and ``{% static %}``,
+``thumbnail()`` for sorl's ``{% thumbnail %}``, the ``addclass``,
+``date`` and ``richtext`` filters, and ``{% cache %}`` with the keys of
+Django's tag. Compiled templates stay in the environment; with ``DEBUG``
+off they are never checked for changes.
+"""
+import logging
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.defaultfilters import date
+from django.urls import reverse
+from jinja2 import Environment, nodes
+from jinja2.ext import Extension
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.conf import settings as sorl_settings
+
+from posts.richtext import richtext
+
+from .templatetags.user_filters import addclass
+
+logger = logging.getLogger('sorl.thumbnail')
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def thumbnail(file, geometry, **options):
+    """The thumbnail of ``file``, or None without an image or on error."""
+    if not file:
+        return None
+    try:
+        return get_thumbnail(file, geometry, **options)
+    except Exception:
+        if sorl_settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Thumbnail failed for %s', file)
+        return None
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache timeout, name, *vary_on %}...{% endcache %}``."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_cache', [nodes.List(args)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _cache(self, args, caller):
+        timeout, name, *vary_on = args
+        key = make_template_fragment_key(name, vary_on)
+        value = cache.get(key)
+        if value is None:
+            value = caller()
+            cache.set(key, value, timeout)
+        return value
+
+
+def environment(**options):
+    env = Environment(extensions=[FragmentCacheExtension], **options)
+    env.globals.update({
+        'url': url,
+        'static': staticfiles_storage.url,
+        'thumbnail': thumbnail,
+    })
+    env.filters.update({
+        'addclass': addclass,
+        'date': date,
+        'richtext': richtext,
+    })
+    return env
@@ -0,0 +1,361 @@
+"""Load tests of the site with concurrent virtual users.
+
+A virtual user is a thread with its own cookies that runs its scenario
+in a loop until the test ends. Requests go to the WSGI application in
+this process (``WSGITarget``) or over HTTP to a running server
+(``HTTPTarget``). Timings are recorded per view, the path resolved
+against this project's URLconf, so both targets report the same names.
+
+In-process, the GIL runs one thread's Python code at a time: the
+numbers compare revisions of the code on the same machine rather than
+predict the capacity of a multi-process server.
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from http.cookies import SimpleCookie
+from io import BytesIO
+from urllib.parse import urlencode, urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.urls import Resolver404, resolve, reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# Timeout of HTTP requests, seconds.
+TIMEOUT = 30
+
+
+class Response:
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class WSGITarget:
+    """Calls a WSGI application in this process."""
+
+    def __init__(self, application):
+        self.application = application
+
+    def request(self, method, path, headers, body):
+        url = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': BytesIO(body),
+        }
+        for name, value in headers.items():
+            key = name.upper().replace('-', '_')
+            environ[key if key == 'CONTENT_TYPE' else f'HTTP_{key}'] = value
+        setup_testing_defaults(environ)
+        started = []
+
+        def start_response(status, response_headers, exc_info=None):
+            started.append((int(status.split()[0]), response_headers))
+
+        result = self.application(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        status, response_headers = started[0]
+        return Response(status, response_headers, content)
+
+
+class HTTPTarget:
+    """Sends requests to a server; one keep-alive connection a thread."""
+
+    def __init__(self, base_url):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.local = threading.local()
+
+    def request(self, method, path, headers, body):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=TIMEOUT
+            )
+            self.local.connection = connection
+        try:
+            connection.request(method, path, body or None, headers)
+            response = connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self.local.connection = None
+            raise
+        return Response(response.status, response.getheaders(), content)
+
+
+def view_name(path):
+    try:
+        return resolve(urlsplit(path).path).view_name
+    except Resolver404:
+        return 'unresolved'
+
+
+class Stats:
+    """Latencies and errors per view, shared by the virtual users."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = Counter()
+
+    def record(self, view, seconds, error=False):
+        with self.lock:
+            self.timings[view].append(seconds)
+            if error:
+                self.errors[view] += 1
+
+    def fail(self, name):
+        """A scenario step failed outside a request."""
+        with self.lock:
+            self.errors[name] += 1
+
+    def summary(self, elapsed):
+        """Rows of view, requests, errors, requests per second and the
+        p50, p95 and p99 latencies in seconds; the total comes last."""
+        rows = []
+        everything = []
+        for view in sorted(set(self.timings) | set(self.errors)):
+            timings = self.timings.get(view, [])
+            everything.extend(timings)
+            rows.append(self.row(view, timings, self.errors[view], elapsed))
+        rows.append(self.row(
+            'total', everything, sum(self.errors.values()), elapsed
+        ))
+        return rows
+
+    @staticmethod
+    def row(view, timings, errors, elapsed):
+        ordered = sorted(timings)
+        percentiles = [
+            percentile(ordered, share) if ordered else 0
+            for share in (0.5, 0.95, 0.99)
+        ]
+        return {
+            'view': view,
+            'requests': len(timings),
+            'errors': errors,
+            'rps': len(timings) / elapsed if elapsed else 0,
+            'p50': percentiles[0],
+            'p95': percentiles[1],
+            'p99': percentiles[2],
+        }
+
+
+def percentile(ordered, share):
+    """Linearly interpolated percentile of sorted values.
+
+    The same as ``statistics.quantiles(method='inclusive')``, which
+    Python 3.7 doesn't have.
+    """
+    position = (len(ordered) - 1) * share
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+class Client:
+    """A virtual user: cookies, CSRF token and timed requests."""
+
+    def __init__(self, target, stats):
+        self.target = target
+        self.stats = stats
+        self.cookies = {}
+
+    def get(self, path):
+        return self.request('GET', path)
+
+    def post(self, path, data):
+        return self.request('POST', path, data)
+
+    def request(self, method, path, data=None):
+        headers = {}
+        body = b''
+        if self.cookies:
+            headers['Cookie'] = '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            )
+        if data is not None:
+            body = urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            if 'csrftoken' in self.cookies:
+                headers['X-CSRFToken'] = self.cookies['csrftoken']
+        view = view_name(path)
+        started = time.perf_counter()
+        try:
+            response = self.target.request(method, path, headers, body)
+        except Exception:
+            self.stats.record(view, time.perf_counter() - started, True)
+            return None
+        self.stats.record(
+            view, time.perf_counter() - started, response.status >= 400
+        )
+        self.keep_cookies(response)
+        return response
+
+    def keep_cookies(self, response):
+        for name, value in response.headers:
+            if name.lower() != 'set-cookie':
+                continue
+            for morsel in SimpleCookie(value).values():
+                if morsel['max-age'] == '0':
+                    self.cookies.pop(morsel.key, None)
+                else:
+                    self.cookies[morsel.key] = morsel.value
+
+    def login(self, username, password):
+        # The login page sets the CSRF cookie the form needs.
+        self.get(reverse('users:login'))
+        response = self.post(reverse('users:login'), {
+            'username': username, 'password': password,
+        })
+        return response is not None and response.status == 302
+
+
+class Dataset:
+    """What the scenarios pick from, sampled from the database."""
+
+    def __init__(self, sample=1000):
+        self.posts = list(
+            Post.objects.order_by('-pk').values_list('pk', flat=True)
+            [:sample]
+        )
+        self.groups = list(
+            Group.objects.order_by('pk').values_list('slug', flat=True)
+            [:sample]
+        )
+        self.authors = list(
+            User.objects.filter(posts__isnull=False).distinct()
+            .order_by('pk').values_list('username', flat=True)[:sample]
+        )
+        self.users = list(
+            User.objects.filter(username__startswith='user_')
+            .order_by('pk').values_list('username', flat=True)[:sample]
+        ) or self.authors
+
+
+def browse(client, data):
+    """An anonymous reader: feed pages, a group, a post, an author."""
+    client.get(reverse('posts:index'))
+    client.get(f"{reverse('posts:index')}?page={random.randint(2, 5)}")
+    if data.groups:
+        client.get(reverse('posts:group_list',
+                           args=[random.choice(data.groups)]))
+    if data.posts:
+        client.get(reverse('posts:post_detail',
+                           args=[random.choice(data.posts)]))
+    if data.authors:
+        client.get(reverse('posts:profile',
+                           args=[random.choice(data.authors)]))
+
+
+def follow_feed(client, data):
+    """A logged-in reader of the followed authors' feed."""
+    client.get(reverse('posts:follow_index'))
+    client.get(f"{reverse('posts:follow_index')}?page=2")
+
+
+def comment(client, data):
+    """A logged-in reader who opens a post and comments on it."""
+    if not data.posts:
+        return
+    post_id = random.choice(data.posts)
+    client.get(reverse('posts:post_detail', args=[post_id]))
+    client.post(reverse('posts:add_comment', args=[post_id]), {
+        'text': f'Комментарий нагрузочного теста {random.random()}',
+    })
+
+
+def api_scroll(client, data, pages=5):
+    """An API client reading the posts page after page."""
+    path = f"{reverse('api:posts-list')}?limit=20"
+    for _ in range(pages):
+        response = client.get(path)
+        if response is None or response.status != 200:
+            return
+        next_url = response.json().get('next')
+        if not next_url:
+            return
+        url = urlsplit(next_url)
+        path = f'{url.path}?{url.query}'
+
+
+# name -> (scenario, whether its users log in)
+SCENARIOS = {
+    'browse': (browse, False),
+    'follow': (follow_feed, True),
+    'comment': (comment, True),
+    'api': (api_scroll, False),
+}
+
+
+def assign(weights, users):
+    """Scenario names of ``users`` virtual users, spread by weight: each
+    user gets the scenario furthest below its share so far, so that a few
+    users still cover every scenario."""
+    assigned = Counter()
+    names = []
+    for _ in range(users):
+        name = min(weights, key=lambda name: assigned[name] / weights[name])
+        assigned[name] += 1
+        names.append(name)
+    return names
+
+
+def run(target, weights, users, duration, data, password, ramp_up=0):
+    """Run the virtual users for ``duration`` seconds; return the Stats
+    and the time measured."""
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + ramp_up + duration
+
+    def virtual_user(number, name):
+        scenario, logs_in = SCENARIOS[name]
+        client = Client(target, stats)
+        try:
+            time.sleep(ramp_up * number / users)
+            if logs_in and not client.login(
+                data.users[number % len(data.users)], password
+            ):
+                stats.fail(f'{name}: login')
+                return
+            while time.monotonic() < deadline:
+                try:
+                    scenario(client, data)
+                except Exception:
+                    stats.fail(f'{name}: scenario')
+        finally:
+            # The thread's own connections.
+            connections.close_all()
+
+    threads = [
+        threading.Thread(target=virtual_user, args=(number, name),
+                         daemon=True)
+        for number, name in enumerate(assign(weights, users))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats, time.monotonic() - started - ramp_up
@@ -0,0 +1,132 @@
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+ALIAS = 'write_benchmark'
+PROFILES = {
+    'django sqlite3': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'OPTIONS': {},
+    },
+    'tuned profile': {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'OPTIONS': {},
+    },
+}
+SCHEMA = (
+    'CREATE TABLE bench_comment ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, post_id INTEGER, text TEXT)',
+    'CREATE INDEX bench_comment_post ON bench_comment(post_id)',
+)
+
+
+def settings_dict(profile, name):
+    return {
+        'NAME': name,
+        'ATOMIC_REQUESTS': False,
+        'AUTOCOMMIT': True,
+        'CONN_MAX_AGE': 0,
+        'TIME_ZONE': None,
+        'USER': '',
+        'PASSWORD': '',
+        'HOST': '',
+        'PORT': '',
+        'TEST': {},
+        **PROFILES[profile],
+    }
+
+
+def add_comment(post_id):
+    """What add_comment does: look the post up, then insert a row."""
+    with transaction.atomic(using=ALIAS):
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute(
+                'SELECT COUNT(*) FROM bench_comment WHERE post_id = %s',
+                [post_id]
+            )
+            cursor.execute(
+                'INSERT INTO bench_comment(post_id, text) VALUES (%s, %s)',
+                [post_id, 'x' * 200]
+            )
+
+
+def worker(database, writes, results):
+    connections.databases[ALIAS] = database
+    latencies, errors = [], 0
+    for i in range(writes):
+        started = time.perf_counter()
+        try:
+            add_comment(i % 50)
+        except OperationalError:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+    connections[ALIAS].close()
+    results.put((latencies, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent add_comment-like writes from several processes '
+        'against a scratch SQLite file with the stock Django backend and '
+        'with core.db.backends.sqlite3, and compare lock errors, '
+        'throughput and latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=200)
+
+    def handle(self, *args, **options):
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        for profile in PROFILES:
+            with tempfile.TemporaryDirectory() as directory:
+                database = settings_dict(
+                    profile, os.path.join(directory, 'bench.sqlite3')
+                )
+                self.create_schema(database)
+                results = context.Queue()
+                processes = [
+                    context.Process(
+                        target=worker,
+                        args=(database, options['writes'], results)
+                    )
+                    for _ in range(options['processes'])
+                ]
+                started = time.perf_counter()
+                for process in processes:
+                    process.start()
+                collected = [results.get() for _ in processes]
+                elapsed = time.perf_counter() - started
+                for process in processes:
+                    process.join()
+            self.report(profile, collected, elapsed)
+
+    @staticmethod
+    def create_schema(database):
+        connections.databases[ALIAS] = database
+        try:
+            with connections[ALIAS].cursor() as cursor:
+                for statement in SCHEMA:
+                    cursor.execute(statement)
+        finally:
+            connections[ALIAS].close()
+            del connections[ALIAS]
+
+    def report(self, profile, collected, elapsed):
+        latencies = sorted(
+            latency * 1000 for result, _ in collected for latency in result
+        )
+        errors = sum(error for _, error in collected)
+        done = len(latencies) - errors
+        self.stdout.write(
+            f'{profile:>15}: {done / elapsed:8.1f} writes/s, '
+            f'{errors} locked errors, '
+            f'p50 {statistics.median(latencies):.1f} ms, '
+            f'p99 {latencies[int(len(latencies) * 0.99)]:.1f} ms'
+        )
@@ -0,0 +1,121 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+IMPORT_LINE_RE = re.compile(
+    r'import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \| '
+    r'(?P<indent>\s*)(?P<module>\S+)'
+)
+# Run in a fresh interpreter: load the WSGI application the way a
+# worker does and serve two requests without a server.
+FIRST_REQUEST = '''
+import json, sys, time
+started = time.perf_counter()
+from yatube.wsgi import application
+loaded = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+timings = []
+for _ in range(2):
+    environ = {'PATH_INFO': sys.argv[1]}
+    setup_testing_defaults(environ)
+    status = []
+    request_started = time.perf_counter()
+    b''.join(application(environ, lambda s, h, e=None: status.append(s)))
+    timings.append(time.perf_counter() - request_started)
+print(json.dumps({
+    'load': loaded - started,
+    'first': timings[0],
+    'second': timings[1],
+    'status': status[0],
+    'modules': len(sys.modules),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold start of the WSGI application in fresh interpreters: '
+        'import time per package (python -X importtime) and the time to '
+        'the first and second request, for each worker role with and '
+        'without the pre-fork warm-up.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument(
+            '--roles', nargs='+', default=['all', 'web'],
+            help='Values of YATUBE_ROLE to compare.'
+        )
+
+    def handle(self, *args, **options):
+        for role in options['roles']:
+            self.report_imports(role, options['top'])
+        self.stdout.write(
+            f'\n{"role":>5} {"warm-up":>8} {"load":>9} {"first req":>10} '
+            f'{"second req":>11} {"modules":>8}'
+        )
+        for role in options['roles']:
+            for warmup in ('0', '1'):
+                self.report_first_request(role, warmup, options)
+
+    def run(self, args, role, warmup='0'):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'yatube.settings'
+            ),
+            'YATUBE_ROLE': role,
+            'WSGI_WARMUP': warmup,
+        }
+        return subprocess.run(
+            [sys.executable, *args], cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True, check=True
+        )
+
+    def report_imports(self, role, top):
+        result = self.run(['-X', 'importtime', '-c', 'import yatube.wsgi'],
+                          role)
+        packages = Counter()
+        total = 0
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE_RE.match(line)
+            if match is None:
+                continue
+            packages[match['module'].split('.')[0]] += int(match['self'])
+            if not match['indent']:
+                total += int(match['cumulative'])
+        self.stdout.write(
+            f'\nImports of yatube.wsgi as "{role}": {total / 1000:.0f} ms, '
+            f'{len(packages)} packages'
+        )
+        for package, microseconds in packages.most_common(top):
+            self.stdout.write(f'{microseconds / 1000:10.1f} ms  {package}')
+
+    def report_first_request(self, role, warmup, options):
+        runs = [
+            json.loads(self.run(
+                ['-c', FIRST_REQUEST, options['path']], role, warmup
+            ).stdout)
+            for _ in range(options['repeat'])
+        ]
+
+        def median_ms(key):
+            return statistics.median(run[key] for run in runs) * 1000
+
+        self.stdout.write(
+            f'{role:>5} {"on" if warmup == "1" else "off":>8} '
+            f'{median_ms("load"):7.0f}ms {median_ms("first"):8.0f}ms '
+            f'{median_ms("second"):9.1f}ms {runs[0]["modules"]:8}'
+            + ('' if runs[0]['status'].startswith('200')
+               else f'  ({runs[0]["status"]})')
+        )
@@ -0,0 +1,107 @@
+import statistics
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+
+TEMPLATES = ('posts/group_list.html', 'posts/profile.html',
+             'posts/index.html')
+CACHED_LOADERS = [('django.template.loaders.cached.Loader', [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+])]
+
+
+def cached_django_engine():
+    """The project's Django engine with the cached template loader."""
+    config = next(
+        config for config in settings.TEMPLATES
+        if config['BACKEND'].endswith('DjangoTemplates')
+    )
+    return DjangoTemplates({
+        'NAME': 'django-cached',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {**config.get('OPTIONS', {}), 'loaders': CACHED_LOADERS},
+    })
+
+
+def feed_context(posts_per_page=10):
+    """Second page of a feed of unsaved posts without images."""
+    author = User(pk=1, username='author', first_name='Лев',
+                  last_name='Толстой')
+    group = Group(pk=1, title='Группа', slug='group',
+                  description='Описание группы')
+    posts = [
+        Post(pk=number, author=author, group=group, created=timezone.now(),
+             text=f'Текст поста номер {number}. ' * 10)
+        for number in range(1, posts_per_page * 3 + 1)
+    ]
+    return {
+        'page_obj': Paginator(posts, posts_per_page).get_page(2),
+        'group': group,
+        'author': author,
+        'count': len(posts),
+        'following': False,
+        'feed_version': 1,
+        'index': True,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the feed templates on a 10-post page with the Django '
+        'engine as configured, the Django engine with the cached loader '
+        'and the Jinja2 engine; report the first render (load and '
+        'compile) and the median of the others. posts/index.html renders '
+        'its {% cache %} block from the cache after the first time.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--templates', nargs='+', default=TEMPLATES)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.resolver_match = resolve('/')
+        context = feed_context()
+        candidates = {
+            'django': engines['django'],
+            'django-cached': cached_django_engine(),
+            'jinja2': engines['jinja2'],
+        }
+        self.stdout.write(
+            f'{"template":<24} {"engine":<14} {"first":>9} {"median":>9} '
+            f'{"renders/s":>10}'
+        )
+        for name in options['templates']:
+            baseline = None
+            for label, engine in candidates.items():
+                timings = self.render(engine, name, context, request,
+                                      options['repeat'])
+                median = statistics.median(timings[1:])
+                baseline = baseline or median
+                self.stdout.write(
+                    f'{name:<24} {label:<14} {timings[0] * 1000:7.2f}ms '
+                    f'{median * 1000:7.3f}ms {1 / median:10.0f}'
+                    f'  x{baseline / median:.1f}'
+                )
+
+    @staticmethod
+    def render(engine, name, context, request, repeat):
+        timings = []
+        for _ in range(repeat + 1):
+            started = perf_counter()
+            engine.get_template(name).render(context, request)
+            timings.append(perf_counter() - started)
+        return timings
@@ -0,0 +1,86 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import (
+    SCENARIOS, Dataset, HTTPTarget, WSGITarget, run,
+)
+from posts.management.commands.generate_dataset import DATASET_PASSWORD
+
+DEFAULT_SCENARIOS = ['browse=6', 'follow=2', 'comment=1', 'api=1']
+
+
+def scenario_weight(value):
+    name, _, weight = value.partition('=')
+    if name not in SCENARIOS:
+        raise ValueError(value)
+    return name, int(weight or 1)
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the site with concurrent virtual users running the '
+        f'scenarios ({", ".join(SCENARIOS)}) against the WSGI application '
+        'in this process or, with --url, a running server. Meant for the '
+        'database filled by generate_dataset: logged-in scenarios sign in '
+        'as its users. Reports requests per second, p50/p95/p99 latency '
+        'and errors per view. The comment scenario writes comments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', help='Base URL of a running server, e.g. '
+                          'http://127.0.0.1:8000; in-process by default.'
+        )
+        parser.add_argument('--users', type=int, default=20,
+                            help='Concurrent virtual users.')
+        parser.add_argument('--duration', type=float, default=30,
+                            help='Seconds to run after the ramp-up.')
+        parser.add_argument('--ramp-up', type=float, default=0,
+                            help='Seconds over which the users start.')
+        parser.add_argument(
+            '--scenario', type=scenario_weight, action='append',
+            dest='scenarios', metavar='NAME[=WEIGHT]',
+            help=f'Repeatable; default: {" ".join(DEFAULT_SCENARIOS)}.'
+        )
+        parser.add_argument('--password', default=DATASET_PASSWORD)
+        parser.add_argument('--sample', type=int, default=1000,
+                            help='Posts, groups and users to pick from.')
+        parser.add_argument('--json', action='store_true',
+                            help='Print the results as JSON.')
+
+    def handle(self, *args, **options):
+        weights = dict(
+            options['scenarios']
+            or map(scenario_weight, DEFAULT_SCENARIOS)
+        )
+        if options['url']:
+            target = HTTPTarget(options['url'])
+        else:
+            from yatube.wsgi import application
+            target = WSGITarget(application)
+        data = Dataset(options['sample'])
+        logs_in = any(SCENARIOS[name][1] for name in weights)
+        if logs_in and not data.users:
+            raise CommandError('No users to log in as: run generate_dataset')
+        stats, elapsed = run(
+            target, weights, options['users'], options['duration'], data,
+            options['password'], options['ramp_up']
+        )
+        rows = stats.summary(elapsed)
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        self.stdout.write(
+            f'{"view":<28} {"requests":>8} {"errors":>7} {"req/s":>8} '
+            f'{"p50":>8} {"p95":>8} {"p99":>8}'
+        )
+        for row in rows:
+            self.stdout.write(
+                f'{row["view"]:<28} {row["requests"]:>8} '
+                f'{row["errors"]:>7} {row["rps"]:>8.1f} '
+                + ' '.join(
+                    f'{row[key] * 1000:>6.1f}ms'
+                    for key in ('p50', 'p95', 'p99')
+                )
+            )
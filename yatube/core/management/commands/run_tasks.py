@@ -0,0 +1,126 @@
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils.module_loading import autodiscover_modules
+
+logger = logging.getLogger('yatube.tasks')
+
+
+def init_process():
+    """Set up Django in a spawned pool process."""
+    django.setup()
+    autodiscover_modules('tasks')
+
+
+def run(pk):
+    """Execute a task in a pool worker with a healthy connection."""
+    # Imported here: spawned processes import this module before
+    # init_process has set Django up.
+    from core import queue
+    close_old_connections()
+    try:
+        queue.execute(pk)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued tasks (see core.queue) in a pool of threads or '
+        'processes. Tasks are imported from the "tasks" module of every '
+        'installed app.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Size of the pool (0 runs tasks in this thread).'
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Use processes instead of threads for CPU-bound tasks.'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Seconds to wait for new tasks when the queue is empty.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when no task is due instead of polling.'
+        )
+
+    def handle(self, *args, **options):
+        from core import queue
+        self.queue = queue
+        autodiscover_modules('tasks')
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.options = options
+        if not options['workers']:
+            self.run_inline()
+            return
+        if options['processes']:
+            # Spawned rather than forked: children must not inherit the
+            # open database connection.
+            executor = ProcessPoolExecutor(
+                options['workers'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_process,
+            )
+        else:
+            executor = ThreadPoolExecutor(options['workers'])
+        self.stdout.write(
+            f'Worker {self.worker} started with {options["workers"]} '
+            f'{"processes" if options["processes"] else "threads"}'
+        )
+        try:
+            self.run_pool(executor)
+        except KeyboardInterrupt:
+            self.stdout.write('Finishing running tasks...')
+        finally:
+            executor.shutdown()
+
+    def run_inline(self):
+        while True:
+            pks = self.queue.claim(self.worker, 1)
+            if pks:
+                self.queue.execute(pks[0])
+            elif self.options['once']:
+                return
+            else:
+                time.sleep(self.options['poll'])
+
+    def run_pool(self, executor):
+        running = {}
+        while True:
+            free = self.options['workers'] - len(running)
+            if free:
+                running.update(
+                    (executor.submit(run, pk), pk)
+                    for pk in self.queue.claim(self.worker, free)
+                )
+            if not running:
+                if self.options['once']:
+                    return
+                time.sleep(self.options['poll'])
+                continue
+            done, _ = wait(
+                running, timeout=self.options['poll'],
+                return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                pk = running.pop(future)
+                # Failures of the task itself are handled by execute();
+                # this is e.g. a claimed row deleted meanwhile. One bad
+                # task must not stop the pool.
+                try:
+                    future.result()
+                except Exception:
+                    logger.exception('Task %s could not be run', pk)
@@ -0,0 +1,42 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the SQLite primary database into the replica files of '
+        'DATABASE_REPLICAS, once or every --interval seconds to imitate '
+        'replication lag.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None)
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if 'sqlite3' not in primary['ENGINE']:
+            raise CommandError('Replica copies work for SQLite only.')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('DB_REPLICAS is not set.')
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                self.copy(primary['NAME'], settings.DATABASES[alias]['NAME'])
+                self.stdout.write(f'{alias} synced')
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
+
+    @staticmethod
+    def copy(source_name, target_name):
+        # The backup API takes a consistent snapshot of a live database.
+        source = sqlite3.connect(source_name)
+        target = sqlite3.connect(target_name)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,280 @@
+"""Prometheus metrics shared by all worker processes of a host.
+
+Each process keeps its counters and histograms in memory and a
+background thread writes them every ``FLUSH_INTERVAL`` seconds to its
+own file in ``METRICS_DIR``. The ``/metrics`` view adds up the files of
+all processes. A process deletes the files of exited processes when it
+writes its first one: their counts go with them, which Prometheus
+reads as a counter reset. Gauges such as queue depths are read from the
+database at scrape time. Without ``METRICS_DIR`` nothing is recorded.
+"""
+import atexit
+import json
+import os
+import re
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count
+
+FLUSH_INTERVAL = 1.0
+FRAGMENT_KEY_RE = re.compile(r'template\.cache\.(?P<fragment>[^.]+)\.')
+KEY_GROUP_RE = re.compile(r'[A-Za-z_-]*')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# name: (type, help, buckets)
+METRICS = {
+    'yatube_request_duration_seconds': (
+        'histogram', 'Request latency by view and status code.',
+        LATENCY_BUCKETS,
+    ),
+    'yatube_request_db_queries': (
+        'histogram', 'Database queries per request by view.',
+        QUERY_BUCKETS,
+    ),
+    'yatube_cache_requests_total': (
+        'counter', 'Cache lookups by cache, key group and result. Template '
+        'fragments are grouped by fragment name.', None,
+    ),
+    'yatube_thumbnail_seconds': (
+        'histogram', 'Time to render a thumbnail by geometry.',
+        LATENCY_BUCKETS,
+    ),
+}
+
+
+def enabled():
+    return bool(getattr(settings, 'METRICS_DIR', None))
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Someone else's process.
+        return True
+    return True
+
+
+def prune(directory):
+    """Delete the files of the processes that have exited."""
+    for name in os.listdir(directory):
+        pid = name.partition('-')[0]
+        if not pid.isdigit() or is_running(int(pid)):
+            continue
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            # Pruned by another process.
+            pass
+
+
+class Registry:
+    """Metric values of this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flusher = None
+        self.reset()
+        os.register_at_fork(after_in_child=self.after_fork)
+
+    def reset(self):
+        self.values = defaultdict(float)
+        self.histograms = {}
+        self.dirty = False
+        self.path = None
+
+    def after_fork(self):
+        # A forked child starts empty: the values so far belong to the
+        # parent, which flushes them to its own file. The flusher thread
+        # does not survive the fork.
+        self.lock = threading.Lock()
+        self.flusher = None
+        self.reset()
+
+    def inc(self, name, labels, value=1):
+        if not enabled():
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] += value
+            self.dirty = True
+        self.start_flusher()
+
+    def observe(self, name, labels, value):
+        if not enabled():
+            return
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+            self.dirty = True
+        self.start_flusher()
+
+    def start_flusher(self):
+        if self.flusher is None:
+            with self.lock:
+                if self.flusher is None:
+                    self.flusher = threading.Thread(
+                        target=self.flush_periodically, daemon=True
+                    )
+                    self.flusher.start()
+
+    def flush_periodically(self):
+        stop = threading.Event()
+        while not stop.wait(FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {
+                'values': [[name, labels, value] for (name, labels), value
+                           in self.values.items()],
+                'histograms': [[name, labels, value] for (name, labels), value
+                               in self.histograms.items()],
+            }
+            self.dirty = False
+        if self.path is None or os.path.dirname(self.path) != directory:
+            os.makedirs(directory, exist_ok=True)
+            prune(directory)
+            self.path = os.path.join(
+                directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+            )
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as metrics_file:
+            json.dump(data, metrics_file)
+        os.replace(temporary, self.path)
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+def key_group(key):
+    """A label for a cache key: the fragment name of ``{% cache %}``
+    blocks, the leading word of other keys."""
+    match = FRAGMENT_KEY_RE.match(key)
+    if match:
+        return f'fragment:{match["fragment"]}'
+    return KEY_GROUP_RE.match(key).group() or 'other'
+
+
+def count_cache(cache, key, hit):
+    """``core.timing`` cache observer."""
+    registry.inc('yatube_cache_requests_total', {
+        'backend': type(cache).__name__,
+        'group': key_group(str(key)),
+        'result': 'hit' if hit else 'miss',
+    })
+
+
+def read_all():
+    """Sum the files of every process in ``METRICS_DIR``."""
+    values = defaultdict(float)
+    histograms = {}
+    directory = getattr(settings, 'METRICS_DIR', None)
+    names = (
+        os.listdir(directory)
+        if directory and os.path.isdir(directory) else []
+    )
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as metrics_file:
+                data = json.load(metrics_file)
+        except (OSError, ValueError):
+            continue
+        for metric, labels, value in data['values']:
+            values[metric, tuple(map(tuple, labels))] += value
+        for metric, labels, value in data['histograms']:
+            key = metric, tuple(map(tuple, labels))
+            if key in histograms:
+                histograms[key] = [
+                    a + b for a, b in zip(histograms[key], value)
+                ]
+            else:
+                histograms[key] = value
+    return values, histograms
+
+
+def format_labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def queue_gauges():
+    """Queue depths by status, read at scrape time."""
+    from core.models import Task
+    from users.models import OutboxMessage
+    gauges = {}
+    for name, model in (('yatube_task_queue_depth', Task),
+                        ('yatube_outbox_depth', OutboxMessage)):
+        gauges[name] = [
+            ((('status', row['status']),), row['count'])
+            for row in model.objects.order_by().values('status')
+            .annotate(count=Count('pk'))
+        ]
+    return gauges
+
+
+def render():
+    """All metrics in the Prometheus text format."""
+    registry.flush()
+    values, histograms = read_all()
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            lines += [
+                f'{name}{format_labels(labels)} {format_value(value)}'
+                for (metric, labels), value in sorted(values.items())
+                if metric == name
+            ]
+            continue
+        for (metric, labels), counts in sorted(histograms.items()):
+            if metric != name:
+                continue
+            for bound, count in zip((*buckets, '+Inf'),
+                                    (*counts[:-2], counts[-1])):
+                lines.append(
+                    f'{name}_bucket{format_labels(labels, le=bound)} {count}'
+                )
+            lines.append(f'{name}_sum{format_labels(labels)} {counts[-2]}')
+            lines.append(f'{name}_count{format_labels(labels)} {counts[-1]}')
+    for name, samples in queue_gauges().items():
+        lines += [f'# HELP {name} Rows by status.', f'# TYPE {name} gauge']
+        lines += [
+            f'{name}{format_labels(labels)} {value}'
+            for labels, value in samples
+        ]
+    return '\n'.join(lines) + '\n'
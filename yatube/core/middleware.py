@@ -0,0 +1,238 @@
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics, profiler, static, timing
+from .db.routers import RoutingState, routing_state
+from .slowqueries import SlowQueryLogger, current_view
+
+performance_logger = logging.getLogger('yatube.performance')
+
+REPLICA_PIN_COOKIE = 'primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class StaticFilesMiddleware:
+    """Serve the collected ``STATIC_ROOT`` (see core.static).
+
+    The file list is read once at startup, after ``collectstatic``. With
+    ``SERVE_STATIC`` off the middleware removes itself.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVE_STATIC', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.files = static.scan(settings.STATIC_ROOT)
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS and request.path.startswith(
+            self.prefix
+        ):
+            static_file = self.files.get(request.path[len(self.prefix):])
+            if static_file is not None:
+                return static_file.response(request)
+        return self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """Let read-only views read from replicas unless the client just wrote.
+
+    After a request that wrote to the database the client gets a cookie
+    pinning it to the primary for ``REPLICA_PIN_SECONDS``, so it always
+    sees its own writes even if the replicas lag behind.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState()
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        if state.wrote or request.method not in SAFE_METHODS:
+            pin_seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                REPLICA_PIN_COOKIE,
+                str(int(time.time() + pin_seconds)),
+                max_age=pin_seconds,
+                httponly=True,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = routing_state.get()
+        if state is not None:
+            state.use_replica = self.reads_from_replica(request)
+
+    def reads_from_replica(self, request):
+        if request.method not in SAFE_METHODS or self.pinned(request):
+            return False
+        match = request.resolver_match
+        return (
+            match.view_name in settings.REPLICA_READ_VIEWS
+            or bool(set(match.namespaces) & set(
+                settings.REPLICA_READ_NAMESPACES
+            ))
+        )
+
+    @staticmethod
+    def pinned(request):
+        try:
+            until = int(request.COOKIES.get(REPLICA_PIN_COOKIE, 0))
+        except ValueError:
+            return False
+        return until > time.time()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Record latency, query count and cache lookups for /metrics.
+
+    Every request is recorded, per view name and status code (see
+    core.metrics). Without ``METRICS_DIR`` the middleware removes itself
+    at startup.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_DIR', None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        timing.install_hooks()
+        if metrics.count_cache not in timing.cache_observers:
+            timing.cache_observers.append(metrics.count_cache)
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        queries = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        metrics.registry.observe(
+            'yatube_request_duration_seconds',
+            {'view': view, 'status': str(response.status_code)},
+            time.perf_counter() - started
+        )
+        metrics.registry.observe(
+            'yatube_request_db_queries', {'view': view}, queries.count
+        )
+        return response
+
+
+class PerformanceMiddleware:
+    """Report where the time of a request went.
+
+    A sampled share (``PERFORMANCE_SAMPLE_RATE``) of requests gets a
+    ``Server-Timing`` header and a JSON line on the ``yatube.performance``
+    logger with the view name, SQL, template, cache and serializer
+    costs. With a rate of 0 the middleware removes itself at startup.
+    """
+
+    def __init__(self, get_response):
+        self.rate = getattr(settings, 'PERFORMANCE_SAMPLE_RATE', 0)
+        if not self.rate:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        timing.install_hooks()
+
+    def __call__(self, request):
+        if self.rate < 1 and random.random() >= self.rate:
+            return self.get_response(request)
+        timings = timing.RequestTimings()
+        token = timing.current.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.sql)
+                    )
+                response = self.get_response(request)
+        finally:
+            timing.current.reset(token)
+        total = time.perf_counter() - timings.started
+        response['Server-Timing'] = timings.server_timing(total)
+        performance_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **timings.as_dict(total),
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = timing.current.get()
+        if timings is not None:
+            timings.view = request.resolver_match.view_name
+
+
+class SlowQueryMiddleware:
+    """Log queries slower than ``SLOW_QUERY_MS`` (see core.slowqueries)."""
+
+    def __init__(self, get_response):
+        self.threshold = getattr(settings, 'SLOW_QUERY_MS', None)
+        if not self.threshold:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        slow_query_logger = SlowQueryLogger(self.threshold)
+        token = current_view.set(None)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(slow_query_logger)
+                    )
+                return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(request.resolver_match.view_name)
+
+
+class ProfilerMiddleware:
+    """Sample the requests of an armed profiler session.
+
+    Outside of a session this costs a clock read per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        session = profiler.active_session()
+        if session is None or not profiler.claim(session, request.path):
+            return self.get_response(request)
+        sampler = profiler.Sampler(threading.get_ident(), session['interval'])
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = sampler.stop()
+            match = getattr(request, 'resolver_match', None)
+            label = match.view_name if match else request.path
+            profiler.save(session, label, stacks)
+        return response
@@ -0,0 +1,54 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_table_rows(model, using):
+    """Cheap row estimate of the model table taken from the database."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [table]
+            )
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [table]
+            )
+        else:
+            # The largest primary key is one index probe away and never
+            # undercounts an autoincrement table.
+            cursor.execute(
+                'SELECT MAX({}) FROM {}'.format(
+                    connection.ops.quote_name(model._meta.pk.column),
+                    connection.ops.quote_name(table),
+                )
+            )
+        row = cursor.fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that stops counting exactly above ``threshold`` rows.
+
+    Short lists are counted exactly. Longer unfiltered lists use the
+    database's estimate of the table size, and longer filtered lists are
+    reported as ``threshold`` rows, so the count never scans the table.
+    """
+    threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        capped = queryset.order_by()[:self.threshold + 1].count()
+        if capped <= self.threshold:
+            return capped
+        if queryset.query.where:
+            return self.threshold
+        return max(
+            estimate_table_rows(queryset.model, queryset.db), self.threshold
+        )
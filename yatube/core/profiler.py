@@ -0,0 +1,147 @@
+"""On-demand sampling profiler.
+
+Staff arm a session with a URL pattern and a number of requests (see
+``core.views.profiler``). ``ProfilerMiddleware`` samples the stack of each
+matching request from a background thread until the session has
+collected enough requests. The result is in the collapsed format that
+flamegraph.pl and speedscope read, one ``frame;frame;frame count`` line
+per distinct stack.
+
+Sessions and samples live in the default cache. With a cache shared by
+the workers, every worker takes part in a session; with the local-memory
+cache only the worker that armed it does.
+"""
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.cache import cache
+
+SESSION_KEY = 'profiler:session'
+SESSION_TTL = 3600
+# Workers look the session up at most this often.
+SESSION_CHECK_INTERVAL = 1.0
+DEFAULT_INTERVAL = 0.005
+
+_local = threading.local()
+
+
+def collapse(frame):
+    frames = []
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '?')
+        frames.append(f'{module}:{frame.f_code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(frames))
+
+
+class Sampler(threading.Thread):
+    """Counts the stacks of ``thread_id`` every ``interval`` seconds."""
+
+    def __init__(self, thread_id, interval=DEFAULT_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.finished = threading.Event()
+
+    def run(self):
+        while not self.finished.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+        return self.stacks
+
+
+def start_session(pattern, requests, interval=DEFAULT_INTERVAL):
+    """Profile the next ``requests`` requests whose path matches."""
+    re.compile(pattern)
+    session = {
+        'id': uuid.uuid4().hex,
+        'pattern': pattern,
+        'requests': requests,
+        'interval': interval,
+    }
+    cache.set_many({
+        SESSION_KEY: session,
+        f'profiler:{session["id"]}:remaining': requests,
+        f'profiler:{session["id"]}:count': 0,
+    }, SESSION_TTL)
+    _local.checked = 0
+    return session
+
+
+def active_session():
+    """The armed session, read from the cache at most once a second;
+    None once it has claimed all its requests."""
+    now = time.monotonic()
+    if now - getattr(_local, 'checked', 0) >= SESSION_CHECK_INTERVAL:
+        _local.session = cache.get(SESSION_KEY)
+        _local.checked = now
+    session = _local.session
+    if session is None or session.get('finished'):
+        return None
+    return session
+
+
+def finish(session):
+    """Stop matching requests against ``session``; its results stay."""
+    finished = {**session, 'finished': True}
+    current = cache.get(SESSION_KEY)
+    # Unless a newer session was armed meanwhile.
+    if current is not None and current['id'] == session['id']:
+        cache.set(SESSION_KEY, finished, SESSION_TTL)
+    _local.session = finished
+
+
+def claim(session, path):
+    """Whether a request for ``path`` is profiled in ``session``."""
+    if not re.search(session['pattern'], path):
+        return False
+    key = f'profiler:{session["id"]}:remaining'
+    # A read, so that requests after the last one don't write.
+    if not cache.get(key):
+        finish(session)
+        return False
+    try:
+        remaining = cache.decr(key)
+    except ValueError:
+        return False
+    if remaining <= 0:
+        finish(session)
+    return remaining >= 0
+
+
+def save(session, label, stacks):
+    try:
+        number = cache.incr(f'profiler:{session["id"]}:count')
+    except ValueError:
+        return
+    cache.set(f'profiler:{session["id"]}:{number}', (label, dict(stacks)),
+              SESSION_TTL)
+
+
+def results(session):
+    """Profiled request count and merged stacks, rooted at the view."""
+    count = cache.get(f'profiler:{session["id"]}:count') or 0
+    stacks = Counter()
+    for label, request_stacks in cache.get_many([
+        f'profiler:{session["id"]}:{number}'
+        for number in range(1, count + 1)
+    ]).values():
+        for stack, samples in request_stacks.items():
+            stacks[f'{label};{stack}'] += samples
+    return count, stacks
+
+
+def collapsed(stacks):
+    return ''.join(
+        f'{stack} {samples}\n' for stack, samples in sorted(stacks.items())
+    )
@@ -0,0 +1,145 @@
+"""A small database-backed task queue.
+
+Functions decorated with ``@task`` are queued with ``.delay(*args)`` or
+``.enqueue(args, kwargs, ...)`` and run by the ``run_tasks`` worker, which
+imports the ``tasks`` module of every installed app. Arguments must be
+JSON serializable, so pass primary keys rather than model instances.
+
+The task row is written in the caller's transaction: a task queued by a
+request that rolls back is never run.
+"""
+import json
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+registry = {}
+
+
+class QueuedFunction:
+    """A function that can also be queued for the worker."""
+
+    def __init__(self, func, name, retries, retry_delay):
+        self.func = func
+        self.name = name
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<task {self.name}>'
+
+    def delay(self, *args, **kwargs):
+        return self.enqueue(args, kwargs)
+
+    def enqueue(self, args=(), kwargs=None, run_at=None, countdown=None,
+                dedup_key=None):
+        """Queue a call; ``run_at`` or ``countdown`` (seconds) defer it.
+
+        While a task with the same ``dedup_key`` waits in the queue, the
+        existing task is returned instead of queueing another one.
+        """
+        if countdown is not None:
+            run_at = timezone.now() + timedelta(seconds=countdown)
+        fields = {
+            'name': self.name,
+            'payload': json.dumps({'args': args, 'kwargs': kwargs or {}}),
+            'run_at': run_at or timezone.now(),
+            'max_attempts': self.retries + 1,
+        }
+        if dedup_key is None:
+            return Task.objects.create(**fields)
+        existing = Task.objects.filter(dedup_key=dedup_key).first()
+        if existing is not None:
+            return existing
+        try:
+            with transaction.atomic():
+                return Task.objects.create(dedup_key=dedup_key, **fields)
+        except IntegrityError:
+            return Task.objects.get(dedup_key=dedup_key)
+
+
+def task(func=None, *, name=None, retries=3, retry_delay=10):
+    """Register ``func`` as a task.
+
+    A failed call is retried up to ``retries`` times, ``retry_delay``
+    seconds later and twice as long after each further failure.
+    """
+    def register(func):
+        queued = QueuedFunction(
+            func, name or f'{func.__module__}.{func.__name__}',
+            retries, retry_delay
+        )
+        registry[queued.name] = queued
+        return queued
+    return register(func) if func is not None else register
+
+
+def claim(worker, limit):
+    """Mark up to ``limit`` due tasks as running by ``worker``.
+
+    Dedup keys are released, so a change made while a task runs queues
+    another one.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'TASK_TIMEOUT', 3600))
+    with transaction.atomic():
+        # Tasks of a worker that died are picked up again.
+        Task.objects.filter(status=Task.RUNNING, started__lt=stale).update(
+            status=Task.QUEUED
+        )
+        pks = list(
+            Task.objects.select_for_update(
+                skip_locked=connection.features
+                .has_select_for_update_skip_locked
+            )
+            .filter(status=Task.QUEUED, run_at__lte=now)
+            .order_by('run_at')
+            .values_list('pk', flat=True)[:limit]
+        )
+        Task.objects.filter(pk__in=pks).update(
+            status=Task.RUNNING,
+            locked_by=worker,
+            started=now,
+            dedup_key=None,
+            attempts=F('attempts') + 1,
+        )
+    return pks
+
+
+def execute(pk):
+    """Run a claimed task; retries or records the failure."""
+    task = Task.objects.get(pk=pk)
+    try:
+        payload = json.loads(task.payload)
+        registry[task.name](*payload['args'], **payload['kwargs'])
+    except Exception:
+        fail(task, traceback.format_exc())
+    else:
+        task.delete()
+
+
+def fail(task, error):
+    if task.attempts >= task.max_attempts:
+        Task.objects.filter(pk=task.pk).update(
+            status=Task.FAILED, last_error=error
+        )
+        return
+    queued = registry.get(task.name)
+    delay = queued.retry_delay if queued else 10
+    delay *= 2 ** (task.attempts - 1) * random.uniform(1, 1.5)
+    Task.objects.filter(pk=task.pk).update(
+        status=Task.QUEUED,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        last_error=error,
+    )
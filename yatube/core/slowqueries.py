@@ -0,0 +1,127 @@
+"""Slow-query log.
+
+``SlowQueryMiddleware`` times every query of a request. Queries slower
+than ``SLOW_QUERY_MS`` go to the ``yatube.slow_queries`` logger as a JSON
+line with a fingerprint that groups the same statement with different
+values, the view, the innermost project frames and the query plan.
+Parameters are not logged.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import traceback
+from contextlib import nullcontext
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger('yatube.slow_queries')
+current_view = ContextVar('slow_query_view', default=None)
+
+STACK_FRAMES = 6
+SQL_LIMIT = 2000
+
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def normalize(sql):
+    """SQL with literals, placeholders and IN lists collapsed."""
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+def project_stack():
+    """The innermost frames that belong to the project, not libraries."""
+    root = os.path.join(settings.BASE_DIR, '')
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(root)
+        and 'site-packages' not in frame.filename
+        and not frame.filename.endswith(('slowqueries.py', 'middleware.py'))
+    ]
+    return [
+        f'{os.path.relpath(frame.filename, root)}:{frame.lineno} '
+        f'in {frame.name}'
+        for frame in frames[-STACK_FRAMES:]
+    ]
+
+
+class SlowQueryLogger:
+    """``execute_wrapper`` hook logging queries above ``threshold`` ms.
+
+    One instance per request: it is not shared between threads.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold / 1000
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+        started = perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+        except Exception:
+            # No plan: the failed query may have broken the transaction.
+            self.log(sql, started)
+            raise
+        self.log(sql, started, None if many else (context, params))
+        return result
+
+    def log(self, sql, started, explain=None):
+        duration = perf_counter() - started
+        if duration < self.threshold:
+            return
+        plan = None
+        if explain is not None:
+            context, params = explain
+            plan = self.explain(context['connection'], sql, params)
+        logger.warning(json.dumps({
+            'fingerprint': fingerprint(sql),
+            'duration_ms': round(duration * 1000, 2),
+            'view': current_view.get(),
+            'sql': sql[:SQL_LIMIT],
+            'stack': project_stack(),
+            'plan': plan,
+        }, ensure_ascii=False))
+
+    def explain(self, connection, sql, params):
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return None
+        self.explaining = True
+        try:
+            # Inside a transaction, a savepoint so that a failed EXPLAIN
+            # can't break it. Outside, no transaction: on the SQLite
+            # backend one would take the write lock.
+            savepoint = (
+                transaction.atomic(using=connection.alias)
+                if connection.in_atomic_block else nullcontext()
+            )
+            with savepoint, connection.cursor() as cursor:
+                cursor.execute(
+                    f'{connection.ops.explain_query_prefix()} {sql}', params
+                )
+                return [
+                    ' '.join(str(column) for column in row)
+                    for row in cursor.fetchall()
+                ]
+        except DatabaseError:
+            return None
+        finally:
+            self.explaining = False
@@ -0,0 +1,136 @@
+"""Fingerprinted, precompressed static files.
+
+``collectstatic`` is the build step: ``CompressedManifestStorage`` names
+every file after a hash of its content, rewrites the references in CSS
+and writes ``.gz`` and ``.br`` siblings of the text files. ``{% static %}``
+resolves names through the manifest, read once per process; names the
+manifest doesn't know resolve to themselves.
+
+``StaticFiles`` is the index ``core.middleware.StaticFilesMiddleware``
+serves ``STATIC_ROOT`` from: fingerprinted names are cached by browsers
+for a year as immutable, other names are revalidated after a minute.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from io import BytesIO
+
+import brotli
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage,
+)
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.map',
+                '.xml', '.ico')
+# A sibling is kept only if it saves at least this share of the size.
+MIN_SAVING = 0.05
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=60'
+ENCODINGS = (
+    ('br', '.br', re.compile(r'\bbr\b')),
+    ('gzip', '.gz', re.compile(r'\bgzip\b')),
+)
+
+
+def gzip_compress(content):
+    """Gzip ``content`` with a zero timestamp, so the archive only
+    depends on the content (``gzip.compress`` takes ``mtime`` from
+    Python 3.8 on)."""
+    buffer = BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9,
+                       mtime=0) as archive:
+        archive.write(content)
+    return buffer.getvalue()
+
+
+def compress(path):
+    """Write the ``.gz`` and ``.br`` siblings of ``path`` worth keeping."""
+    with open(path, 'rb') as source:
+        content = source.read()
+    for extension, compressed in (
+        ('.gz', gzip_compress(content)),
+        ('.br', brotli.compress(content, mode=brotli.MODE_TEXT)),
+    ):
+        if len(compressed) <= len(content) * (1 - MIN_SAVING):
+            with open(path + extension, 'wb') as sibling:
+                sibling.write(compressed)
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        names = {*self.hashed_files, *self.hashed_files.values()}
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                compress(self.path(name))
+
+    def stored_name(self, name):
+        # Missing manifest entries fall back to the plain name instead of
+        # failing the page (or hashing the file on every call).
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+
+class StaticFile:
+
+    def __init__(self, path, immutable):
+        self.path = path
+        stat = os.stat(path)
+        self.mtime = stat.st_mtime
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+        self.cache_control = IMMUTABLE if immutable else REVALIDATE
+        self.encodings = [
+            (encoding, path + extension, pattern)
+            for encoding, extension, pattern in ENCODINGS
+            if os.path.exists(path + extension)
+        ]
+
+    def response(self, request):
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'), self.mtime
+        ):
+            response = HttpResponseNotModified()
+        else:
+            path, encoding = self.path, None
+            accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+            for candidate, candidate_path, pattern in self.encodings:
+                if pattern.search(accepted):
+                    path, encoding = candidate_path, candidate
+                    break
+            response = FileResponse(
+                open(path, 'rb'), content_type=self.content_type
+            )
+            if encoding:
+                response['Content-Encoding'] = encoding
+            response['Last-Modified'] = http_date(self.mtime)
+        if self.encodings:
+            response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = self.cache_control
+        return response
+
+
+def scan(root):
+    """URL path under ``STATIC_URL`` -> StaticFile, for the collected
+    files in ``root``; compressed siblings are not listed."""
+    hashed = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+    siblings = tuple(extension for _, extension, _ in ENCODINGS)
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(siblings):
+                continue
+            path = os.path.join(directory, name)
+            url = os.path.relpath(path, root).replace(os.sep, '/')
+            files[url] = StaticFile(path, url in hashed)
+    return files
@@ -1,5 +1,7 @@
 from django import template
 
+from posts.richtext import richtext
+
 
 register = template.Library()
 
@@ -7,3 +9,6 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+register.filter('richtext', richtext)
@@ -0,0 +1,46 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from . import metrics
+
+
+class StateIsolation:
+    """Point the file-backed caches and the metrics at a temporary
+    directory, so tests start empty and don't share state with the
+    running site or with other test runs. Used by ``TestRunner`` and, for
+    pytest, by the fixture in the project's conftest.py."""
+
+    def enable(self):
+        self.state_dir = tempfile.mkdtemp(prefix='yatube-test-')
+        self.state_override = override_settings(
+            CACHES={
+                alias: {**config, 'LOCATION': f'{self.state_dir}/{alias}'}
+                if config['BACKEND'].startswith('core.cache.') else config
+                for alias, config in settings.CACHES.items()
+            },
+            METRICS_DIR=f'{self.state_dir}/metrics',
+        )
+        self.state_override.enable()
+
+    def disable(self):
+        # Or the exit hook flushes test values to the real METRICS_DIR.
+        metrics.registry.reset()
+        self.state_override.disable()
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    """``manage.py test`` with StateIsolation."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.isolation = StateIsolation()
+        self.isolation.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.isolation.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.test import TestCase
+
+from core.cache.backends.sqlite import SQLiteCache
+
+
+class SQLiteCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.location = os.path.join(directory, 'cache.sqlite3')
+        self.cache = self.open()
+
+    def open(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_values_are_shared_between_processes(self):
+        self.cache.set_many({'a': 1, 'b': [2]})
+        other = self.open()
+        self.assertEqual(other.get_many(['a', 'b', 'c']), {'a': 1, 'b': [2]})
+        self.assertTrue(other.delete('a'))
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_expiry_and_add(self):
+        self.cache.set('gone', 1, timeout=0)
+        self.assertFalse(self.cache.has_key('gone'))
+        self.assertTrue(self.cache.add('gone', 2))
+        self.assertFalse(self.cache.add('gone', 3))
+        self.assertEqual(self.cache.get('gone'), 2)
+
+    def test_versioned_keys(self):
+        self.cache.set('key', 'old')
+        self.cache.incr_version('key')
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.get('key', version=2), 'old')
+
+    def test_increments_are_atomic(self):
+        self.cache.set('counter', 0)
+
+        def increment():
+            other = self.open()
+            for _ in range(50):
+                other.incr('counter')
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_least_recently_used_keys_are_evicted(self):
+        cache = self.open(MAX_ENTRIES=3, ACCESS_RESOLUTION=0)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+            time.sleep(0.01)
+        cache.get('a')
+        cache.set('d', 'd')
+        # Evicted down to 90% of the limit: the two oldest reads go.
+        self.assertEqual(sorted(cache.get_many('abcd')), ['a', 'd'])
+
+    def test_size_is_bounded(self):
+        cache = self.open(MAX_SIZE=10000)
+        for number in range(20):
+            cache.set(number, 'x' * 1000)
+        size = sum(len(value) for value in cache.get_many(range(20)).values())
+        self.assertLessEqual(size, 10000)
+        self.assertEqual(cache.get(19), 'x' * 1000)
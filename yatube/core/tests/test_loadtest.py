@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import TransactionTestCase
+
+from core import loadtest
+from posts.models import Group, Post, User
+
+
+class LoadTestTests(TransactionTestCase):
+    # Virtual users are threads: the data must be committed for them.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='user_1',
+                                             password='secret')
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(title='Группа', slug='group')
+        for number in range(25):
+            Post.objects.create(author=author, group=group,
+                                text=f'Пост {number}')
+
+    def test_scenarios_are_spread_by_weight(self):
+        self.assertEqual(
+            loadtest.assign({'browse': 3, 'api': 1, 'comment': 1}, 5),
+            ['browse', 'api', 'comment', 'browse', 'browse']
+        )
+
+    def test_percentiles(self):
+        stats = loadtest.Stats()
+        for milliseconds in range(1, 101):
+            stats.record('posts:index', milliseconds / 1000)
+        stats.record('posts:index', 1, error=True)
+        index, total = stats.summary(elapsed=2)
+        self.assertEqual(index['requests'], 101)
+        self.assertEqual(index['errors'], 1)
+        self.assertAlmostEqual(index['rps'], 50.5)
+        self.assertAlmostEqual(index['p50'], 0.051)
+        self.assertAlmostEqual(index['p99'], 0.1)
+        self.assertEqual(total['view'], 'total')
+
+    def test_in_process_run(self):
+        stats, elapsed = loadtest.run(
+            loadtest.WSGITarget(WSGIHandler()),
+            {name: 1 for name in loadtest.SCENARIOS}, users=4,
+            duration=0.5, data=loadtest.Dataset(), password='secret'
+        )
+        rows = {row['view']: row for row in stats.summary(elapsed)}
+        self.assertEqual(rows['total']['errors'], 0)
+        for view in ('posts:index', 'posts:follow_index',
+                     'posts:add_comment', 'api:posts-list', 'users:login'):
+            self.assertGreater(rows[view]['requests'], 0, view)
+        self.assertTrue(self.user.comments.exists())
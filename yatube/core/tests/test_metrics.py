@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from http import HTTPStatus
+
+from core import metrics
+from .test_queue import record
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(
+            METRICS_DIR=directory, METRICS_TOKEN='secret'
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        metrics.registry.reset()
+        cache.clear()
+
+    def scrape(self):
+        response = self.client.get('/metrics',
+                                   HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.content.decode()
+
+    def test_latency_and_queries_per_view_and_status(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get('/no-such-page/')
+        scraped = self.scrape()
+        self.assertIn(
+            'yatube_request_duration_seconds_count'
+            '{status="200",view="posts:index"} 1', scraped
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{status="404",view="unresolved",le="+Inf"} 1', scraped
+        )
+        self.assertRegex(
+            scraped,
+            r'yatube_request_db_queries_sum\{view="posts:index"\} [1-9]'
+        )
+
+    def test_fragment_cache_hits_and_misses(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        scraped = self.scrape()
+        for result in ('hit', 'miss'):
+            self.assertIn(
+                'yatube_cache_requests_total{backend="SQLiteCache",'
+                f'group="fragment:index_page",result="{result}"}} 1.0',
+                scraped
+            )
+
+    def test_files_of_all_processes_are_added_up(self):
+        self.client.get(reverse('posts:index'))
+        metrics.registry.flush()
+        other = f'{os.getppid()}-other.json'
+        with open(os.path.join(settings.METRICS_DIR, other),
+                  'w') as metrics_file:
+            json.dump({'values': [], 'histograms': [[
+                'yatube_request_db_queries', [['view', 'posts:index']],
+                [0, 0, 0, 0, 0, 0, 1, 1, 70, 1],
+            ]]}, metrics_file)
+        self.assertIn(
+            'yatube_request_db_queries_count{view="posts:index"} 2',
+            self.scrape()
+        )
+
+    def test_queue_depths(self):
+        record.delay('queued')
+        self.assertIn('yatube_task_queue_depth{status="queued"} 1',
+                      self.scrape())
+
+    def test_files_of_exited_processes_are_pruned(self):
+        process = subprocess.Popen(['true'])
+        process.wait()
+        gone = os.path.join(settings.METRICS_DIR, f'{process.pid}-gone.json')
+        with open(gone, 'w') as metrics_file:
+            json.dump({'values': [], 'histograms': []}, metrics_file)
+        self.client.get(reverse('posts:index'))
+        metrics.registry.flush()
+        self.assertFalse(os.path.exists(gone))
+        self.assertEqual(len(os.listdir(settings.METRICS_DIR)), 1)
+
+    def test_other_clients_are_denied(self):
+        for extra in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}):
+            with self.subTest(extra=extra):
+                response = self.client.get('/metrics', **extra)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.FORBIDDEN)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_allowed_addresses(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(METRICS_DIR='')
+    def test_metrics_are_off_without_a_directory(self):
+        metrics.registry.observe('yatube_request_db_queries',
+                                 {'view': 'posts:index'}, 1)
+        self.assertFalse(metrics.registry.dirty)
+        response = self.client.get('/metrics',
+                                   HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
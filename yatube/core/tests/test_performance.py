@@ -0,0 +1,59 @@
+import json
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def test_disabled_by_default(self):
+        response = self.client.get('/')
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=1)
+    def test_timings_in_header_and_log(self):
+        with self.assertLogs('yatube.performance') as logs:
+            response = self.client.get('/')
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^sql;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, '
+            r'cache;desc="\d+ hits, \d+ misses", total;dur=[\d.]+$'
+        )
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['sql_count'], 0)
+        self.assertGreater(record['template_ms'], 0)
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=1)
+    def test_cache_hits_and_misses_are_counted(self):
+        cache.clear()
+        with self.assertLogs('yatube.performance') as logs:
+            self.client.get('/')
+            self.client.get('/')
+        first, second = (
+            json.loads(record.getMessage()) for record in logs.records
+        )
+        self.assertGreater(first['cache_misses'], 0)
+        self.assertEqual(second['cache_misses'], 0)
+        self.assertGreater(second['cache_hits'], 0)
+
+    @skipUnless(settings.SERVE_API, 'the API is off for YATUBE_ROLE=web')
+    @override_settings(PERFORMANCE_SAMPLE_RATE=1)
+    def test_serializer_time_of_api_views(self):
+        with self.assertLogs('yatube.performance') as logs:
+            response = self.client.get('/api/v1/posts/')
+        self.assertIn('ser;dur=', response['Server-Timing'])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'api:posts-list')
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0.5)
+    def test_sampling(self):
+        with mock.patch('core.middleware.random.random', return_value=0.7):
+            response = self.client.get('/')
+        self.assertNotIn('Server-Timing', response)
+        with mock.patch('core.middleware.random.random', return_value=0.2):
+            with self.assertLogs('yatube.performance'):
+                response = self.client.get('/')
+        self.assertIn('Server-Timing', response)
@@ -0,0 +1,62 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core import profiler
+from posts.models import User
+
+
+def wait_a_little():
+    time.sleep(0.05)
+
+
+class ProfilerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user('staff', is_staff=True)
+
+    def test_sampler_collects_collapsed_stacks(self):
+        sampler = profiler.Sampler(threading.get_ident(), 0.001)
+        sampler.start()
+        wait_a_little()
+        stacks = sampler.stop()
+        self.assertTrue(any(
+            stack.endswith('core.tests.test_profiler:wait_a_little')
+            for stack in stacks
+        ))
+        self.assertRegex(
+            profiler.collapsed(stacks),
+            r'(?m)^\S+;core.tests.test_profiler:wait_a_little \d+$'
+        )
+
+    def test_profiler_is_staff_only(self):
+        response = self.client.get(reverse('core:profiler'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_session_profiles_next_matching_requests(self):
+        self.client.force_login(self.staff)
+        self.client.post(reverse('core:profiler'), {
+            'pattern': '^/about/', 'requests': 1, 'interval': 1,
+        })
+        self.client.get('/')
+        self.client.get('/about/author/')
+        self.client.get('/about/tech/')
+        session = cache.get(profiler.SESSION_KEY)
+        self.assertEqual(profiler.results(session)[0], 1)
+        response = self.client.get(reverse('core:profiler'))
+        self.assertContains(response, 'записано 1 из 1')
+        response = self.client.get(reverse('core:profiler_stacks'))
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+
+    def test_finished_session_stops_writing(self):
+        session = profiler.start_session('^/about/', 1)
+        self.assertTrue(profiler.claim(session, '/about/author/'))
+        self.assertIsNone(profiler.active_session())
+        self.assertTrue(cache.get(profiler.SESSION_KEY)['finished'])
+        with mock.patch.object(cache, 'decr') as decr:
+            self.assertFalse(profiler.claim(session, '/about/tech/'))
+        decr.assert_not_called()
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core import queue
+from core.models import Task
+
+
+calls = []
+
+
+@queue.task(name='core.tests.test_queue.record', retries=1, retry_delay=60)
+def record(value):
+    if value == 'fail':
+        raise ValueError(value)
+    calls.append(value)
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_tasks(self):
+        call_command('run_tasks', '--once', '--workers', '0',
+                     stdout=StringIO())
+
+    def test_queued_task_runs_once_and_is_removed(self):
+        record.delay('a')
+        self.assertEqual(calls, [])
+        self.run_tasks()
+        self.assertEqual(calls, ['a'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_dedup_key_folds_queued_tasks(self):
+        first = record.enqueue(('a',), dedup_key='same')
+        self.assertEqual(record.enqueue(('b',), dedup_key='same'), first)
+        queue.claim('test', 1)
+        second = record.enqueue(('c',), dedup_key='same')
+        self.assertNotEqual(second, first)
+
+    def test_scheduled_task_waits_until_due(self):
+        task = record.enqueue(('later',), countdown=60)
+        self.run_tasks()
+        self.assertEqual(calls, [])
+        Task.objects.filter(pk=task.pk).update(
+            run_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.run_tasks()
+        self.assertEqual(calls, ['later'])
+
+    def test_failed_task_is_retried_then_kept(self):
+        task = record.delay('fail')
+        self.run_tasks()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertGreater(task.run_at, task.started)
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        self.run_tasks()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+        self.assertIn('ValueError', task.last_error)
+
+    def test_pool_keeps_running_after_a_task_breaks(self):
+        missing = record.delay('missing')
+        record.delay('b')
+
+        def execute(pk):
+            if pk == missing.pk:
+                raise Task.DoesNotExist
+            calls.append(pk)
+
+        with mock.patch.object(queue, 'execute', side_effect=execute), \
+                self.assertLogs('yatube.tasks', 'ERROR') as logs:
+            call_command('run_tasks', '--once', '--workers', '2',
+                         '--poll', '0.01', stdout=StringIO())
+        self.assertEqual(len(calls), 1)
+        self.assertIn(f'Task {missing.pk} could not be run', logs.output[0])
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db.utils import ConnectionHandler
+from django.test import TestCase, override_settings
+
+from core.db import routers
+from core.db.backends.sqlite3.base import Database
+from core.management.commands.sync_replicas import Command as SyncReplicas
+from core.middleware import REPLICA_PIN_COOKIE
+
+
+@override_settings(DATABASE_REPLICAS={'replica1': 3, 'replica2': 1})
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        routers._health.clear()
+
+    def reads_from_replica(self, *requests):
+        """Whether the last of ``requests`` asked for a replica."""
+        with mock.patch.object(
+            routers, 'choose_replica', return_value=None
+        ) as choose_replica:
+            for method, url in requests:
+                choose_replica.reset_mock()
+                getattr(self.client, method)(url)
+        return choose_replica.called
+
+    def test_read_only_views_read_from_replica(self):
+        self.assertTrue(self.reads_from_replica(('get', '/')))
+
+    def test_other_views_read_from_primary(self):
+        self.assertFalse(self.reads_from_replica(('get', '/about/author/')))
+
+    def test_client_is_pinned_to_primary_after_write(self):
+        response = self.client.post('/auth/login/', {})
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+        self.assertFalse(self.reads_from_replica(('get', '/')))
+
+    def test_unhealthy_replicas_fall_back_to_primary(self):
+        with mock.patch.object(routers, 'check_replica', return_value=False):
+            self.assertIsNone(routers.choose_replica())
+
+    def test_replicas_are_chosen_by_weight(self):
+        with mock.patch.object(routers, 'check_replica', return_value=True):
+            chosen = [routers.choose_replica() for _ in range(400)]
+        self.assertGreater(chosen.count('replica1'), chosen.count('replica2'))
+
+    def test_missing_or_unsynced_replica_is_unhealthy(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        primary = os.path.join(directory, 'primary.sqlite3')
+        replica = os.path.join(directory, 'replica.sqlite3')
+        handler = ConnectionHandler({
+            'default': {'ENGINE': 'django.db.backends.sqlite3'},
+            'replica': {
+                'ENGINE': 'core.db.backends.sqlite3',
+                'NAME': replica,
+                'OPTIONS': {'read_only': True},
+            },
+        })
+        self.addCleanup(handler.close_all)
+
+        def healthy():
+            handler.close_all()
+            with mock.patch.object(routers, 'connections', handler):
+                return routers.check_replica('replica')
+
+        self.assertFalse(healthy())
+        self.assertFalse(os.path.exists(replica))
+        Database.connect(replica).close()
+        self.assertFalse(healthy())
+        with Database.connect(primary) as source:
+            source.execute('CREATE TABLE django_migrations (id integer)')
+        SyncReplicas.copy(primary, replica)
+        self.assertTrue(healthy())
@@ -0,0 +1,50 @@
+import json
+from unittest import mock
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.middleware import SlowQueryMiddleware
+from core.slowqueries import SlowQueryLogger, fingerprint, normalize
+
+
+class SlowQueryLogTests(TestCase):
+    def test_normalized_fingerprint(self):
+        self.assertEqual(
+            normalize("SELECT a FROM t WHERE id IN (%s, %s)\n"
+                      "AND name = 'x' LIMIT 21"),
+            'SELECT a FROM t WHERE id IN (...) AND name = ? LIMIT ?'
+        )
+        self.assertEqual(
+            fingerprint('SELECT a FROM t WHERE id IN (%s, %s)'),
+            fingerprint('SELECT a FROM t WHERE id IN (%s, %s, %s)')
+        )
+
+    @override_settings(SLOW_QUERY_MS=1e-6)
+    def test_slow_queries_are_logged_with_view_stack_and_plan(self):
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            self.client.get('/')
+        records = [json.loads(record.getMessage()) for record in logs.records]
+        record = next(
+            record for record in records
+            if 'posts_post' in record['sql']
+            and any('posts/views.py' in frame for frame in record['stack'])
+        )
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertRegex(record['fingerprint'], r'^[0-9a-f]{12}$')
+        self.assertTrue(record['plan'])
+        self.assertNotIn('slowqueries', ''.join(record['stack']))
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_zero_threshold_turns_the_middleware_off(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            SlowQueryMiddleware(lambda request: None)
+
+    def test_explain_outside_a_transaction_opens_none(self):
+        logger = SlowQueryLogger(threshold=0)
+        with mock.patch.object(connection, 'in_atomic_block', False), \
+                mock.patch('core.slowqueries.transaction.atomic') as atomic:
+            plan = logger.explain(connection, 'SELECT 1', None)
+        self.assertTrue(plan)
+        atomic.assert_not_called()
@@ -0,0 +1,36 @@
+from django.db import connection
+from django.test import TestCase
+
+from core.db.backends.sqlite3.base import Database, retry_on_busy
+
+
+class SQLiteProfileTests(TestCase):
+    def test_pragmas_applied_to_connection(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_busy_statement_is_retried(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise Database.OperationalError('database is locked')
+            return 'done'
+
+        self.assertEqual(retry_on_busy(flaky, retries=5), 'done')
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        calls = []
+
+        def broken():
+            calls.append(1)
+            raise Database.OperationalError('no such table: missing')
+
+        with self.assertRaises(Database.OperationalError):
+            retry_on_busy(broken, retries=5)
+        self.assertEqual(len(calls), 1)
@@ -0,0 +1,75 @@
+import brotli
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from http import HTTPStatus
+
+from core import static
+
+
+class StaticPipelineTests(TestCase):
+    def setUp(self):
+        source, root = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        self.addCleanup(shutil.rmtree, root)
+        os.makedirs(os.path.join(source, 'css'))
+        os.makedirs(os.path.join(source, 'img'))
+        with open(os.path.join(source, 'css', 'site.css'), 'w') as css:
+            css.write('body { background: url("../img/bg.png"); }\n' * 50)
+        with open(os.path.join(source, 'img', 'bg.png'), 'wb') as image:
+            image.write(b'\x89PNG')
+        settings_override = override_settings(
+            STATIC_ROOT=root, STATICFILES_DIRS=[source],
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder'
+            ],
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.css = staticfiles_storage.stored_name('css/site.css')
+        self.root = root
+
+    def test_hashed_names_rewritten_css_and_siblings(self):
+        self.assertRegex(self.css, r'^css/site\.[0-9a-f]{12}\.css$')
+        path = os.path.join(self.root, self.css)
+        with open(path, 'rb') as css:
+            content = css.read()
+        self.assertIn(
+            staticfiles_storage.stored_name('img/bg.png').encode(), content
+        )
+        with open(path + '.gz', 'rb') as compressed:
+            archive = compressed.read()
+        self.assertEqual(gzip.decompress(archive), content)
+        # No timestamp in the header: the same content, the same archive.
+        self.assertEqual(archive, static.gzip_compress(content))
+        with open(path + '.br', 'rb') as compressed:
+            self.assertEqual(brotli.decompress(compressed.read()), content)
+        self.assertFalse(os.path.exists(os.path.join(
+            self.root, staticfiles_storage.stored_name('img/bg.png') + '.gz'
+        )))
+
+    def test_names_missing_from_manifest_resolve_to_themselves(self):
+        self.assertEqual(staticfiles_storage.url('css/missing.css'),
+                         '/static/css/missing.css')
+
+    def test_hashed_files_are_immutable_and_precompressed(self):
+        response = self.client.get(f'/static/{self.css}',
+                                   HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        response = self.client.get('/static/css/site.css',
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        response = self.client.get(
+            f'/static/{self.css}',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
@@ -0,0 +1,10 @@
+from django.test import TestCase
+
+from core.warmup import warm_up
+
+
+class WarmUpTests(TestCase):
+    def test_warm_up_does_not_touch_the_database(self):
+        # Connections opened before forking would be shared by workers.
+        with self.assertNumQueries(0):
+            warm_up()
@@ -0,0 +1,22 @@
+from time import perf_counter
+
+from sorl.thumbnail.base import ThumbnailBackend
+
+from . import metrics
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    """Records how long rendering each thumbnail takes."""
+
+    def _create_thumbnail(self, source_image, geometry_string, options,
+                          thumbnail):
+        started = perf_counter()
+        try:
+            return super()._create_thumbnail(
+                source_image, geometry_string, options, thumbnail
+            )
+        finally:
+            metrics.registry.observe(
+                'yatube_thumbnail_seconds', {'geometry': geometry_string},
+                perf_counter() - started
+            )
@@ -0,0 +1,157 @@
+"""Per-request performance counters.
+
+``RequestTimings`` collects the SQL, template, cache and serializer costs
+of one request. ``install_hooks`` wraps the template, cache and DRF
+serializer entry points once per process; the wrappers only count while
+a sampled request has set ``current``, otherwise they call straight
+through.
+Functions in ``cache_observers`` see every cache lookup, sampled or not.
+"""
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+
+current = ContextVar('request_timings', default=None)
+in_get_many = ContextVar('in_cache_get_many', default=False)
+MISSING = object()
+# Called as observer(cache, key, hit) for each key looked up.
+cache_observers = []
+_installed = False
+
+
+class RequestTimings:
+    """Costs of one request; times are in seconds."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.view = None
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.serializer_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.depth = Counter()
+
+    def sql(self, execute, sql, params, many, context):
+        """``execute_wrapper`` hook that counts and times queries."""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += perf_counter() - started
+
+    def as_dict(self, total):
+        return {
+            'view': self.view,
+            'total_ms': round(total * 1000, 2),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+    def server_timing(self, total):
+        """Value of the Server-Timing header.
+
+        Template time includes the queries of querysets evaluated while
+        rendering, the total includes everything.
+        """
+        metrics = [
+            f'sql;dur={self.sql_time * 1000:.2f};'
+            f'desc="{self.sql_count} queries"',
+            f'tpl;dur={self.template_time * 1000:.2f}',
+            f'cache;desc="{self.cache_hits} hits, '
+            f'{self.cache_misses} misses"',
+        ]
+        if self.serializer_time:
+            metrics.append(f'ser;dur={self.serializer_time * 1000:.2f}')
+        metrics.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+def timed(metric):
+    """Add the time of the outermost call of a function to ``metric``."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = current.get()
+            if timings is None or timings.depth[metric]:
+                return func(*args, **kwargs)
+            timings.depth[metric] += 1
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.depth[metric] -= 1
+                setattr(timings, metric,
+                        getattr(timings, metric) + perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def record_cache(cache, key, hit):
+    timings = current.get()
+    if timings is not None:
+        if hit:
+            timings.cache_hits += 1
+        else:
+            timings.cache_misses += 1
+    for observer in cache_observers:
+        observer(cache, key, hit)
+
+
+def counted_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, MISSING, version)
+        # Base get_many() calls get(); count those keys only once.
+        if not in_get_many.get():
+            record_cache(self, key, value is not MISSING)
+        return default if value is MISSING else value
+    return wrapper
+
+
+def counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        if current.get() is None and not cache_observers:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        token = in_get_many.set(True)
+        try:
+            found = get_many(self, keys, version)
+        finally:
+            in_get_many.reset(token)
+        for key in keys:
+            record_cache(self, key, key in found)
+        return found
+    return wrapper
+
+
+def install_hooks():
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    from django.template.backends.django import Template
+    from django.template.backends.jinja2 import Template as Jinja2Template
+    for template in (Template, Jinja2Template):
+        template.render = timed('template_time')(template.render)
+    for backend in {type(caches[alias]) for alias in settings.CACHES}:
+        backend.get = counted_get(backend.get)
+        backend.get_many = counted_get_many(backend.get_many)
+    if apps.is_installed('rest_framework'):
+        from rest_framework.serializers import ListSerializer, Serializer
+        for serializer in (Serializer, ListSerializer):
+            serializer.data = property(
+                timed('serializer_time')(serializer.data.fget)
+            )
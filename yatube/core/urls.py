@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('profiler/', views.profiler, name='profiler'),
+    path('profiler/stacks.txt', views.profiler_stacks,
+         name='profiler_stacks'),
+]
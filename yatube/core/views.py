@@ -1,4 +1,15 @@
-from django.shortcuts import render
+import hmac
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect, render
+
+from . import metrics as prometheus
+from . import profiler as sampling
+from .forms import ProfilerForm
 
 
 def page_not_found(request, exception):
@@ -15,3 +26,59 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def profiler(request):
+    """Arm a sampling profiler session and show its progress."""
+    form = ProfilerForm(request.POST or None)
+    if form.is_valid():
+        sampling.start_session(
+            form.cleaned_data['pattern'],
+            form.cleaned_data['requests'],
+            form.cleaned_data['interval'] / 1000,
+        )
+        return redirect('core:profiler')
+    session = cache.get(sampling.SESSION_KEY)
+    context = {
+        'form': form,
+        'session': session,
+        'profiled': sampling.results(session)[0] if session else 0,
+    }
+    return render(request, 'core/profiler.html', context)
+
+
+@staff_member_required
+def profiler_stacks(request):
+    """Collapsed stacks of the last session, for flamegraph tools."""
+    session = cache.get(sampling.SESSION_KEY)
+    stacks = sampling.results(session)[1] if session else {}
+    return HttpResponse(
+        sampling.collapsed(stacks), content_type='text/plain; charset=utf-8'
+    )
+
+
+def may_read_metrics(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    return (
+        request.user.is_staff
+        or request.META.get('REMOTE_ADDR') in getattr(
+            settings, 'METRICS_ALLOWED_IPS', ()
+        )
+        or bool(token) and hmac.compare_digest(
+            request.META.get('HTTP_AUTHORIZATION', '').encode(),
+            f'Bearer {token}'.encode()
+        )
+    )
+
+
+def metrics(request):
+    """Metrics of all workers in the Prometheus text format."""
+    if not prometheus.enabled():
+        raise Http404
+    if not may_read_metrics(request):
+        raise PermissionDenied
+    return HttpResponse(
+        prometheus.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,39 @@
+"""Pre-fork warm-up of the WSGI application.
+
+With a preloading server (``gunicorn --preload``) ``yatube.wsgi`` is
+imported once in the master process. What is loaded here is shared by
+the forked workers instead of being paid for by the first request each
+worker serves.
+"""
+import os
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import caches
+from django.template import engines
+from django.urls import get_resolver, reverse
+
+
+def warm_up():
+    # Imports every view module and builds the reverse lookup tables.
+    get_resolver().url_patterns
+    reverse('posts:index')
+    load_templates()
+    caches['default'].get('warm-up')
+    # Reads the static files manifest.
+    staticfiles_storage.url('css/bootstrap.min.css')
+    # The thumbnail engine imports PIL on first use.
+    from sorl.thumbnail import default
+    default.engine
+
+
+def load_templates():
+    """Compile the project templates (kept when the loader caches)."""
+    for engine in engines.all():
+        for directory in engine.dirs:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    if name.endswith('.html'):
+                        path = os.path.join(root, name)
+                        engine.get_template(
+                            os.path.relpath(path, directory)
+                        )
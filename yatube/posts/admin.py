@@ -1,21 +1,46 @@
 from django.contrib import admin
+
+from core.paginator import EstimatedCountPaginator
 from .models import Post, Comment, Group
+from .search import get_backend
+
+
+class FullTextSearchMixin:
+    """Admin search through the full-text index instead of LIKE scans."""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return get_backend().filter(queryset, search_term), False
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'created', 'author', 'group', 'image')
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('created',)
+    date_hierarchy = 'created'
+    autocomplete_fields = ('author', 'group')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('pk', 'post', 'text', 'created', 'author')
-    search_fields = ('author', 'created')
-    list_filter = ('author',)
+    list_select_related = ('post', 'author')
+    search_fields = ('text',)
+    date_hierarchy = 'created'
+    autocomplete_fields = ('post', 'author')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
@@ -1,4 +1,9 @@
+import datetime
+
+from django import forms
+from django.conf import settings
 from django.forms import ModelForm
+from django.utils import timezone
 
 from .models import Post, Comment
 
@@ -13,3 +18,27 @@ class CommentForm(ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class StatsPeriodForm(forms.Form):
+    """Days of the statistics pages, the last STATS_DAYS by default."""
+    since = forms.DateField(required=False, label='С')
+    until = forms.DateField(required=False, label='По')
+
+    def clean(self):
+        data = super().clean()
+        if self.errors:
+            return data
+        until = data.get('until') or timezone.localdate()
+        since = data.get('since') or until - datetime.timedelta(
+            days=getattr(settings, 'STATS_DAYS', 30) - 1
+        )
+        max_days = getattr(settings, 'STATS_MAX_DAYS', 366)
+        if since > until:
+            raise forms.ValidationError('Начало периода позже его конца.')
+        if (until - since).days >= max_days:
+            raise forms.ValidationError(
+                f'Период не может быть длиннее {max_days} дней.'
+            )
+        data.update(since=since, until=until)
+        return data
@@ -0,0 +1,69 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Post
+from posts.search import (
+    SEARCH_COUNT, LikeSearchBackend, SQLiteFTS5Backend, tokenize
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the FTS5 search backend with the icontains search it '
+        'replaces, using words sampled from existing posts '
+        '(see generate_dataset).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        words = self.sample_words(options['queries'], options['seed'])
+        if not words:
+            raise CommandError('No posts to search, run generate_dataset.')
+        workloads = {
+            'one word': words,
+            'two words': [
+                f'{first} {second}'
+                for first, second in zip(words, reversed(words))
+            ],
+            # nothing matches, so icontains has to read the whole table
+            'no match': [uuid.uuid4().hex for _ in words],
+        }
+        self.stdout.write(
+            f'{Post.objects.count()} posts, {len(words)} queries per workload'
+        )
+        for name, queries in workloads.items():
+            self.stdout.write(name)
+            for backend in (LikeSearchBackend(), SQLiteFTS5Backend()):
+                self.report(backend, self.run(backend, queries))
+
+    def run(self, backend, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            backend.search(Post, query, size=SEARCH_COUNT)
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)
+
+    def report(self, backend, timings):
+        self.stdout.write(
+            f'  {type(backend).__name__:>20}: '
+            f'mean {statistics.mean(timings):.2f} ms, '
+            f'p50 {timings[len(timings) // 2]:.2f} ms, '
+            f'p95 {timings[int(len(timings) * 0.95)]:.2f} ms'
+        )
+
+    def sample_words(self, count, seed):
+        texts = Post.objects.order_by('?').values_list('text', flat=True)
+        words = [
+            word for text in texts[:count] for word in tokenize(text)
+            if len(word) > 3
+        ]
+        random.Random(seed).shuffle(words)
+        return words[:count]
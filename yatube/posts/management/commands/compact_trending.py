@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import compact
+
+
+class Command(BaseCommand):
+    help = (
+        'Rescale the trending scores to the current period, delete the '
+        'ones that decayed to nothing and rebuild the cached top lists. '
+        'Run it at least once per period (four days with the default '
+        'six-hour half-life), e.g. hourly from cron.'
+    )
+
+    def handle(self, *args, **options):
+        deleted = compact()
+        self.stdout.write(self.style.SUCCESS(
+            f'{deleted} decayed scores deleted'
+        ))
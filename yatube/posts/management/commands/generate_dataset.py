@@ -0,0 +1,122 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from faker import Faker
+
+from posts.models import Comment, Follow, Group, Post
+from posts.search import get_backend
+
+User = get_user_model()
+
+DATASET_PASSWORD = 'synthetic-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with synthetic users, groups, posts, comments '
+        'and follows for benchmarks and load tests. Every generated user '
+        f'has the password "{DATASET_PASSWORD}".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=30000)
+        parser.add_argument('--follows', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.fake = Faker('ru_RU')
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+            self.fake.seed_instance(options['seed'])
+        with transaction.atomic():
+            user_ids = self.create_users(options['users'])
+            group_ids = self.create_groups(options['groups'])
+            post_ids = self.create_posts(
+                options['posts'], user_ids, group_ids
+            )
+            self.create_comments(options['comments'], user_ids, post_ids)
+            self.create_follows(options['follows'], user_ids)
+        # bulk_create bypasses the signals that maintain the search index
+        backend = get_backend()
+        backend.rebuild(Post)
+        backend.rebuild(Comment)
+        self.stdout.write(self.style.SUCCESS('Dataset generated.'))
+
+    def bulk_create(self, model, objects):
+        model.objects.bulk_create(objects)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {len(objects)}')
+
+    def new_ids(self, model, last_id):
+        return list(
+            model.objects.filter(pk__gt=last_id).values_list('pk', flat=True)
+        )
+
+    def last_id(self, model):
+        last = model.objects.order_by('-pk').values_list('pk', flat=True)
+        return last.first() or 0
+
+    def create_users(self, count):
+        last_id = self.last_id(User)
+        password = make_password(DATASET_PASSWORD)
+        self.bulk_create(User, [
+            User(
+                username=f'user_{last_id + i}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                password=password,
+            )
+            for i in range(1, count + 1)
+        ])
+        return self.new_ids(User, last_id)
+
+    def create_groups(self, count):
+        last_id = self.last_id(Group)
+        self.bulk_create(Group, [
+            Group(
+                title=self.fake.catch_phrase()[:200],
+                slug=f'group-{last_id + i}',
+                description=self.fake.paragraph(),
+            )
+            for i in range(1, count + 1)
+        ])
+        return self.new_ids(Group, last_id)
+
+    def create_posts(self, count, user_ids, group_ids):
+        last_id = self.last_id(Post)
+        group_choices = group_ids + [None]
+        self.bulk_create(Post, [
+            Post(
+                text=self.fake.paragraph(nb_sentences=5),
+                author_id=random.choice(user_ids),
+                group_id=random.choice(group_choices),
+            )
+            for _ in range(count)
+        ])
+        return self.new_ids(Post, last_id)
+
+    def create_comments(self, count, user_ids, post_ids):
+        self.bulk_create(Comment, [
+            Comment(
+                text=self.fake.sentence(),
+                author_id=random.choice(user_ids),
+                post_id=random.choice(post_ids),
+            )
+            for _ in range(count)
+        ] if post_ids else [])
+
+    def create_follows(self, count, user_ids):
+        pairs = {
+            tuple(random.sample(user_ids, 2))
+            for _ in range(count)
+        } if len(user_ids) > 1 else set()
+        pairs -= set(Follow.objects.values_list('user_id', 'author_id'))
+        self.bulk_create(Follow, [
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in pairs
+        ])
@@ -0,0 +1,382 @@
+import csv
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from PIL import Image
+
+from posts.models import Comment, Group, ImportCheckpoint, ImportedPost, Post
+from posts.search import get_backend
+
+User = get_user_model()
+
+RECORD_TYPES = ('user', 'group', 'post', 'comment')
+INDEXED_MODELS = (Post, Comment)
+IMAGE_DIR = Post._meta.get_field('image').upload_to
+
+
+def ingest_image(source, media_root):
+    """Validate an image and copy it under a content-addressed name.
+
+    Runs in a worker process; returns the storage name or None.
+    """
+    try:
+        with Image.open(source) as image:
+            image.verify()
+        with open(source, 'rb') as image_file:
+            digest = hashlib.sha1(image_file.read()).hexdigest()
+    except (OSError, SyntaxError):
+        return None
+    extension = os.path.splitext(source)[1].lower()
+    name = os.path.join(IMAGE_DIR, f'{digest}{extension}')
+    target = os.path.join(media_root, name)
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+    return name
+
+
+def read_records(path, record_type=None):
+    """Stream records from a JSONL file or a CSV file with a header."""
+    with open(path, newline='', encoding='utf-8') as source:
+        if path.endswith('.csv'):
+            if record_type is None:
+                raise CommandError('CSV input needs --type.')
+            for row in csv.DictReader(source):
+                row['type'] = record_type
+                yield row
+            return
+        for line in source:
+            if line.strip():
+                record = json.loads(line)
+                if record_type is not None:
+                    record['type'] = record_type
+                yield record
+
+
+@contextmanager
+def explicit_created(*models):
+    """Let bulk_create keep the original creation dates."""
+    fields = [model._meta.get_field('created') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def parse_created(value):
+    created = parse_datetime(value) if value else None
+    if created is None:
+        return timezone.now()
+    if timezone.is_naive(created):
+        return timezone.make_aware(created)
+    return created
+
+
+class LookupMap:
+    """Natural key -> pk, filled with one query per batch of misses."""
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.ids = {}
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key and key not in self.ids}
+        if missing:
+            self.ids.update(
+                self.model.objects.filter(**{f'{self.field}__in': missing})
+                .values_list(self.field, 'pk')
+            )
+        return self.ids
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import users, groups, posts and comments from a JSONL file '
+        '(one {"type": ...} record per line) or a CSV file of one --type. '
+        'Posts carry a legacy "id" that comments reference as "post". '
+        'Each batch is committed together with the position in the '
+        'source, so an interrupted import resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--type', choices=RECORD_TYPES, default=None)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--images', default=None,
+            help='Directory that the "image" paths of posts are relative to.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Processes that ingest images (0 to ingest inline).'
+        )
+        parser.add_argument(
+            '--drop-indexes', action='store_true',
+            help='Drop secondary indexes of posts and comments during the '
+                 'load and rebuild them at the end.'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            source=os.path.abspath(options['path'])
+        )
+        self.users = LookupMap(User, 'username')
+        self.groups = LookupMap(Group, 'slug')
+        self.post_ids = dict(
+            self.checkpoint.posts.values_list('legacy_id', 'post_id')
+        )
+        self.imported = self.skipped = 0
+        self.started = time.perf_counter()
+        if self.checkpoint.position:
+            self.stdout.write(
+                f'Resuming after record {self.checkpoint.position}'
+            )
+        executor = None
+        if options['images'] and options['workers']:
+            executor = ProcessPoolExecutor(options['workers'])
+        self.map_images = executor.map if executor else map
+        try:
+            with explicit_created(Post, Comment):
+                if options['drop_indexes']:
+                    self.drop_indexes()
+                try:
+                    self.run()
+                finally:
+                    if options['drop_indexes']:
+                        self.restore_indexes()
+        finally:
+            if executor:
+                executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.imported} records, skipped {self.skipped}.'
+        ))
+
+    def run(self):
+        records = read_records(self.options['path'], self.options['type'])
+        batch, batch_type, position = [], None, 0
+        for position, record in enumerate(records, 1):
+            if position <= self.checkpoint.position:
+                continue
+            if record.get('type') not in RECORD_TYPES:
+                raise CommandError(
+                    f'Record {position} has unknown type {record.get("type")}'
+                )
+            if batch and (record['type'] != batch_type
+                          or len(batch) == self.options['batch_size']):
+                self.flush(batch_type, batch, position - 1)
+                batch = []
+            batch_type = record['type']
+            batch.append(record)
+        if batch:
+            self.flush(batch_type, batch, position)
+
+    def flush(self, record_type, records, position):
+        importer = getattr(self, f'import_{record_type}s')
+        with transaction.atomic():
+            imported = importer(records)
+            ImportCheckpoint.objects.filter(pk=self.checkpoint.pk).update(
+                position=position
+            )
+        self.imported += imported
+        self.skipped += len(records) - imported
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            f'{position} records read, {self.imported} imported, '
+            f'{self.skipped} skipped, '
+            f'{self.imported / elapsed:.0f} rows/s'
+        )
+
+    def reserve_ids(self, model, objects):
+        """Give objects primary keys before bulk_create.
+
+        Backends that can't return ids from a bulk insert (SQLite) would
+        leave them unset, but posts need theirs for comments and the
+        search index. The transaction holds the write lock meanwhile.
+
+        Ids continue from the AUTOINCREMENT counter of the table, not
+        from the highest one left, so ids of deleted rows (still in cache
+        keys, trending and rollup rows) are never handed out again.
+        """
+        if connection.features.can_return_ids_from_bulk_insert:
+            return
+        last_id = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT seq FROM sqlite_sequence WHERE name = %s',
+                    [model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            # Inserting the explicit ids moves the counter past them.
+            last_id = max(last_id, row[0] if row else 0)
+        for next_id, obj in enumerate(objects, last_id + 1):
+            obj.pk = next_id
+
+    @staticmethod
+    def insert_new(model, field, objects):
+        """Insert objects whose natural key is not taken yet.
+
+        Returns the number of rows actually inserted: conflicts skipped
+        by the database are told apart by querying the keys back.
+        """
+        keys = {getattr(obj, field) for obj in objects}
+        rows = model.objects.filter(**{f'{field}__in': keys})
+        existing = rows.count()
+        model.objects.bulk_create(objects, ignore_conflicts=True)
+        return rows.count() - existing
+
+    def import_users(self, records):
+        password = make_password(None)
+        users = [
+            User(
+                username=record['username'],
+                email=record.get('email') or '',
+                first_name=record.get('first_name') or '',
+                last_name=record.get('last_name') or '',
+                password=password,
+            )
+            for record in records
+        ]
+        return self.insert_new(User, 'username', users)
+
+    def import_groups(self, records):
+        groups = [
+            Group(
+                slug=record['slug'],
+                title=record.get('title') or record['slug'],
+                description=record.get('description') or '',
+            )
+            for record in records
+        ]
+        return self.insert_new(Group, 'slug', groups)
+
+    def import_posts(self, records):
+        authors = self.users.resolve(r.get('author') for r in records)
+        groups = self.groups.resolve(r.get('group') for r in records)
+        records = [
+            record for record in records
+            if record.get('author') in authors
+            and self.legacy_id(record) not in self.post_ids
+        ]
+        images = self.ingest_images(records)
+        posts = [
+            Post(
+                text=record.get('text') or '',
+                author_id=authors[record['author']],
+                group_id=groups.get(record.get('group')),
+                image=image or '',
+                created=parse_created(record.get('created')),
+            )
+            for record, image in zip(records, images)
+        ]
+        self.reserve_ids(Post, posts)
+        Post.objects.bulk_create(posts)
+        imported = [
+            ImportedPost(
+                checkpoint=self.checkpoint,
+                legacy_id=self.legacy_id(record),
+                post_id=post.pk,
+            )
+            for record, post in zip(records, posts)
+            if self.legacy_id(record) is not None
+        ]
+        ImportedPost.objects.bulk_create(imported)
+        get_backend().index(posts)
+        self.post_ids.update(
+            (item.legacy_id, item.post_id) for item in imported
+        )
+        return len(posts)
+
+    @staticmethod
+    def legacy_id(record):
+        legacy_id = record.get('id')
+        return None if legacy_id in (None, '') else str(legacy_id)
+
+    def import_comments(self, records):
+        authors = self.users.resolve(r.get('author') for r in records)
+        comments = [
+            Comment(
+                text=record.get('text') or '',
+                author_id=authors[record['author']],
+                post_id=self.post_ids[str(record.get('post'))],
+                created=parse_created(record.get('created')),
+            )
+            for record in records
+            if record.get('author') in authors
+            and str(record.get('post')) in self.post_ids
+        ]
+        self.reserve_ids(Comment, comments)
+        Comment.objects.bulk_create(comments)
+        get_backend().index(comments)
+        return len(comments)
+
+    def ingest_images(self, records):
+        if not self.options['images']:
+            return [None] * len(records)
+        sources = [
+            os.path.join(self.options['images'], record['image'])
+            if record.get('image') else None
+            for record in records
+        ]
+        names = dict(zip(
+            filter(None, sources),
+            self.map_images(
+                ingest_image,
+                filter(None, sources),
+                [settings.MEDIA_ROOT] * len(sources),
+            )
+        ))
+        return [names.get(source) for source in sources]
+
+    def drop_indexes(self):
+        # The schema editor only builds the statements here: entering it
+        # is not allowed inside a transaction on SQLite.
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                constraints = connection.introspection.get_constraints(
+                    cursor, model._meta.db_table
+                )
+                for name, info in constraints.items():
+                    if info['index'] and not (
+                        info['unique'] or info['primary_key']
+                    ):
+                        cursor.execute(
+                            str(editor._delete_index_sql(model, name))
+                        )
+        self.stdout.write('Secondary indexes dropped')
+
+    def restore_indexes(self):
+        """Create every declared index that is missing."""
+        started = time.perf_counter()
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                existing = connection.introspection.get_constraints(
+                    cursor, model._meta.db_table
+                )
+                for statement in editor._model_indexes_sql(model):
+                    name = str(statement.parts['name']).strip('"`')
+                    if name not in existing:
+                        cursor.execute(str(statement))
+        self.stdout.write(
+            f'Indexes rebuilt in {time.perf_counter() - started:.1f} s'
+        )
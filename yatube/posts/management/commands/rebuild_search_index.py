@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Comment, Post
+from posts.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of posts and comments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        for model in (Post, Comment):
+            with transaction.atomic():
+                backend.rebuild(model, batch_size=options['batch_size'])
+            self.stdout.write(
+                f'Indexed {model._meta.verbose_name_plural}: '
+                f'{model.objects.count()}'
+            )
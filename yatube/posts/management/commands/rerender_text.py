@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Comment, Post
+from posts.richtext import VERSION, render_many
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the rich text of the posts and comments that were stored '
+        'without it or by an older renderer version, in batches. Safe to '
+        'interrupt: the next run picks up the rows still out of date.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            done = self.rerender(model, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: {done} rendered'
+            ))
+
+    def rerender(self, model, batch_size):
+        done = last_pk = 0
+        stale = model.objects.filter(
+            text_html_version__lt=VERSION
+        ).order_by('pk').only('pk', 'text')
+        while True:
+            with transaction.atomic():
+                # Locked, so an edit can't slip in between.
+                batch = list(
+                    stale.select_for_update().filter(pk__gt=last_pk)
+                    [:batch_size]
+                )
+                if not batch:
+                    return done
+                for obj, html in zip(
+                    batch, render_many([obj.text for obj in batch])
+                ):
+                    obj.text_html = html
+                    obj.text_html_version = VERSION
+                model.objects.bulk_update(
+                    batch, ['text_html', 'text_html_version']
+                )
+            done += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {done}')
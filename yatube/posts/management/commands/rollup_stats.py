@@ -0,0 +1,33 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.rollups import CHUNK_DAYS, rebuild
+
+
+def day(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Not a YYYY-MM-DD date: {value}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount the daily posts and comments of the groups and authors '
+        'from the posts and comments tables, by default from the first '
+        'post to today. Run it after deploying the rollup tables and '
+        'after bulk imports; re-running it is safe.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=day, help='YYYY-MM-DD')
+        parser.add_argument('--until', type=day, help='YYYY-MM-DD')
+        parser.add_argument('--chunk-days', type=int, default=CHUNK_DAYS)
+
+    def handle(self, *args, **options):
+        days = rebuild(
+            options['since'], options['until'], options['chunk_days'],
+            report=lambda stop: self.stdout.write(f'{stop} done')
+        )
+        self.stdout.write(self.style.SUCCESS(f'{days} days recounted'))
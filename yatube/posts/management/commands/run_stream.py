@@ -0,0 +1,30 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.stream import ChangeLog, StreamServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the Server-Sent Events stream of new posts (STREAM_URL) '
+        'from one asyncio process; route STREAM_URL to it in the proxy.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Seconds between looks for new posts.'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.STREAM_URL:
+            raise CommandError('Set STREAM_URL to serve the stream.')
+        server = StreamServer(ChangeLog(), options['poll'])
+        try:
+            asyncio.run(server.run(options['host'], options['port']))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import BLOCK_WORK, TOP_SUGGESTIONS, run
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the "who to follow" suggestions of every user from the '
+        'follow graph, block by block. Run it from cron, e.g. nightly.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=TOP_SUGGESTIONS,
+                            help='Suggestions kept per user.')
+        parser.add_argument(
+            '--block-work', type=int, default=BLOCK_WORK,
+            help='Matrix entries per block; bounds the memory used.'
+        )
+
+    def handle(self, *args, **options):
+        users = run(options['top'], options['block_work'], self.report)
+        self.stdout.write(self.style.SUCCESS(
+            f'Suggestions computed for {users} users'
+        ))
+
+    def report(self, done, total):
+        self.stdout.write(f'{done}/{total} users')
@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={
+                'ordering': ('-created', '-id'),
+                'verbose_name_plural': 'Posts comments',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='post',
+            options={
+                'ordering': ('-created', '-id'),
+                'verbose_name': 'post',
+                'verbose_name_plural': 'posts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['author', 'created'], name='post_author_created_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['group', 'created'], name='post_group_created_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_feed_markers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'post'), ('group', 'group')], max_length=5)),
+                ('object_id', models.PositiveIntegerField()),
+                ('score', models.FloatField(default=0)),
+                ('period', models.PositiveIntegerField()),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+    ]
@@ -2,6 +2,8 @@ from core.models import CreatedModel
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from . import richtext
+
 User = get_user_model()
 
 
@@ -22,7 +24,22 @@ class Group(models.Model):
         return self.title
 
 
-class Post(CreatedModel):
+class RichTextMixin:
+    """Renders ``text`` into ``text_html`` whenever the text is saved,
+    whatever saves it (forms, the API, the admin, the ORM)."""
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            richtext.apply(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'text_html', 'text_html_version'
+                }
+        super().save(*args, **kwargs)
+
+
+class Post(RichTextMixin, CreatedModel):
     text = models.TextField(
         verbose_name='Post text',
         help_text='Required field'
@@ -47,17 +64,32 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True,
     )
+    # Rendered by posts.richtext; version 0 means not rendered yet.
+    text_html = models.TextField(blank=True, editable=False)
+    text_html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False
+    )
 
     class Meta:
         verbose_name = 'post'
         verbose_name_plural = 'posts'
-        ordering = ('-created',)
+        ordering = ('-created', '-id')
+        # SQLite walks ascending indexes backwards for the newest-first
+        # feeds, which also keeps the id tie-breaker in index order.
+        indexes = [
+            models.Index(
+                fields=['author', 'created'], name='post_author_created_idx'
+            ),
+            models.Index(
+                fields=['group', 'created'], name='post_group_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
 
 
-class Comment(CreatedModel):
+class Comment(RichTextMixin, CreatedModel):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,
                              related_name="comments", verbose_name='Post',
                              help_text='Commented post')
@@ -67,10 +99,19 @@ class Comment(CreatedModel):
                                help_text='The author is displayed on the website')
     text = models.TextField(verbose_name='Comment text',
                             help_text='Required field')
+    text_html = models.TextField(blank=True, editable=False)
+    text_html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False
+    )
 
     class Meta:
         verbose_name_plural = 'Posts comments'
-        ordering = ('-created',)
+        ordering = ('-created', '-id')
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -91,3 +132,118 @@ class Follow(models.Model):
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
                                related_name='following')
+
+
+class FeedMarker(models.Model):
+    """Posts of the followed authors the user hasn't seen, see
+    posts.unread."""
+    user = models.OneToOneField(User,
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='feed_marker')
+    unread = models.PositiveIntegerField(default=0)
+    last_seen = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.unread}'
+
+
+class FollowSuggestion(models.Model):
+    """An author the user may want to follow, see posts.suggestions."""
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='follow_suggestions')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='+')
+    score = models.FloatField()
+    # Authors the user follows who follow this one.
+    mutual = models.PositiveIntegerField(default=0)
+    computed = models.DateTimeField()
+
+    class Meta:
+        ordering = ('-score', 'author_id')
+        unique_together = ('user', 'author')
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}: {self.score}'
+
+
+class TrendingScore(models.Model):
+    """Time-decayed activity score of a post or a group, see
+    posts.trending."""
+    POST = 'post'
+    GROUP = 'group'
+    KINDS = ((POST, 'post'), (GROUP, 'group'))
+    kind = models.CharField(max_length=5, choices=KINDS)
+    object_id = models.PositiveIntegerField()
+    score = models.FloatField(default=0)
+    period = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}: {self.score}'
+
+
+class GroupDailyStats(models.Model):
+    """Posts and comments of a group on a day, see posts.rollups."""
+    group = models.ForeignKey(Group,
+                              on_delete=models.CASCADE,
+                              related_name='daily_stats')
+    day = models.DateField(db_index=True)
+    posts = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ('day',)
+        # Also the index the date ranges of a group are read from.
+        unique_together = ('group', 'day')
+
+    def __str__(self):
+        return f'{self.group_id} {self.day}'
+
+
+class AuthorDailyStats(models.Model):
+    """Posts, comments and follower changes of a user on a day, see
+    posts.rollups."""
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='daily_stats')
+    day = models.DateField(db_index=True)
+    posts = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    followers_gained = models.PositiveIntegerField(default=0)
+    followers_lost = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ('day',)
+        unique_together = ('author', 'day')
+
+    def __str__(self):
+        return f'{self.author_id} {self.day}'
+
+
+class ImportCheckpoint(models.Model):
+    """Position of an import_content source, committed with each batch."""
+    source = models.CharField(max_length=255, unique=True)
+    position = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.source}: {self.position}'
+
+
+class ImportedPost(models.Model):
+    """Legacy id of an imported post, used to attach its comments."""
+    checkpoint = models.ForeignKey(ImportCheckpoint,
+                                   on_delete=models.CASCADE,
+                                   related_name='posts')
+    legacy_id = models.CharField(max_length=64)
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='+')
+
+    class Meta:
+        unique_together = ('checkpoint', 'legacy_id')
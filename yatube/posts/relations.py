@@ -0,0 +1,42 @@
+"""What the viewer has to do with a page of posts or authors.
+
+``resolve()`` answers each question for the whole page with one query
+and sets the answers on the objects, for the templates and serializers:
+
+* ``author.viewer_follows``: the viewer follows the author;
+* ``post.viewer_follows_author``: the viewer follows the post's author;
+* ``post.viewer_commented``: the viewer commented on the post;
+* ``post.viewer_is_author``: the viewer wrote the post.
+
+Anonymous viewers get False everywhere without a query.
+"""
+from .models import Comment, Follow
+
+
+def resolve(user, posts=(), authors=()):
+    """Set the viewer attributes on ``posts`` and ``authors``; return
+    the posts as a list."""
+    posts = list(posts)
+    authors = list(authors)
+    viewer_id = user.pk if user is not None and user.is_authenticated else None
+    followed = set()
+    commented = set()
+    if viewer_id is not None:
+        author_ids = {author.pk for author in authors}
+        author_ids.update(post.author_id for post in posts)
+        author_ids.discard(viewer_id)
+        if author_ids:
+            followed = set(Follow.objects.filter(
+                user_id=viewer_id, author_id__in=author_ids
+            ).values_list('author_id', flat=True))
+        if posts:
+            commented = set(Comment.objects.filter(
+                author_id=viewer_id, post_id__in=[post.pk for post in posts]
+            ).order_by().values_list('post_id', flat=True).distinct())
+    for author in authors:
+        author.viewer_follows = author.pk in followed
+    for post in posts:
+        post.viewer_follows_author = post.author_id in followed
+        post.viewer_commented = post.pk in commented
+        post.viewer_is_author = post.author_id == viewer_id
+    return posts
@@ -0,0 +1,106 @@
+"""Rich text of posts and comments, rendered once when they are written.
+
+``render()`` turns plain text into HTML: links for URLs, ``@username``
+mentions of existing users and ``#hashtags`` (a search for the tag), and
+``<br>`` for line breaks. Everything else is escaped, so the output is
+safe by construction. ``Post.save()`` and ``Comment.save()`` store it in
+``text_html`` with the renderer VERSION whenever the text is saved;
+``richtext()`` shows it, or the escaped text of rows not rendered yet
+(bulk inserts and ``QuerySet.update()`` don't render). Bump VERSION when
+the output changes and run ``manage.py rerender_text`` to upgrade the
+stored HTML in batches.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.template.defaultfilters import linebreaksbr
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+
+VERSION = 1
+TOKEN = re.compile(
+    r'(?P<url>\bhttps?://[^\s<>"]+)'
+    r'|(?<![\w@])@(?P<mention>\w[\w.@+-]*)'
+    r'|(?<![\w&#])#(?P<tag>\w+)'
+)
+# Left out of the end of a URL or a mention: the sentence's, not theirs.
+TRAILING = '.,:;!?)\'"'
+
+
+def mentions(text):
+    return {
+        match['mention'].rstrip(TRAILING)
+        for match in TOKEN.finditer(text) if match['mention']
+    }
+
+
+def existing_users(usernames):
+    if not usernames:
+        return set()
+    return set(get_user_model().objects.filter(
+        username__in=usernames
+    ).values_list('username', flat=True))
+
+
+def link(href, label, css=None):
+    attributes = f' class="{css}"' if css else ''
+    if href.startswith('http'):
+        attributes += ' rel="nofollow noopener" target="_blank"'
+    return f'<a href="{escape(href)}"{attributes}>{escape(label)}</a>'
+
+
+def render(text, users):
+    """HTML of ``text``; ``users`` are the usernames that exist."""
+    parts = []
+    position = 0
+    for match in TOKEN.finditer(text):
+        token = match[0]
+        kind = match.lastgroup
+        if kind in ('url', 'mention'):
+            stripped = token.rstrip(TRAILING)
+            if kind == 'url' and token.endswith(')') and '(' in stripped:
+                # Balanced parentheses belong to the URL (Wikipedia).
+                stripped += ')'
+            end = match.start() + len(stripped)
+        else:
+            stripped, end = token, match.end()
+        parts.append(escape(text[position:match.start()]))
+        position = end
+        if kind == 'url':
+            parts.append(link(stripped, stripped))
+        elif kind == 'mention' and stripped[1:] in users:
+            parts.append(link(
+                reverse('posts:profile', args=[stripped[1:]]), stripped,
+                'mention'
+            ))
+        elif kind == 'tag':
+            parts.append(link(
+                reverse('posts:search') + '?' + urlencode({'q': token}),
+                token, 'hashtag'
+            ))
+        else:
+            parts.append(escape(stripped))
+    parts.append(escape(text[position:]))
+    return linebreaksbr(''.join(parts), autoescape=False)
+
+
+def render_many(texts):
+    """HTML of each of ``texts``, with one query for all the mentions."""
+    users = existing_users(set().union(*map(mentions, texts)))
+    return [render(text, users) for text in texts]
+
+
+def apply(obj):
+    """Render the text of a post or a comment into ``text_html``."""
+    obj.text_html, = render_many([obj.text])
+    obj.text_html_version = VERSION
+
+
+def richtext(obj):
+    """The stored HTML of a post or a comment, or its escaped text if it
+    hasn't been rendered yet."""
+    if obj.text_html_version:
+        return mark_safe(obj.text_html)
+    return linebreaksbr(obj.text)
@@ -0,0 +1,210 @@
+"""Daily activity of groups and authors, kept in rollup tables.
+
+``GroupDailyStats`` and ``AuthorDailyStats`` have a row per group or
+author and day with any activity. The signals in posts.signals update
+them as posts, comments and follows are saved and deleted: one UPDATE
+of a row, or an INSERT for the first event of its day. Reading a date
+range of a group or an author is then a range scan of the
+``(group, day)`` or ``(author, day)`` unique index instead of a GROUP BY
+over Post, Comment and Follow.
+
+Days are local dates in ``TIME_ZONE``. Posts and comments count on the
+day they were created, also when they are deleted later on (the count
+goes down). Followers count on the day they followed or unfollowed.
+
+``manage.py rollup_stats`` recounts the posts and comments of a range of
+days from the tables. Run it once after deploying, after bulk imports
+(``bulk_create`` sends no signals) and to repair drift. Follows have no
+date, so follower changes can't be recounted. They are only counted from
+the time the signals run.
+"""
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, Value
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from .models import AuthorDailyStats, Comment, GroupDailyStats, Post
+
+GROUP_COUNTERS = ('posts', 'comments')
+AUTHOR_COUNTERS = ('posts', 'comments', 'followers_gained',
+                   'followers_lost')
+CHUNK_DAYS = 31
+BATCH_SIZE = 500
+
+
+def day_of(moment):
+    return timezone.localdate(moment)
+
+
+def start_of(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time()))
+
+
+def bump(model, key, day, field, delta):
+    """Add ``delta`` to a counter of the row of ``key`` and ``day``.
+
+    Counters don't go below zero and a decrement never creates a row.
+    """
+    change = (
+        F(field) + delta if delta > 0
+        else Greatest(F(field) + delta, Value(0))
+    )
+    rows = model.objects.filter(day=day, **key)
+    if rows.update(**{field: change}) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(day=day, **key, **{field: delta})
+    except IntegrityError:
+        # Created by a concurrent event in between.
+        rows.update(**{field: change})
+
+
+def record_post(post, delta=1):
+    day = day_of(post.created)
+    bump(AuthorDailyStats, {'author_id': post.author_id}, day, 'posts',
+         delta)
+    if post.group_id:
+        bump(GroupDailyStats, {'group_id': post.group_id}, day, 'posts',
+             delta)
+
+
+def record_comment(comment, delta=1):
+    day = day_of(comment.created)
+    bump(AuthorDailyStats, {'author_id': comment.author_id}, day,
+         'comments', delta)
+    group_id = comment.post.group_id
+    if group_id:
+        bump(GroupDailyStats, {'group_id': group_id}, day, 'comments',
+             delta)
+
+
+def record_follow(follow, delta=1):
+    field = 'followers_gained' if delta > 0 else 'followers_lost'
+    bump(AuthorDailyStats, {'author_id': follow.author_id},
+         timezone.localdate(), field, 1)
+
+
+def move_post(post, old_group_id):
+    """Move the counts of an edited post and its comments from its old
+    group to the new one."""
+    day = day_of(post.created)
+    comments = list(
+        Comment.objects.filter(post=post).order_by()
+        .annotate(day=TruncDate('created'))
+        .values('day').annotate(count=Count('pk'))
+    )
+    for group_id, sign in ((old_group_id, -1), (post.group_id, 1)):
+        if not group_id:
+            continue
+        key = {'group_id': group_id}
+        bump(GroupDailyStats, key, day, 'posts', sign)
+        for row in comments:
+            bump(GroupDailyStats, key, row['day'], 'comments',
+                 sign * row['count'])
+
+
+def period(rows, since, until, counters):
+    """The days of ``rows`` (one group's or author's stats) from
+    ``since`` to ``until`` with activity, and the totals of the
+    ``counters`` over them."""
+    days = list(
+        rows.filter(day__range=(since, until)).values('day', *counters)
+    )
+    totals = {field: sum(day[field] for day in days) for field in counters}
+    return days, totals
+
+
+def first_day():
+    """The day of the oldest post or comment, or None."""
+    moments = [
+        model.objects.aggregate(first=Min('created'))['first']
+        for model in (Post, Comment)
+    ]
+    moments = [moment for moment in moments if moment]
+    return day_of(min(moments)) if moments else None
+
+
+def counts(queryset, key):
+    """``(key, day) -> count`` of the rows of ``queryset``."""
+    return {
+        (row[key], row['day']): row['count']
+        for row in queryset.values(key, 'day').annotate(count=Count('pk'))
+    }
+
+
+def write(model, key, start, stop, counters, counted):
+    """Set the ``counted`` counters of the rows of the days ``start`` to
+    ``stop``; other counters are kept."""
+    fields = list(counted)
+    new = set().union(*counted.values())
+    changed = []
+    for row in model.objects.filter(day__range=(start, stop)).iterator():
+        ident = (getattr(row, key), row.day)
+        new.discard(ident)
+        values = [counted[field].get(ident, 0) for field in fields]
+        if values != [getattr(row, field) for field in fields]:
+            for field, value in zip(fields, values):
+                setattr(row, field, value)
+            changed.append(row)
+    model.objects.bulk_update(changed, fields, batch_size=BATCH_SIZE)
+    model.objects.bulk_create(
+        [
+            model(day=day, **{key: object_id}, **{
+                field: counted[field].get((object_id, day), 0)
+                for field in fields
+            })
+            for object_id, day in new
+        ],
+        batch_size=BATCH_SIZE
+    )
+    # Rows with nothing left in them.
+    model.objects.filter(
+        day__range=(start, stop), **{field: 0 for field in counters}
+    ).delete()
+
+
+def rebuild_days(start, stop):
+    """Recount the posts and comments of the days ``start`` to ``stop``."""
+    # A range of ``created``, so the index on it is used.
+    created = {
+        'created__gte': start_of(start),
+        'created__lt': start_of(stop + datetime.timedelta(days=1)),
+    }
+    posts = Post.objects.filter(**created).order_by().annotate(
+        day=TruncDate('created')
+    )
+    comments = Comment.objects.filter(**created).order_by().annotate(
+        day=TruncDate('created')
+    )
+    with transaction.atomic():
+        write(GroupDailyStats, 'group_id', start, stop, GROUP_COUNTERS, {
+            'posts': counts(posts.filter(group__isnull=False), 'group_id'),
+            'comments': counts(
+                comments.filter(post__group__isnull=False), 'post__group_id'
+            ),
+        })
+        write(AuthorDailyStats, 'author_id', start, stop, AUTHOR_COUNTERS, {
+            'posts': counts(posts, 'author_id'),
+            'comments': counts(comments, 'author_id'),
+        })
+
+
+def rebuild(since=None, until=None, chunk_days=CHUNK_DAYS, report=None):
+    """Recount the posts and comments of the days ``since`` to ``until``
+    (by default from the first post or comment to today), a chunk of
+    days per transaction; return the number of days."""
+    since = since or first_day()
+    until = until or timezone.localdate()
+    if since is None or since > until:
+        return 0
+    start = since
+    while start <= until:
+        stop = min(start + datetime.timedelta(days=chunk_days - 1), until)
+        rebuild_days(start, stop)
+        if report:
+            report(stop)
+        start = stop + datetime.timedelta(days=1)
+    return (until - since).days + 1
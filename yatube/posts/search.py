@@ -0,0 +1,257 @@
+"""Full-text search over posts and comments.
+
+The backend is picked by the ``POSTS_SEARCH_BACKEND`` setting (a dotted
+path). By default SQLite databases get an FTS5 index and other databases
+fall back to ``icontains`` lookups.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .models import Comment, Post
+from .utils import keyset_page
+
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_WORDS = 24
+SEARCH_COUNT = 10
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(query):
+    return TOKEN_RE.findall(query or '')[:16]
+
+
+def highlight(snippet):
+    """Escape user text and turn match markers into <mark> tags."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def related_queryset(model):
+    if model is Post:
+        return Post.objects.select_related('author', 'group')
+    return model.objects.select_related('author', 'post')
+
+
+class BaseSearchBackend:
+    """Interface of a search backend.
+
+    ``search`` returns model instances carrying ``search_rank`` and
+    ``search_snippet`` attributes plus the cursor of the next page.
+    """
+
+    def search(self, model, query, cursor=None, size=SEARCH_COUNT):
+        raise NotImplementedError
+
+    def filter(self, queryset, query):
+        """Restrict ``queryset`` to the objects matching ``query``."""
+        raise NotImplementedError
+
+    def index(self, objects):
+        """Add or refresh ``objects`` in the index."""
+
+    def remove(self, model, pks):
+        """Drop the objects with ``pks`` from the index."""
+
+    def rebuild(self, model, batch_size=1000):
+        """Re-create the whole index for ``model``."""
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """Unranked substring search, works on any database."""
+
+    def filter(self, queryset, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset.none()
+        for token in tokens:
+            queryset = queryset.filter(text__icontains=token)
+        return queryset
+
+    def search(self, model, query, cursor=None, size=SEARCH_COUNT):
+        queryset = self.filter(related_queryset(model), query)
+        objects, next_cursor = keyset_page(queryset, cursor, size)
+        tokens = [token.lower() for token in tokenize(query)]
+        for obj in objects:
+            obj.search_rank = None
+            obj.search_snippet = highlight(self.snippet(obj.text, tokens))
+        return objects, next_cursor
+
+    def snippet(self, text, tokens):
+        words = text.split()
+        first = next(
+            (i for i, word in enumerate(words)
+             if any(token in word.lower() for token in tokens)),
+            0
+        )
+        start = max(first - SNIPPET_WORDS // 2, 0)
+        marked = [
+            f'{MARK_START}{word}{MARK_END}'
+            if any(token in word.lower() for token in tokens) else word
+            for word in words[start:start + SNIPPET_WORDS]
+        ]
+        return (
+            ('…' if start else '') + ' '.join(marked)
+            + ('…' if start + SNIPPET_WORDS < len(words) else '')
+        )
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """Ranked search over FTS5 tables kept in sync by ``posts.signals``.
+
+    Each indexed model has its own FTS5 table whose rowid is the primary
+    key of the object, so updates and deletes are point lookups.
+    """
+    tables = {
+        Post: 'posts_post_fts',
+        Comment: 'posts_comment_fts',
+    }
+
+    @staticmethod
+    def match_expression(query):
+        """Quote every token so user input can't break FTS5 syntax.
+
+        The last token is matched as a prefix for search-as-you-type.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        return ' '.join(f'"{token}"' for token in tokens) + '*'
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            rank, rowid = cursor.split('_')
+            return float(rank), int(rowid)
+        except (AttributeError, ValueError):
+            return None
+
+    def search(self, model, query, cursor=None, size=SEARCH_COUNT):
+        match = self.match_expression(query)
+        if match is None:
+            return [], None
+        rows = self.ranked_rows(model, match, cursor, size + 1)
+        next_cursor = None
+        if len(rows) > size:
+            rows = rows[:size]
+            next_cursor = f'{rows[-1][1]!r}_{rows[-1][0]}'
+        pks = [pk for pk, _ in rows]
+        snippets = self.snippets(model, match, pks)
+        found = related_queryset(model).in_bulk(pks)
+        objects = []
+        for pk, rank in rows:
+            obj = found.get(pk)
+            if obj is None:
+                continue
+            obj.search_rank = rank
+            obj.search_snippet = highlight(snippets.get(pk, ''))
+            objects.append(obj)
+        return objects, next_cursor
+
+    def ranked_rows(self, model, match, cursor, limit):
+        table = self.tables[model]
+        sql = (
+            f'SELECT rowid, bm25({table}) AS rank '
+            f'FROM {table} WHERE {table} MATCH %s'
+        )
+        params = [match]
+        position = self.decode_cursor(cursor)
+        if position is not None:
+            sql += (
+                f' AND (bm25({table}) > %s'
+                f' OR (bm25({table}) = %s AND rowid > %s))'
+            )
+            params += [position[0], position[0], position[1]]
+        sql += ' ORDER BY rank, rowid LIMIT %s'
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def snippets(self, model, match, pks):
+        """Snippets only for the rows of the page, not every match."""
+        if not pks:
+            return {}
+        table = self.tables[model]
+        placeholders = ', '.join(['%s'] * len(pks))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, '
+                f"snippet({table}, 0, %s, %s, '…', {SNIPPET_WORDS}) "
+                f'FROM {table} WHERE {table} MATCH %s '
+                f'AND rowid IN ({placeholders})',
+                [MARK_START, MARK_END, match, *pks]
+            )
+            return dict(cursor.fetchall())
+
+    def filter(self, queryset, query):
+        match = self.match_expression(query)
+        if match is None:
+            return queryset.none()
+        table = self.tables[queryset.model]
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s', (match,)
+        ))
+
+    def index(self, objects):
+        with connection.cursor() as cursor:
+            for obj in objects:
+                table = self.tables[type(obj)]
+                cursor.execute(
+                    f'DELETE FROM {table} WHERE rowid = %s', (obj.pk,)
+                )
+                cursor.execute(
+                    f'INSERT INTO {table}(rowid, text) VALUES (%s, %s)',
+                    (obj.pk, obj.text)
+                )
+
+    def remove(self, model, pks):
+        table = self.tables[model]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {table} WHERE rowid = %s',
+                [(pk,) for pk in pks]
+            )
+
+    def rebuild(self, model, batch_size=1000):
+        table = self.tables[model]
+        rows = model.objects.order_by().values_list('pk', 'text')
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}')
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(row)
+                if len(batch) == batch_size:
+                    self._insert(cursor, table, batch)
+                    batch = []
+            self._insert(cursor, table, batch)
+            cursor.execute(
+                f"INSERT INTO {table}({table}) VALUES ('optimize')"
+            )
+
+    @staticmethod
+    def _insert(cursor, table, rows):
+        cursor.executemany(
+            f'INSERT INTO {table}(rowid, text) VALUES (%s, %s)', rows
+        )
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    path = getattr(settings, 'POSTS_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTS5Backend()
+    return LikeSearchBackend()
@@ -0,0 +1,108 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import rollups, search, trending
+from .models import Comment, Follow, Group, Post, TrendingScore
+from .tasks import count_unread, generate_thumbnails, purge_feed_cache
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """Keep the full-text index in step with the text of the object."""
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    search.get_backend().index([instance])
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.get_backend().remove(sender, [instance.pk])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def queue_feed_purge(sender, **kwargs):
+    # The dedup key folds a burst of new posts into one purge.
+    purge_feed_cache.enqueue(dedup_key='purge_feed_cache')
+
+
+@receiver(post_save, sender=Post)
+def queue_thumbnails(sender, instance, **kwargs):
+    """Render thumbnails in the worker, not in the next page view."""
+    if instance.image:
+        generate_thumbnails.enqueue(
+            (instance.pk,), dedup_key=f'thumbnails:{instance.pk}'
+        )
+
+
+@receiver(post_save, sender=Post)
+def queue_unread_count(sender, instance, created, **kwargs):
+    """Update the unread badges of the author's followers."""
+    if created:
+        count_unread.delay(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def update_trending(sender, instance, created, **kwargs):
+    # One UPDATE, cheaper than queueing a task for it.
+    if not created:
+        return
+    if sender is Post:
+        trending.record_post(instance)
+    else:
+        trending.record_comment(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Group)
+def remove_from_trending(sender, instance, **kwargs):
+    kind = TrendingScore.POST if sender is Post else TrendingScore.GROUP
+    trending.remove(kind, instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, raw=False, update_fields=None,
+                   **kwargs):
+    """The group before an edit, for update_rollups to move the counts."""
+    if raw or instance.pk is None or (
+        update_fields is not None and 'group' not in update_fields
+    ):
+        return
+    instance._rollup_group_id = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Follow)
+def update_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if sender is Follow:
+        if created:
+            rollups.record_follow(instance)
+    elif created:
+        if sender is Post:
+            rollups.record_post(instance)
+        else:
+            rollups.record_comment(instance)
+    elif sender is Post and '_rollup_group_id' in instance.__dict__:
+        old_group_id = instance.__dict__.pop('_rollup_group_id')
+        if old_group_id != instance.group_id:
+            rollups.move_post(instance, old_group_id)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Follow)
+def remove_from_rollups(sender, instance, **kwargs):
+    if sender is Post:
+        rollups.record_post(instance, -1)
+    elif sender is Comment:
+        rollups.record_comment(instance, -1)
+    else:
+        rollups.record_follow(instance, -1)
@@ -0,0 +1,234 @@
+"""Server-Sent Events stream of new posts.
+
+``manage.py run_stream`` serves ``STREAM_URL`` from one asyncio process.
+An idle subscriber costs a socket and a coroutine, not a thread. One
+poller reads the posts saved since its last look (a single indexed
+query however many clients are connected) into ``ChangeLog``. Each
+subscriber picks the entries of its feed out of the log:
+
+* ``?feed=index``: every new post;
+* ``?feed=group&slug=<slug>``: new posts of a group;
+* ``?feed=follow``: new posts by the authors the session user follows.
+
+An event is ``{"new": <count>, "ids": [<post id>, ...]}``. Its id is the
+log position, so a reconnecting client (``Last-Event-ID``) gets what it
+missed while it is still in the log.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.db import close_old_connections
+
+from .models import Follow, Group, Post
+
+logger = logging.getLogger('yatube.stream')
+
+LOG_SIZE = 10000
+POLL_BATCH = 500
+KEEPALIVE = 15
+RETRY_MS = 5000
+REQUEST_TIMEOUT = 10
+WRITE_TIMEOUT = 30
+MAX_HEADER_SIZE = 16 * 1024
+HEADERS = (
+    'HTTP/1.1 200 OK\r\n'
+    'Content-Type: text/event-stream; charset=utf-8\r\n'
+    'Cache-Control: no-cache\r\n'
+    # Nginx would otherwise buffer the events.
+    'X-Accel-Buffering: no\r\n'
+    'Connection: keep-alive\r\n\r\n'
+    f'retry: {RETRY_MS}\n\n'
+)
+
+
+class ChangeLog:
+    """The latest new posts as ``(id, author_id, group_id)``, oldest first."""
+
+    def __init__(self, last_id=0, size=LOG_SIZE):
+        self.entries = deque(maxlen=size)
+        self.last_id = last_id
+        self.changed = asyncio.Event()
+
+    def append(self, entries):
+        if not entries:
+            return
+        self.entries.extend(entries)
+        self.last_id = entries[-1][0]
+        # Wake every waiting subscriber; later waits need a new event.
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def since(self, post_id):
+        # From the newest end: subscribers are usually just behind.
+        newer = []
+        for entry in reversed(self.entries):
+            if entry[0] <= post_id:
+                break
+            newer.append(entry)
+        newer.reverse()
+        return newer
+
+
+def fetch_new_posts(last_id):
+    # Ids grow in commit order: SQLite has one writer at a time.
+    return list(
+        Post.objects.filter(pk__gt=last_id).order_by('pk')
+        .values_list('pk', 'author_id', 'group_id')[:POLL_BATCH]
+    )
+
+
+def fetch_last_post_id():
+    return Post.objects.order_by('-pk').values_list('pk', flat=True).first()
+
+
+def session_user_id(cookie_header):
+    cookie = SimpleCookie()
+    cookie.load(cookie_header or '')
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    engine = import_module(settings.SESSION_ENGINE)
+    return engine.SessionStore(morsel.value).get(SESSION_KEY)
+
+
+def subscription(query, cookie_header):
+    """A ``(author_id, group_id) -> bool`` filter for the feed in
+    ``query``, or None if the feed doesn't exist or isn't allowed."""
+    feed = query.get('feed', 'index')
+    if feed == 'index':
+        return lambda author_id, group_id: True
+    if feed == 'group':
+        group_id = Group.objects.filter(
+            slug=query.get('slug')
+        ).values_list('pk', flat=True).first()
+        if group_id is None:
+            return None
+        return lambda author_id, post_group_id: post_group_id == group_id
+    if feed == 'follow':
+        user_id = session_user_id(cookie_header)
+        if user_id is None:
+            return None
+        authors = set(Follow.objects.filter(
+            user_id=user_id
+        ).values_list('author_id', flat=True))
+        return lambda author_id, group_id: author_id in authors
+    return None
+
+
+def event(position, post_ids):
+    data = json.dumps({'new': len(post_ids), 'ids': post_ids},
+                      separators=(',', ':'))
+    return f'id: {position}\nevent: posts\ndata: {data}\n\n'
+
+
+class StreamServer:
+
+    def __init__(self, log, poll_interval=1.0):
+        self.log = log
+        self.poll_interval = poll_interval
+        self.connections = 0
+
+    async def call(self, func, *args):
+        """Run blocking (database) code without stopping the loop."""
+        def run():
+            close_old_connections()
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, run)
+
+    async def poll(self):
+        while True:
+            try:
+                self.log.append(
+                    await self.call(fetch_new_posts, self.log.last_id)
+                )
+            except Exception:
+                logger.exception('Polling for new posts failed')
+            await asyncio.sleep(self.poll_interval)
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            await self.serve(reader, writer)
+        except (ConnectionError, asyncio.TimeoutError,
+                asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except asyncio.CancelledError:
+            # Shutting down. Returning instead of re-raising spares a
+            # traceback per connection from asyncio.streams on 3.11.
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, reader, writer):
+        head = await asyncio.wait_for(
+            reader.readuntil(b'\r\n\r\n'), REQUEST_TIMEOUT
+        )
+        request_line, *header_lines = head.decode('latin-1').split('\r\n')
+        method, target, _ = request_line.split(' ', 2)
+        headers = {}
+        for line in filter(None, header_lines):
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        if method != 'GET' or url.path != settings.STREAM_URL:
+            return await self.reject(writer, '404 Not Found')
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        matches = await self.call(subscription, query, headers.get('cookie'))
+        if matches is None:
+            return await self.reject(writer, '403 Forbidden')
+        position = self.log.last_id
+        last_event_id = headers.get('last-event-id', '')
+        if last_event_id.isdigit():
+            position = min(int(last_event_id), position)
+        writer.write(HEADERS.encode())
+        # Clients send nothing more: a finished read means they left.
+        disconnected = asyncio.ensure_future(reader.read(1))
+        try:
+            while not disconnected.done():
+                # Taken before reading the log, so an append while the
+                # write drains still wakes this subscriber.
+                changed = self.log.changed
+                post_ids = [
+                    post_id for post_id, author_id, group_id
+                    in self.log.since(position)
+                    if matches(author_id, group_id)
+                ]
+                position = self.log.last_id
+                writer.write(
+                    event(position, post_ids).encode() if post_ids
+                    else b': keepalive\n\n'
+                )
+                await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+                change = asyncio.ensure_future(changed.wait())
+                await asyncio.wait(
+                    {change, disconnected}, timeout=KEEPALIVE,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                change.cancel()
+        finally:
+            disconnected.cancel()
+
+    async def reject(self, writer, status):
+        writer.write(
+            f'HTTP/1.1 {status}\r\nContent-Length: 0\r\n'
+            f'Connection: close\r\n\r\n'.encode()
+        )
+        await writer.drain()
+
+    async def run(self, host, port):
+        # Start from the present: the log only holds posts saved from now.
+        self.log.last_id = await self.call(fetch_last_post_id) or 0
+        server = await asyncio.start_server(
+            self.handle, host, port, limit=MAX_HEADER_SIZE
+        )
+        logger.info('Streaming new posts on %s:%s', host, port)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.poll())
@@ -0,0 +1,161 @@
+"""Who-to-follow suggestions computed from the Follow graph.
+
+``manage.py suggest_follows`` loads the follows into a sparse adjacency
+matrix ``A`` (``A[u, a] = 1`` when ``u`` follows ``a``), indexed by
+position in the sorted array of the user ids that appear in the graph.
+The score of an author for a user adds up:
+
+* friends of friends: how many of the authors the user follows follow
+  the author (row of ``A @ A``, also stored as ``mutual``);
+* co-follows: the authors followed by the SIMILAR_USERS users whose
+  followings are the most like the user's (cosine similarity of rows of
+  ``A``), weighted by that similarity.
+
+Authors with more than POPULAR_FOLLOWERS followers are left out of the
+similarity: following them says little about a user and they would
+make every pair of users similar. Authors the user already follows are
+never suggested.
+
+Users are processed in blocks of consecutive rows, sized so that the
+intermediate products of a block stay around ``block_work`` entries:
+memory is bounded by the size of the graph plus one block, not by the
+number of users squared. Each block's top TOP_SUGGESTIONS per user
+replace the users' previous suggestions.
+"""
+from itertools import chain
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from scipy import sparse
+
+from .models import Follow, FollowSuggestion
+
+TOP_SUGGESTIONS = 20
+SIMILAR_USERS = 50
+POPULAR_FOLLOWERS = 1000
+BLOCK_WORK = 5_000_000
+# Also bounds the suggestions of a block held as model instances.
+MAX_BLOCK_ROWS = 10000
+READ_CHUNK_SIZE = 10000
+WRITE_BATCH_SIZE = 500
+
+
+def load_graph():
+    """The user ids of the matrix positions and the adjacency matrix."""
+    follows = Follow.objects.order_by().values_list('user_id', 'author_id')
+    edges = np.fromiter(
+        chain.from_iterable(follows.iterator(chunk_size=READ_CHUNK_SIZE)),
+        dtype=np.int64
+    )
+    ids, positions = np.unique(edges, return_inverse=True)
+    positions = positions.reshape(-1, 2).astype(np.int32)
+    adjacency = sparse.csr_matrix(
+        (np.ones(len(positions), dtype=np.float32),
+         (positions[:, 0], positions[:, 1])),
+        shape=(len(ids), len(ids))
+    )
+    # Duplicate follows were summed up.
+    adjacency.data[:] = 1
+    return ids, adjacency
+
+
+def top_per_row(matrix, size, offset=0):
+    """The ``size`` largest positive entries of each row of ``matrix``,
+    without the diagonal of the full matrix (``offset`` is the index of
+    the block's first row in it)."""
+    matrix = matrix.tocoo()
+    keep = (matrix.data > 0) & (matrix.col != matrix.row + offset)
+    rows, cols, data = matrix.row[keep], matrix.col[keep], matrix.data[keep]
+    # By row, best first, lower positions first on ties.
+    order = np.lexsort((cols, -data, rows))
+    rows = rows[order]
+    first = np.searchsorted(rows, rows)
+    order = order[np.arange(len(order)) - first < size]
+    return sparse.csr_matrix(
+        (data[order], (rows[order], cols[order])), shape=matrix.shape
+    )
+
+
+def blocks(work, budget, max_rows=MAX_BLOCK_ROWS):
+    """``(start, stop)`` ranges of at most ``max_rows`` rows whose
+    ``work`` adds up to about ``budget``; a row heavier than that is a
+    block of its own."""
+    ends = np.cumsum(work)
+    start = 0
+    while start < len(work):
+        done = ends[start - 1] if start else 0
+        stop = int(np.searchsorted(ends, done + budget, side='right'))
+        stop = min(max(stop, start + 1), start + max_rows)
+        yield start, stop
+        start = stop
+
+
+def suggest(adjacency, size=TOP_SUGGESTIONS, block_work=BLOCK_WORK):
+    """Yield ``(start, scores, mutual)`` per block of rows: ``scores`` has
+    the top ``size`` authors of each row and ``mutual`` the friends of
+    friends counts."""
+    followers = np.asarray(adjacency.sum(axis=0)).ravel()
+    following = np.asarray(adjacency.sum(axis=1)).ravel()
+    niche = adjacency @ sparse.diags(
+        (followers <= POPULAR_FOLLOWERS).astype(np.float32)
+    )
+    niche.eliminate_zeros()
+    lengths = np.sqrt(np.asarray(niche.sum(axis=1)).ravel())
+    normalized = sparse.diags(
+        np.divide(1, lengths, out=np.zeros_like(lengths), where=lengths > 0)
+    ) @ niche
+    normalized_t = normalized.T.tocsr()
+    # Upper bounds of the entries of a row's intermediate products.
+    work = (niche @ np.minimum(followers, POPULAR_FOLLOWERS)
+            + adjacency @ following + 1)
+    for start, stop in blocks(work, block_work):
+        rows = adjacency[start:stop]
+        mutual = rows @ adjacency
+        similar = top_per_row(
+            normalized[start:stop] @ normalized_t, SIMILAR_USERS, start
+        )
+        scores = mutual + similar @ adjacency
+        # Authors already followed.
+        scores = scores - scores.multiply(rows)
+        yield start, top_per_row(scores, size, start), mutual
+
+
+def store(ids, start, stop, scores, mutual, computed):
+    """Replace the suggestions of the users of rows ``start:stop``."""
+    scores = scores.tocoo()
+    counts = (
+        np.asarray(mutual[scores.row, scores.col]).ravel()
+        if scores.nnz else []
+    )
+    users = ids[scores.row + start].tolist()
+    authors = ids[scores.col].tolist()
+    with transaction.atomic():
+        # Ids are sorted: the users of the block are a range of ids.
+        FollowSuggestion.objects.filter(
+            user_id__gte=int(ids[start]), user_id__lte=int(ids[stop - 1])
+        ).delete()
+        FollowSuggestion.objects.bulk_create(
+            [
+                FollowSuggestion(user_id=user_id, author_id=author_id,
+                                 score=float(score), mutual=int(count),
+                                 computed=computed)
+                for user_id, author_id, score, count
+                in zip(users, authors, scores.data, counts)
+            ],
+            batch_size=WRITE_BATCH_SIZE
+        )
+
+
+def run(size=TOP_SUGGESTIONS, block_work=BLOCK_WORK, report=None):
+    """Recompute every user's suggestions; return the number of users."""
+    started = timezone.now()
+    ids, adjacency = load_graph()
+    for start, scores, mutual in suggest(adjacency, size, block_work):
+        stop = start + scores.shape[0]
+        store(ids, start, stop, scores, mutual, started)
+        if report:
+            report(stop, len(ids))
+    # Users who left the graph since the last run.
+    FollowSuggestion.objects.filter(computed__lt=started).delete()
+    return len(ids)
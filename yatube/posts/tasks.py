@@ -0,0 +1,31 @@
+from sorl.thumbnail import get_thumbnail
+
+from core.queue import task
+from . import unread
+from .models import Post
+from .utils import bump_feed_version
+
+# Thumbnails rendered by the feed and post templates.
+THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+
+@task
+def generate_thumbnails(post_id):
+    """Render the thumbnails of a post before anyone asks for them."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    for geometry, options in THUMBNAILS:
+        get_thumbnail(post.image, geometry, **options)
+
+
+@task
+def purge_feed_cache():
+    bump_feed_version()
+
+
+@task
+def count_unread(post_id):
+    unread.fan_out(post_id)
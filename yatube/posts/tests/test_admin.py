@@ -0,0 +1,77 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.paginator import EstimatedCountPaginator
+from ..models import Comment, Group, Post, User
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Test group', slug='test_slug', description='Test'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_rows(self, count):
+        Post.objects.bulk_create(
+            Post(author=self.admin, group=self.group, text=f'Post {i}')
+            for i in range(count)
+        )
+        post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(author=self.admin, post=post, text=f'Comment {i}')
+            for i in range(count)
+        )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Related objects of the changelist rows are loaded in bulk."""
+        for name in ('admin:posts_post_changelist',
+                     'admin:posts_comment_changelist'):
+            with self.subTest(name=name):
+                Post.objects.all().delete()
+                self.create_rows(2)
+                few = self.count_queries(reverse(name))
+                self.create_rows(20)
+                many = self.count_queries(reverse(name))
+                self.assertEqual(few, many)
+
+    def test_changelist_search_uses_full_text_index(self):
+        Post.objects.create(author=self.admin, text='Зимняя рыбалка')
+        Post.objects.create(author=self.admin, text='Летний отдых')
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'рыбалка'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def test_counts_exactly_below_threshold_and_estimates_above(self):
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(author=author, text=f'Post {i}') for i in range(5)
+        )
+        paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+        self.assertEqual(paginator.count, 5)
+        paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+        paginator.threshold = 3
+        self.assertGreaterEqual(paginator.count, 5)
+        filtered = EstimatedCountPaginator(
+            Post.objects.filter(author=author), 2
+        )
+        filtered.threshold = 3
+        self.assertEqual(filtered.count, 3)
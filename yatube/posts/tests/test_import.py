@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from ..models import Comment, Group, ImportCheckpoint, Post, User
+from ..search import get_backend
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+RECORDS = [
+    {'type': 'user', 'username': 'leo', 'first_name': 'Leo'},
+    {'type': 'user', 'username': 'ann'},
+    {'type': 'group', 'slug': 'cats', 'title': 'Cats'},
+    {'type': 'post', 'id': 'p1', 'author': 'leo', 'group': 'cats',
+     'text': 'Imported post', 'created': '2015-05-01T10:00:00',
+     'image': 'cat.gif'},
+    {'type': 'post', 'id': 'p2', 'author': 'ann', 'text': 'Second post'},
+    {'type': 'post', 'id': 'p3', 'author': 'ghost', 'text': 'No author'},
+    {'type': 'comment', 'post': 'p1', 'author': 'ann', 'text': 'Nice'},
+    {'type': 'comment', 'post': 'p2', 'author': 'leo', 'text': 'Thanks'},
+]
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR))
+class ImportContentTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.addCleanup(shutil.rmtree, settings.MEDIA_ROOT, True)
+        with open(os.path.join(self.directory, 'cat.gif'), 'wb') as image:
+            image.write(SMALL_GIF)
+        self.path = os.path.join(self.directory, 'content.jsonl')
+        self.write(RECORDS)
+
+    def write(self, records):
+        with open(self.path, 'w', encoding='utf-8') as source:
+            for record in records:
+                source.write(json.dumps(record) + '\n')
+
+    def run_import(self, *args):
+        call_command(
+            'import_content', self.path, '--batch-size', '2',
+            '--images', self.directory, '--workers', '0', *args,
+            stdout=open(os.devnull, 'w')
+        )
+
+    def test_import_resolves_relations(self):
+        self.run_import()
+        post = Post.objects.get(text='Imported post')
+        self.assertEqual(post.author.username, 'leo')
+        self.assertEqual(post.group, Group.objects.get(slug='cats'))
+        self.assertEqual(post.created.year, 2015)
+        self.assertTrue(post.image.name.startswith('posts/'))
+        self.assertEqual(Comment.objects.get(text='Nice').post, post)
+        self.assertFalse(Post.objects.filter(text='No author').exists())
+        self.assertEqual(get_backend().search(Post, 'imported')[0], [post])
+
+    def test_import_resumes_from_checkpoint(self):
+        self.write(RECORDS[:4])
+        self.run_import()
+        self.write(RECORDS)
+        self.run_import()
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(
+            ImportCheckpoint.objects.get().position, len(RECORDS)
+        )
+
+    def test_ids_of_deleted_posts_are_not_reused(self):
+        author = User.objects.create_user(username='leo')
+        deleted = Post.objects.create(author=author, text='Deleted')
+        Post.objects.filter(pk=deleted.pk).delete()
+        self.run_import()
+        self.assertGreater(
+            Post.objects.get(text='Imported post').pk, deleted.pk
+        )
+        self.assertFalse(Post.objects.filter(pk=deleted.pk).exists())
+
+    def test_existing_users_and_groups_are_not_counted(self):
+        User.objects.create_user(username='leo')
+        Group.objects.create(slug='cats', title='Cats')
+        self.write(RECORDS[:3])
+        out = StringIO()
+        call_command('import_content', self.path, stdout=out)
+        self.assertIn('Imported 1 records, skipped 2.', out.getvalue())
+
+    def test_indexes_restored_after_drop(self):
+        with connection.cursor() as cursor:
+            before = connection.introspection.get_constraints(
+                cursor, Post._meta.db_table
+            )
+        self.run_import('--drop-indexes')
+        with connection.cursor() as cursor:
+            after = connection.introspection.get_constraints(
+                cursor, Post._meta.db_table
+            )
+        self.assertEqual(set(before), set(after))
@@ -0,0 +1,103 @@
+import datetime
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import (
+    AuthorDailyStats, Comment, Group, GroupDailyStats, Post, User,
+)
+from ..utils import encode_cursor
+
+# "SCAN posts_post" without "USING ... INDEX" reads the whole table.
+FULL_SCAN_RE = re.compile(r'^SCAN (TABLE )?(?P<table>\w+)$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanTests(TestCase):
+    """The hot feed queries are answered from indexes.
+
+    Every SELECT a page runs against the posts tables is re-run under
+    EXPLAIN QUERY PLAN; a full table scan or a temporary sort fails the
+    test.
+    """
+    CHECKED_TABLES = ('posts_post', 'posts_comment',
+                      'posts_groupdailystats', 'posts_authordailystats')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Test group', slug='test_slug', description='Test'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Post {i}')
+            for i in range(30)
+        )
+        cls.post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(author=cls.author, post=cls.post, text=f'Comment {i}')
+            for i in range(30)
+        )
+
+    def assertPagePlansUseIndexes(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        checked = 0
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or not any(
+                table in sql for table in self.CHECKED_TABLES
+            ):
+                continue
+            checked += 1
+            for step in query_plan(sql):
+                with self.subTest(url=url, sql=sql, step=step):
+                    self.assertIsNone(FULL_SCAN_RE.match(step))
+                    self.assertNotIn(TEMP_SORT, step)
+        self.assertTrue(checked, f'{url} ran no feed queries')
+
+    def test_index_feed(self):
+        self.assertPagePlansUseIndexes(reverse('posts:index'))
+
+    def test_group_feed(self):
+        self.assertPagePlansUseIndexes(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        )
+
+    def test_profile_feed(self):
+        self.assertPagePlansUseIndexes(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+
+    def test_post_comments(self):
+        self.assertPagePlansUseIndexes(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        cursor = encode_cursor(Comment.objects.filter(post=self.post)[10])
+        self.assertPagePlansUseIndexes(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+            + f'?after={cursor}'
+        )
+
+    def test_stats(self):
+        # Something for the stats pages to read.
+        GroupDailyStats.objects.create(group=self.group,
+                                       day=datetime.date.today(), posts=1)
+        AuthorDailyStats.objects.create(author=self.author,
+                                        day=datetime.date.today(), posts=1)
+        self.assertPagePlansUseIndexes(
+            reverse('posts:group_stats', kwargs={'slug': self.group.slug})
+        )
+        self.assertPagePlansUseIndexes(
+            reverse('posts:profile_stats', kwargs={'username': 'author'})
+        )
@@ -0,0 +1,102 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.relations import resolve
+
+
+class ViewerRelationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user(username='viewer')
+        cls.followed = User.objects.create_user(username='followed')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.viewer, author=cls.followed)
+        cls.followed_post = Post.objects.create(
+            author=cls.followed, text='Пост', group=cls.group
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.other, text='Пост', group=cls.group
+        )
+        cls.own_post = Post.objects.create(
+            author=cls.viewer, text='Пост', group=cls.group
+        )
+        Comment.objects.create(post=cls.other_post, author=cls.viewer,
+                               text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_one_query_per_relationship(self):
+        posts = Post.objects.order_by('pk')
+        with self.assertNumQueries(3):
+            followed, other, own = resolve(self.viewer, posts=posts,
+                                           authors=[self.other])
+        self.assertEqual(
+            [(post.viewer_follows_author, post.viewer_commented,
+              post.viewer_is_author) for post in (followed, other, own)],
+            [(True, False, False), (False, True, False),
+             (False, False, True)]
+        )
+        self.assertFalse(self.other.viewer_follows)
+
+    def test_anonymous_viewer_needs_no_queries(self):
+        with self.assertNumQueries(0):
+            post, = resolve(AnonymousUser(), posts=[self.followed_post],
+                            authors=[self.followed])
+        self.assertFalse(post.viewer_follows_author)
+        self.assertFalse(self.followed.viewer_follows)
+
+    def group_page_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('posts:group_list', args=['group']))
+        return len(context)
+
+    def test_group_page_queries_do_not_grow_with_the_page(self):
+        self.client.force_login(self.viewer)
+        # The first view caches the unread count of the header.
+        self.group_page_queries()
+        few = self.group_page_queries()
+        Post.objects.bulk_create([
+            Post(author=self.other, text=f'Пост {number}', group=self.group)
+            for number in range(5)
+        ])
+        self.assertEqual(self.group_page_queries(), few)
+
+    def test_group_page_follow_buttons(self):
+        self.client.force_login(self.viewer)
+        response = self.client.get(reverse('posts:group_list',
+                                           args=['group']))
+        self.assertContains(response, reverse('posts:profile_unfollow',
+                                              args=['followed']))
+        self.assertContains(response, reverse('posts:profile_follow',
+                                              args=['other']))
+        self.assertNotContains(response, reverse('posts:profile_follow',
+                                                 args=['viewer']))
+        self.assertContains(response, 'Вы комментировали', count=1)
+
+    def test_profile_following_is_a_bool(self):
+        self.client.force_login(self.viewer)
+        response = self.client.get(reverse('posts:profile',
+                                           args=['followed']))
+        self.assertIs(response.context['following'], True)
+        response = self.client.get(reverse('posts:profile', args=['other']))
+        self.assertIs(response.context['following'], False)
+
+    def test_api_posts_carry_the_viewer_state(self):
+        self.client.force_login(self.viewer)
+        posts = {
+            post['id']: post
+            for post in self.client.get(reverse('api:posts-list')).json()
+        }
+        self.assertTrue(posts[self.followed_post.pk]['viewer_follows_author'])
+        self.assertTrue(posts[self.other_post.pk]['viewer_commented'])
+        detail = self.client.get(
+            reverse('api:posts-detail', args=[self.own_post.pk])
+        ).json()
+        self.assertFalse(detail['viewer_follows_author'])
@@ -0,0 +1,119 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import richtext
+from posts.models import Comment, Post, User
+
+
+class RenderTests(TestCase):
+    def render(self, text, users=()):
+        return richtext.render(text, set(users))
+
+    def test_links(self):
+        self.assertEqual(
+            self.render('Смотри https://example.com/a?b=1&c=2.'),
+            'Смотри <a href="https://example.com/a?b=1&amp;c=2" '
+            'rel="nofollow noopener" target="_blank">'
+            'https://example.com/a?b=1&amp;c=2</a>.'
+        )
+
+    def test_mentions_of_existing_users(self):
+        self.assertEqual(
+            self.render('@leo, @nobody и mail@leo', users=['leo']),
+            '<a href="/profile/leo/" class="mention">@leo</a>, @nobody '
+            'и mail@leo'
+        )
+
+    def test_hashtags(self):
+        self.assertEqual(
+            self.render('#книги'),
+            '<a href="/search/?q=%23%D0%BA%D0%BD%D0%B8%D0%B3%D0%B8" '
+            'class="hashtag">#книги</a>'
+        )
+
+    def test_everything_else_is_escaped(self):
+        self.assertEqual(
+            self.render('<script>alert(1)</script>\n"x" & y'),
+            '&lt;script&gt;alert(1)&lt;/script&gt;<br>'
+            '&quot;x&quot; &amp; y'
+        )
+
+
+class StoredRichTextTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='leo')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_forms_store_the_html(self):
+        self.client.post(reverse('posts:post_create'),
+                         {'text': 'Пост для @leo #тег'})
+        post = Post.objects.get()
+        self.assertEqual(post.text_html_version, richtext.VERSION)
+        self.assertIn('class="mention"', post.text_html)
+        self.client.post(reverse('posts:add_comment', args=[post.pk]),
+                         {'text': 'https://example.com'})
+        self.assertIn('<a href="https://example.com"',
+                      Comment.objects.get().text_html)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'class="hashtag"')
+
+    def test_api_stores_the_html(self):
+        response = self.client.post(reverse('api:posts-list'),
+                                    {'text': 'Привет, @leo'})
+        self.assertIn('class="mention"', response.json()['text_html'])
+        self.assertEqual(Post.objects.get().text_html_version,
+                         richtext.VERSION)
+
+    def test_any_save_of_the_text_renders_it(self):
+        post = Post.objects.create(author=self.user, text='Первый')
+        post.text = 'Второй #тег'
+        post.save(update_fields=['text'])
+        self.assertIn('class="hashtag"', Post.objects.get().text_html)
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='secret'
+        )
+        self.client.force_login(admin)
+        self.client.post(
+            reverse('admin:posts_post_change', args=[post.pk]),
+            {'text': 'Из админки @leo', 'author': self.user.pk, 'group': ''}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Из админки @leo')
+        self.assertIn('class="mention"', post.text_html)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertContains(response, 'Из админки')
+
+    def test_rows_not_rendered_yet_show_escaped_text(self):
+        post, = Post.objects.bulk_create(
+            [Post(author=self.user, text='<b>@leo</b>')]
+        )
+        self.assertEqual(richtext.richtext(post),
+                         '&lt;b&gt;@leo&lt;/b&gt;')
+
+    def test_rerender_upgrades_old_rows(self):
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Пост {number} для @leo')
+            for number in range(5)
+        ])
+        post = Post.objects.first()
+        Comment.objects.create(post=post, author=self.user, text='#тег')
+        Post.objects.filter(pk=post.pk).update(
+            text_html='old', text_html_version=richtext.VERSION
+        )
+        call_command('rerender_text', '--batch-size', '2',
+                     stdout=StringIO())
+        self.assertFalse(
+            Post.objects.filter(text_html_version=0).exists()
+        )
+        self.assertEqual(Post.objects.get(pk=post.pk).text_html, 'old')
+        self.assertIn('class="hashtag"', Comment.objects.get().text_html)
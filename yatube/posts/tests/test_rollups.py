@@ -0,0 +1,211 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import (
+    AuthorDailyStats, Comment, Follow, Group, GroupDailyStats, Post, User,
+)
+
+DAY = datetime.timedelta(days=1)
+
+
+def stats(model, **key):
+    return {
+        row.pop('day'): row
+        for row in model.objects.filter(**key).values(
+            'day', 'posts', 'comments'
+        )
+    }
+
+
+class RollupSignalsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+
+    def test_posts_and_comments_are_counted(self):
+        post = Post.objects.create(author=self.author, group=self.group,
+                                   text='Пост')
+        Post.objects.create(author=self.author, text='Без группы')
+        Comment.objects.create(author=self.reader, post=post, text='Да')
+        today = timezone.localdate()
+        self.assertEqual(stats(GroupDailyStats, group=self.group),
+                         {today: {'posts': 1, 'comments': 1}})
+        self.assertEqual(stats(AuthorDailyStats, author=self.author),
+                         {today: {'posts': 2, 'comments': 0}})
+        self.assertEqual(stats(AuthorDailyStats, author=self.reader),
+                         {today: {'posts': 0, 'comments': 1}})
+
+    def test_deleted_posts_are_taken_back_with_their_comments(self):
+        post = Post.objects.create(author=self.author, group=self.group,
+                                   text='Пост')
+        Comment.objects.create(author=self.reader, post=post, text='Да')
+        Post.objects.filter(pk=post.pk).delete()
+        today = timezone.localdate()
+        self.assertEqual(stats(GroupDailyStats, group=self.group),
+                         {today: {'posts': 0, 'comments': 0}})
+        self.assertEqual(stats(AuthorDailyStats, author=self.reader),
+                         {today: {'posts': 0, 'comments': 0}})
+
+    def test_edited_post_moves_to_its_new_group(self):
+        post = Post.objects.create(author=self.author, group=self.group,
+                                   text='Пост')
+        Comment.objects.create(author=self.reader, post=post, text='Да')
+        post.group = self.other_group
+        post.save()
+        post.text = 'Исправлен'
+        post.save()
+        today = timezone.localdate()
+        self.assertEqual(stats(GroupDailyStats, group=self.group),
+                         {today: {'posts': 0, 'comments': 0}})
+        self.assertEqual(stats(GroupDailyStats, group=self.other_group),
+                         {today: {'posts': 1, 'comments': 1}})
+
+    def test_follower_changes_are_counted(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.filter(user=self.reader).delete()
+        Follow.objects.create(user=self.reader, author=self.author)
+        row = AuthorDailyStats.objects.get(author=self.author)
+        self.assertEqual((row.followers_gained, row.followers_lost), (2, 1))
+
+
+class RollupRebuildTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.today = timezone.localdate()
+        # Bulk-created rows send no signals, like an import.
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(3)
+        )
+        posts = list(Post.objects.order_by('pk'))
+        Post.objects.filter(pk=posts[0].pk).update(
+            created=timezone.now() - 40 * DAY
+        )
+        Comment.objects.bulk_create(
+            Comment(author=cls.author, post=posts[1], text=f'Да {number}')
+            for number in range(2)
+        )
+
+    def test_rebuild_counts_from_the_tables(self):
+        AuthorDailyStats.objects.create(
+            author=self.author, day=self.today, posts=7, followers_gained=3
+        )
+        GroupDailyStats.objects.create(
+            group=self.group, day=self.today - 5 * DAY, posts=1
+        )
+        out = StringIO()
+        call_command('rollup_stats', '--chunk-days', '7', stdout=out)
+        self.assertIn('41 days recounted', out.getvalue())
+        self.assertEqual(stats(GroupDailyStats, group=self.group), {
+            self.today - 40 * DAY: {'posts': 1, 'comments': 0},
+            self.today: {'posts': 2, 'comments': 2},
+        })
+        row = AuthorDailyStats.objects.get(author=self.author,
+                                           day=self.today)
+        self.assertEqual((row.posts, row.comments, row.followers_gained),
+                         (2, 2, 3))
+
+    def test_rebuild_of_a_range_keeps_other_days(self):
+        since = (self.today - DAY).isoformat()
+        call_command('rollup_stats', '--since', since, stdout=StringIO())
+        self.assertEqual(list(stats(GroupDailyStats, group=self.group)),
+                         [self.today])
+
+    def test_signals_and_rebuild_agree(self):
+        call_command('rollup_stats', stdout=StringIO())
+        Comment.objects.create(author=self.author,
+                               post=Post.objects.first(), text='Ещё')
+        Post.objects.filter(pk=Post.objects.last().pk).delete()
+        maintained = stats(GroupDailyStats), stats(AuthorDailyStats)
+        call_command('rollup_stats', stdout=StringIO())
+        self.assertEqual((stats(GroupDailyStats), stats(AuthorDailyStats)),
+                         maintained)
+
+
+class StatsViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.today = timezone.localdate()
+        for days_ago, posts, comments in ((0, 2, 5), (3, 1, 0), (60, 4, 4)):
+            GroupDailyStats.objects.create(
+                group=cls.group, day=cls.today - days_ago * DAY,
+                posts=posts, comments=comments
+            )
+        AuthorDailyStats.objects.create(
+            author=cls.author, day=cls.today, posts=2, followers_gained=1
+        )
+
+    def test_group_page_shows_the_last_days_by_default(self):
+        response = self.client.get(
+            reverse('posts:group_stats', args=[self.group.slug])
+        )
+        self.assertEqual(response.context['totals'], [3, 5])
+        self.assertEqual(len(response.context['days']), 2)
+
+    def test_profile_page(self):
+        response = self.client.get(
+            reverse('posts:profile_stats', args=[self.author.username])
+        )
+        self.assertEqual(response.context['totals'], [2, 0, 1, 0])
+        self.assertContains(response, 'Новые подписчики')
+
+    def test_pages_link_to_the_stats(self):
+        for url, stats_url in (
+            (reverse('posts:group_list', args=[self.group.slug]),
+             reverse('posts:group_stats', args=[self.group.slug])),
+            (reverse('posts:profile', args=[self.author.username]),
+             reverse('posts:profile_stats', args=[self.author.username])),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), stats_url)
+
+    def test_reversed_range_is_an_error(self):
+        response = self.client.get(
+            reverse('posts:group_stats', args=[self.group.slug]),
+            {'since': self.today.isoformat(),
+             'until': (self.today - DAY).isoformat()}
+        )
+        self.assertContains(response, 'Начало периода позже его конца.')
+        self.assertEqual(response.context['days'], [])
+
+    def test_api_range(self):
+        since = self.today - 90 * DAY
+        response = self.client.get(
+            reverse('api:stats-group', args=[self.group.slug]),
+            {'since': since.isoformat(), 'until': self.today.isoformat()}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['since'], since.isoformat())
+        self.assertEqual(data['totals'], {'posts': 7, 'comments': 9})
+        self.assertEqual(
+            [day['day'] for day in data['days']],
+            [(self.today - days_ago * DAY).isoformat()
+             for days_ago in (60, 3, 0)]
+        )
+        response = self.client.get(
+            reverse('api:stats-author', args=[self.author.username])
+        )
+        self.assertEqual(response.json()['totals']['followers_gained'], 1)
+
+    def test_api_errors(self):
+        response = self.client.get(
+            reverse('api:stats-group', args=[self.group.slug]),
+            {'since': '2020-01-01', 'until': '2024-01-01'}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('api:stats-group',
+                                           args=['missing']))
+        self.assertEqual(response.status_code, 404)
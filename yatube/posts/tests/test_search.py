@@ -0,0 +1,85 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..search import LikeSearchBackend, SQLiteFTS5Backend, get_backend
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            author=cls.user, text='Рыбалка на озере в тумане'
+        )
+        cls.comment = Comment.objects.create(
+            author=cls.user, post=cls.post, text='Отличный улов'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.backend = get_backend()
+
+    def test_sqlite_uses_fts5_backend(self):
+        self.assertIsInstance(self.backend, SQLiteFTS5Backend)
+
+    def test_index_follows_save_and_delete(self):
+        """The index is updated when a post is edited or deleted."""
+        post = Post.objects.create(author=self.user, text='Поход в горы')
+        self.assertEqual(self.backend.search(Post, 'поход')[0], [post])
+        post.text = 'Охота в лесу'
+        post.save()
+        self.assertEqual(self.backend.search(Post, 'поход')[0], [])
+        self.assertEqual(self.backend.search(Post, 'охота')[0], [post])
+        post.delete()
+        self.assertEqual(self.backend.search(Post, 'охота')[0], [])
+
+    def test_comments_are_searchable(self):
+        results, _ = self.backend.search(Comment, 'улов')
+        self.assertEqual(results, [self.comment])
+
+    def test_keyset_pages_do_not_overlap(self):
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Рыбалка номер {i}')
+            for i in range(5)
+        )
+        self.backend.rebuild(Post)
+        first, cursor = self.backend.search(Post, 'рыбалка', size=4)
+        second, last_cursor = self.backend.search(
+            Post, 'рыбалка', cursor, size=4
+        )
+        self.assertEqual(len(first) + len(second), 6)
+        self.assertFalse(set(first) & set(second))
+        self.assertIsNone(last_cursor)
+
+    def test_search_view_highlights_escaped_snippet(self):
+        Post.objects.create(author=self.user, text='<b>Рыбалка</b> зимой')
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'зимой'}
+        )
+        self.assertContains(response, '<mark>зимой</mark>')
+        self.assertContains(response, '&lt;b&gt;Рыбалка&lt;/b&gt;')
+
+    def test_query_syntax_is_not_passed_to_fts(self):
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': '"рыбалка (*:'}
+        )
+        self.assertEqual(response.context['results'], [self.post])
+
+    @skipUnless(settings.SERVE_API, 'the API is off for YATUBE_ROLE=web')
+    def test_api_search(self):
+        response = self.guest_client.get(
+            '/api/v1/posts/', {'search': 'озере'}
+        )
+        results = response.json()['results']
+        self.assertEqual([post['id'] for post in results], [self.post.pk])
+        self.assertIn('<mark>озере</mark>', results[0]['snippet'])
+
+    def test_like_backend_matches_fts_results(self):
+        self.assertEqual(
+            LikeSearchBackend().search(Post, 'тумане')[0], [self.post]
+        )
@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, User
+from posts.stream import ChangeLog, StreamServer
+
+
+class InlineStreamServer(StreamServer):
+    # Queries stay in the test's thread and transaction.
+    async def call(self, func, *args):
+        return func(*args)
+
+
+@override_settings(STREAM_URL='/stream/')
+class StreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def stream(self, query, new_posts=(), headers=''):
+        """Status line and the events received after ``new_posts``."""
+        async def scenario():
+            server = InlineStreamServer(ChangeLog())
+            server.log.append([(1, self.other.pk, None)])
+            listener = await asyncio.start_server(
+                server.handle, '127.0.0.1', 0
+            )
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(
+                f'GET {settings.STREAM_URL}?{query} HTTP/1.1\r\n'
+                f'Host: localhost\r\n{headers}\r\n'.encode()
+            )
+            head = (await reader.readuntil(b'\r\n\r\n')).decode()
+            events = []
+            if head.startswith('HTTP/1.1 200'):
+                await reader.readuntil(b'\n\n')  # retry
+                events.append((await reader.readuntil(b'\n\n')).decode())
+                if new_posts:
+                    server.log.append(list(new_posts))
+                    events.append(
+                        (await reader.readuntil(b'\n\n')).decode()
+                    )
+            writer.close()
+            listener.close()
+            while server.connections:
+                await asyncio.sleep(0.01)
+            return head.split('\r\n')[0], events
+
+        return asyncio.run(scenario())
+
+    def test_group_feed_gets_posts_of_the_group(self):
+        status, events = self.stream('feed=group&slug=group', [
+            (2, self.author.pk, self.group.pk),
+            (3, self.author.pk, None),
+            (4, self.other.pk, self.group.pk),
+        ])
+        self.assertEqual(status, 'HTTP/1.1 200 OK')
+        keepalive, event = events
+        self.assertEqual(keepalive, ': keepalive\n\n')
+        self.assertIn('id: 4\nevent: posts\n', event)
+        data = json.loads(event.split('data: ')[1])
+        self.assertEqual(data, {'new': 2, 'ids': [2, 4]})
+
+    def test_follow_feed_needs_a_session(self):
+        status, _ = self.stream('feed=follow')
+        self.assertEqual(status, 'HTTP/1.1 403 Forbidden')
+        self.client.force_login(self.reader)
+        cookie = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        _, events = self.stream('feed=follow', [
+            (2, self.other.pk, None), (3, self.author.pk, None),
+        ], f'Cookie: {settings.SESSION_COOKIE_NAME}={cookie}\r\n')
+        self.assertIn('"ids":[3]', events[1])
+
+    def test_reconnect_replays_missed_posts(self):
+        _, events = self.stream('feed=index', headers='Last-Event-ID: 0\r\n')
+        self.assertIn('"ids":[1]', events[0])
+
+    def test_unknown_group_is_refused(self):
+        status, _ = self.stream('feed=group&slug=missing')
+        self.assertEqual(status, 'HTTP/1.1 403 Forbidden')
+
+    def test_pages_open_the_stream_only_when_it_is_set(self):
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.assertContains(self.client.get(url),
+                            'data-stream="/stream/?feed=group&amp;slug=group"')
+        with override_settings(STREAM_URL=''):
+            self.assertNotContains(self.client.get(url), 'data-stream')
@@ -0,0 +1,91 @@
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from scipy import sparse
+
+from posts import suggestions
+from posts.models import Follow, FollowSuggestion, User
+
+
+class SuggestionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('me', 'b', 'c', 'd', 'e', 'f', 'twin')
+        }
+        for user, authors in {
+            'me': 'bc',
+            'b': 'd',
+            'c': 'de',
+            'd': ('me',),
+            'twin': 'bcf',
+        }.items():
+            for author in authors:
+                Follow.objects.create(user=cls.users[user],
+                                      author=cls.users[author])
+
+    def suggested(self, name):
+        return [
+            (suggestion.author.username, suggestion.mutual)
+            for suggestion in FollowSuggestion.objects.filter(
+                user=self.users[name]
+            ).select_related('author')
+        ]
+
+    def test_friends_of_friends_and_co_follows(self):
+        suggestions.run()
+        self.assertEqual(self.suggested('me'), [('d', 2), ('e', 1), ('f', 0)])
+        # Already followed and the user themselves are left out.
+        self.assertEqual(self.suggested('d'), [('b', 1), ('c', 1)])
+
+    def test_small_blocks_give_the_same_suggestions(self):
+        suggestions.run()
+        whole = list(FollowSuggestion.objects.values_list(
+            'user', 'author', 'score', 'mutual'
+        ))
+        suggestions.run(block_work=1)
+        self.assertEqual(
+            list(FollowSuggestion.objects.values_list(
+                'user', 'author', 'score', 'mutual'
+            )),
+            whole
+        )
+
+    def test_users_who_left_the_graph_lose_their_suggestions(self):
+        suggestions.run()
+        Follow.objects.filter(user=self.users['twin']).delete()
+        call_command('suggest_follows', stdout=StringIO())
+        self.assertEqual(self.suggested('twin'), [])
+
+    def test_top_per_row(self):
+        matrix = sparse.csr_matrix(np.array([
+            [5, 1, 3, 0],
+            [2, 9, 2, 4],
+        ], dtype=np.float32))
+        top = suggestions.top_per_row(matrix, 2, offset=0)
+        self.assertEqual(top.toarray().tolist(),
+                         [[0, 1, 3, 0], [2, 0, 0, 4]])
+
+    def test_profile_shows_suggestions_to_its_owner(self):
+        suggestions.run()
+        self.client.force_login(self.users['me'])
+        response = self.client.get(
+            reverse('posts:profile', args=['me'])
+        )
+        self.assertEqual(
+            [item.author for item in response.context['suggestions']],
+            [self.users['d'], self.users['e'], self.users['f']]
+        )
+        response = self.client.get(reverse('posts:profile', args=['b']))
+        self.assertNotIn('suggestions', response.context)
+
+    def test_api(self):
+        suggestions.run()
+        self.client.force_login(self.users['me'])
+        response = self.client.get(reverse('api:follow-suggestions'))
+        self.assertEqual(response.json()[0]['author'], 'd')
+        self.assertEqual(response.json()[0]['mutual'], 2)
@@ -0,0 +1,77 @@
+import re
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class JinjaFeedTemplatesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='<b>Описание</b>'
+        )
+        for number in range(12):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}',
+                image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                         content_type='image/gif'),
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def render(self, engine, url):
+        cache.clear()
+        with override_settings(FEED_TEMPLATE_ENGINE=engine):
+            response = self.client.get(url)
+        return re.sub(r'\s+', '', response.content.decode())
+
+    maxDiff = None
+
+    def test_jinja2_pages_match_django_pages(self):
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:follow_index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        ):
+            with self.subTest(url=url):
+                jinja2_page = self.render('jinja2', url)
+                self.assertIn('card-img', jinja2_page)
+                self.assertEqual(jinja2_page, self.render('django', url))
+
+    def test_fragment_cache(self):
+        cache.clear()
+        with override_settings(FEED_TEMPLATE_ENGINE='jinja2'):
+            self.client.get(reverse('posts:index'))
+            Post.objects.filter(text='Пост 11').update(text='Изменён')
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пост 11')
@@ -0,0 +1,100 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import trending
+from posts.models import Comment, Group, Post, TrendingScore, User
+
+HOUR = 3600
+PERIOD = 16 * HOUR
+
+
+def worth(kind, object_id, now):
+    """The decayed value of a score at ``now``."""
+    row = TrendingScore.objects.get(kind=kind, object_id=object_id)
+    period, scale = trending.period_of(now)
+    if row.period == period - 1:
+        scale *= 2 ** trending.PERIOD_HALF_LIVES
+    return row.score / scale
+
+
+@override_settings(TRENDING_HALF_LIFE=HOUR)
+class TrendingScoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_scores_decay_with_the_half_life(self):
+        now = 10 * PERIOD + 5 * HOUR
+        trending.add('post', 1, 4, now=now - 2 * HOUR)
+        trending.add('post', 2, 2, now=now)
+        self.assertAlmostEqual(worth('post', 1, now), 1)
+        self.assertAlmostEqual(worth('post', 2, now), 2)
+        self.assertEqual(trending.refresh(now)['posts'], [2, 1])
+
+    def test_events_across_periods_add_up(self):
+        start = 10 * PERIOD + 15 * HOUR
+        trending.add('post', 1, 8, now=start)
+        trending.add('post', 1, 1, now=start + 2 * HOUR)
+        self.assertAlmostEqual(worth('post', 1, start + 2 * HOUR), 3)
+
+    def test_compact_rescales_and_deletes_decayed_scores(self):
+        start = 10 * PERIOD + 15 * HOUR
+        trending.add('post', 1, 8, now=start)
+        trending.add('post', 2, 1, now=start - 10 * HOUR)
+        now = start + 3 * HOUR
+        self.assertEqual(trending.compact(now), 1)
+        row = TrendingScore.objects.get()
+        self.assertEqual(row.period, 11)
+        self.assertAlmostEqual(worth('post', 1, now), 1)
+
+    def test_scores_of_older_periods_count_as_zero(self):
+        trending.add('post', 1, 1, now=10 * PERIOD)
+        self.assertEqual(trending.refresh(12 * PERIOD)['posts'], [])
+
+
+class TrendingViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        cls.quiet = Post.objects.create(author=cls.author, text='Тихий',
+                                        group=cls.other_group)
+        cls.busy = Post.objects.create(author=cls.author, text='Активный',
+                                       group=cls.group)
+        for number in range(3):
+            Comment.objects.create(post=cls.busy, author=cls.author,
+                                   text=f'Комментарий {number}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_activity_ranks_posts_and_groups(self):
+        board = trending.leaderboard()
+        self.assertEqual(board['posts'], [self.busy.pk, self.quiet.pk])
+        self.assertEqual(board['groups'],
+                         [self.group.pk, self.other_group.pk])
+
+    def test_leaderboard_is_served_from_the_cache(self):
+        trending.leaderboard()
+        with self.assertNumQueries(0):
+            trending.leaderboard()
+
+    def test_trending_page(self):
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(list(response.context['posts']),
+                         [self.busy, self.quiet])
+        self.assertEqual(list(response.context['groups']),
+                         [self.group, self.other_group])
+
+    def test_deleted_posts_leave_the_leaderboard(self):
+        Post.objects.filter(pk=self.busy.pk).delete()
+        self.assertEqual(trending.leaderboard()['posts'], [self.quiet.pk])
+
+    def test_api(self):
+        response = self.client.get(reverse('api:posts-trending'))
+        self.assertEqual(
+            [post['id'] for post in response.json()['posts']],
+            [self.busy.pk, self.quiet.pk]
+        )
+        self.assertEqual(response.json()['groups'][0]['slug'], 'group')
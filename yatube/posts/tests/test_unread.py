@@ -0,0 +1,77 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import FeedMarker, Follow, Post, User
+from posts.unread import cache_key
+
+
+class UnreadBadgeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def publish(self, author, count=1):
+        for number in range(count):
+            Post.objects.create(author=author, text=f'Пост {number}')
+        call_command('run_tasks', '--once', '--workers', '0',
+                     stdout=StringIO())
+
+    def unread(self):
+        return self.client.get(reverse('api:follow-unread')).json()['unread']
+
+    def test_new_posts_of_followed_authors_are_counted(self):
+        self.publish(self.author, 3)
+        self.publish(self.other)
+        self.assertEqual(self.unread(), 3)
+        self.assertEqual(FeedMarker.objects.get(user=self.reader).unread, 3)
+        self.assertFalse(FeedMarker.objects.filter(user=self.other).exists())
+
+    def test_badge_is_in_the_header(self):
+        self.publish(self.author, 2)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response,
+                            '<span class="badge bg-danger">2</span>')
+
+    def test_follow_index_resets_the_count(self):
+        self.publish(self.author, 2)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertNotContains(response, 'badge bg-danger')
+        self.assertEqual(self.unread(), 0)
+        marker = FeedMarker.objects.get(user=self.reader)
+        self.assertEqual(marker.unread, 0)
+        self.assertIsNotNone(marker.last_seen)
+        self.publish(self.author)
+        self.assertEqual(self.unread(), 1)
+
+    def test_api_post_marks_posts_seen(self):
+        self.publish(self.author)
+        response = self.client.post(reverse('api:follow-unread'))
+        self.assertEqual(response.json(), {'unread': 0})
+        self.assertEqual(FeedMarker.objects.get(user=self.reader).unread, 0)
+
+    def test_page_view_reads_one_cache_key(self):
+        self.publish(self.author)
+        backend = caches['default']
+        with mock.patch.object(backend, 'get', wraps=backend.get) as get:
+            self.client.get(reverse('posts:follow_index'))
+        keys = [call.args[0] for call in get.call_args_list]
+        self.assertEqual(keys.count(cache_key(self.reader.pk)), 1)
+
+    def test_cached_count_is_served_without_queries(self):
+        self.publish(self.author)
+        self.unread()
+        with self.assertNumQueries(0):
+            self.assertEqual(cache.get(cache_key(self.reader.pk)), 1)
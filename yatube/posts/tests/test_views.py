@@ -2,6 +2,7 @@ import tempfile
 
 from django.test import Client, TestCase
 from django.urls import reverse
+from posts import views
 from posts.models import Post, Group, User, Comment, Follow
 from django import forms
 from django.conf import settings
@@ -278,6 +279,32 @@ class FollowTests(TestCase):
         self.assertNotContains(response,
                                'Test post for the feed')
 
+    def test_follow_api(self):
+        """Following through the API."""
+        url = reverse('api:follow-list')
+        response = self.client_auth_follower.post(
+            url, {'following': self.user_following.username}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {
+            'user': 'follower', 'following': 'following',
+        })
+        self.assertTrue(
+            Follow.objects.filter(user=self.user_follower,
+                                  author=self.user_following).exists()
+        )
+        response = self.client_auth_follower.get(url, {'search': 'follow'})
+        self.assertEqual(response.json(), [{
+            'user': 'follower', 'following': 'following',
+        }])
+        for username in ('following', 'follower'):
+            with self.subTest(username=username):
+                response = self.client_auth_follower.post(
+                    url, {'following': username}
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(Follow.objects.count(), 1)
+
 
 class PaginatorViewsTest(TestCase):
     TOTAL_POSTS = 13
@@ -336,3 +363,51 @@ class PaginatorViewsTest(TestCase):
                 len(response.context.get('page_obj').object_list),
                 self.SECOND_PAGE_POSTS
             )
+
+
+class CommentPaginationTests(TestCase):
+    TOTAL_COMMENTS = 25
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Test post')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Comment {i}')
+            for i in range(cls.TOTAL_COMMENTS)
+        )
+
+    def test_post_detail_shows_first_page_of_comments(self):
+        """post_detail renders a bounded first page of comments."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertEqual(
+            len(response.context['comments']), views.COMMENTS_COUNT
+        )
+        self.assertIsNotNone(response.context['comments_cursor'])
+
+    def test_load_more_returns_remaining_comments(self):
+        """The fragment endpoint continues after the cursor."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        first_page = response.context['comments']
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'after': response.context['comments_cursor']}
+        )
+        second_page = response.context['comments']
+        self.assertTemplateUsed(response, 'includes/comments_list.html')
+        self.assertEqual(
+            len(first_page) + len(second_page), self.TOTAL_COMMENTS
+        )
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertIsNone(response.context['comments_cursor'])
+
+    def test_comment_authors_loaded_in_bulk(self):
+        """Comment authors do not cost a query per comment."""
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        with self.assertNumQueries(1):
+            self.client.get(url)
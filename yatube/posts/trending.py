@@ -0,0 +1,143 @@
+"""Trending posts and groups.
+
+New posts and comments add to the scores of their post and group. An
+event of weight ``w`` at time ``t`` is worth ``w * 2 ** (-(now - t) /
+TRENDING_HALF_LIFE)`` now. Rescaling every score as time passes isn't
+needed to rank them: a row stores its events scaled up to the time they
+happened, ``w * 2 ** ((t - base) / half_life)``, which all decay at the
+same rate, so the order of the rows doesn't change with time.
+
+To keep the numbers small, ``base`` moves forward every period of
+PERIOD_HALF_LIVES half-lives. A row of the previous period is rescaled
+by the next event or ``compact_trending``, which also deletes the rows
+that decayed to nothing. What's left of older periods is below
+``2 ** -PERIOD_HALF_LIVES`` of their weight and counts as zero.
+
+``leaderboard()`` returns the top ids from one cache key; the lists are
+rebuilt from the table when the key expires, every TRENDING_REFRESH
+seconds.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, FloatField, Value, When
+
+from .models import TrendingScore
+
+KEY = 'posts:trending'
+POST_WEIGHT = 1
+COMMENT_WEIGHT = 2
+PERIOD_HALF_LIVES = 16
+# Rows worth less than this are deleted by compact().
+MIN_SCORE = 0.01
+
+
+def half_life():
+    return getattr(settings, 'TRENDING_HALF_LIFE', 6 * 3600)
+
+
+def period_of(now):
+    """The period of ``now`` and the scale of an event at that time."""
+    length = half_life() * PERIOD_HALF_LIVES
+    period = int(now // length)
+    return period, 2 ** ((now - period * length) / half_life())
+
+
+def current_score(period):
+    """A row's score rescaled to ``period``."""
+    return Case(
+        When(period=period, then=F('score')),
+        When(period=period - 1,
+             then=F('score') * Value(2.0 ** -PERIOD_HALF_LIVES)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def add(kind, object_id, weight, now=None):
+    period, scale = period_of(time.time() if now is None else now)
+    scores = TrendingScore.objects.filter(kind=kind, object_id=object_id)
+    increment = Value(weight * scale, output_field=FloatField())
+    if scores.update(score=current_score(period) + increment, period=period):
+        return
+    try:
+        with transaction.atomic():
+            TrendingScore.objects.create(
+                kind=kind, object_id=object_id,
+                score=weight * scale, period=period
+            )
+    except IntegrityError:
+        # Created by a concurrent event in between.
+        scores.update(score=current_score(period) + increment, period=period)
+
+
+def record_post(post, now=None):
+    add(TrendingScore.POST, post.pk, POST_WEIGHT, now)
+    if post.group_id:
+        add(TrendingScore.GROUP, post.group_id, POST_WEIGHT, now)
+
+
+def record_comment(comment, now=None):
+    add(TrendingScore.POST, comment.post_id, COMMENT_WEIGHT, now)
+    group_id = comment.post.group_id
+    if group_id:
+        add(TrendingScore.GROUP, group_id, COMMENT_WEIGHT, now)
+
+
+def remove(kind, object_id):
+    TrendingScore.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rank(kind, period, size):
+    return list(
+        TrendingScore.objects.filter(kind=kind)
+        .annotate(current=current_score(period))
+        .filter(current__gt=0)
+        .order_by('-current', '-object_id')
+        .values_list('object_id', flat=True)[:size]
+    )
+
+
+def refresh(now=None):
+    """Rebuild and cache the top post and group ids."""
+    period, _ = period_of(time.time() if now is None else now)
+    size = getattr(settings, 'TRENDING_SIZE', 10)
+    board = {
+        'posts': rank(TrendingScore.POST, period, size),
+        'groups': rank(TrendingScore.GROUP, period, size),
+    }
+    cache.set(KEY, board, getattr(settings, 'TRENDING_REFRESH', 60))
+    return board
+
+
+def leaderboard():
+    """``{'posts': [id, ...], 'groups': [id, ...]}``, best first."""
+    board = cache.get(KEY)
+    if board is None:
+        board = refresh()
+    return board
+
+
+def in_order(queryset, ids):
+    """The objects of ``queryset`` with ``ids``, in that order; deleted
+    ones are skipped."""
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def compact(now=None):
+    """Move every row to the current period and delete the ones that
+    decayed below MIN_SCORE; return the number deleted."""
+    now = time.time() if now is None else now
+    period, scale = period_of(now)
+    with transaction.atomic():
+        TrendingScore.objects.exclude(period=period).update(
+            score=current_score(period), period=period
+        )
+        deleted, _ = TrendingScore.objects.filter(
+            score__lt=MIN_SCORE * scale
+        ).delete()
+    refresh(now)
+    return deleted
@@ -0,0 +1,80 @@
+"""Unread posts badge of the followed-authors feed.
+
+``FeedMarker`` holds the number of posts the followed authors published
+since the user last opened ``follow_index``. A new post adds one to the
+markers of its author's followers in the ``count_unread`` task, a single
+UPDATE per chunk of followers, instead of every page counting the feed;
+opening the feed resets the marker. Counts are cached per user, so a
+page view reads one cache key, and the database only after a new post
+dropped the key.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import FeedMarker, Follow, Post
+
+KEY = 'posts:unread:{}'
+CHUNK_SIZE = 500
+
+
+def cache_key(user_id):
+    return KEY.format(user_id)
+
+
+def get_count(user):
+    if not user.is_authenticated:
+        return 0
+    key = cache_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = FeedMarker.objects.filter(user=user).values_list(
+            'unread', flat=True
+        ).first() or 0
+        cache.set(key, count, None)
+    return count
+
+
+def unread_count(request):
+    """Unread posts of the request user, looked up once per request."""
+    if not hasattr(request, '_unread_posts'):
+        request._unread_posts = get_count(request.user)
+    return request._unread_posts
+
+
+def mark_seen(request):
+    """Reset the marker of the request user, who is reading the feed."""
+    if not unread_count(request):
+        return
+    # The key is set before the row: a fan-out in between deletes it
+    # again, so the cache never keeps a zero the database doesn't have.
+    cache.set(cache_key(request.user.pk), 0, None)
+    FeedMarker.objects.filter(user=request.user).update(
+        unread=0, last_seen=timezone.now()
+    )
+    request._unread_posts = 0
+
+
+def fan_out(post_id):
+    """Count a new post as unread for the followers of its author."""
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is None:
+        return
+    followers = list(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True).distinct().order_by('user_id')
+    )
+    for start in range(0, len(followers), CHUNK_SIZE):
+        chunk = followers[start:start + CHUNK_SIZE]
+        with transaction.atomic():
+            FeedMarker.objects.bulk_create(
+                [FeedMarker(user_id=user_id) for user_id in chunk],
+                ignore_conflicts=True
+            )
+            FeedMarker.objects.filter(user_id__in=chunk).update(
+                unread=F('unread') + 1
+            )
+        cache.delete_many([cache_key(user_id) for user_id in chunk])
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.db.models import Q
+
+FEED_VERSION_KEY = 'posts:feed_version'
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(obj):
+    """Opaque position of an object in a (-created, -id) ordering."""
+    return f'{(obj.created - EPOCH) // MICROSECOND}_{obj.pk}'
+
+
+def decode_cursor(cursor):
+    """Return (created, pk) for a cursor or None if it is malformed."""
+    try:
+        timestamp, pk = cursor.split('_')
+        return EPOCH + int(timestamp) * MICROSECOND, int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def keyset_page(queryset, cursor=None, size=10):
+    """Newest-first page of objects that come after ``cursor``.
+
+    Unlike offset pagination the cost of a page does not depend on how
+    deep into the list it is. Returns the objects and the cursor of the
+    next page (None on the last page).
+    """
+    queryset = queryset.order_by('-created', '-id')
+    position = decode_cursor(cursor)
+    if position is not None:
+        created, pk = position
+        queryset = queryset.filter(
+            Q(created__lt=created) | Q(created=created, id__lt=pk)
+        )
+    items = list(queryset[:size + 1])
+    if len(items) <= size:
+        return items, None
+    return items[:size], encode_cursor(items[size - 1])
+
+
+def feed_version():
+    """Part of the feed fragment cache keys; bumped to purge them all."""
+    return cache.get_or_set(FEED_VERSION_KEY, 1, None)
+
+
+def bump_feed_version():
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        cache.set(FEED_VERSION_KEY, 2, None)
@@ -1,10 +1,18 @@
+from django.conf import settings
 from django.core.paginator import Paginator
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils.http import urlencode
 
-from .models import Post, Group, Follow
-from .forms import PostForm, CommentForm
+from .models import Post, Group, Follow, Comment
+from .forms import PostForm, CommentForm, StatsPeriodForm
+from .relations import resolve
+from .rollups import AUTHOR_COUNTERS, GROUP_COUNTERS, period
+from .search import get_backend
+from .trending import in_order, leaderboard
+from .unread import mark_seen
+from .utils import feed_version, keyset_page
 
 from django.contrib.auth.decorators import login_required
 
@@ -12,6 +20,18 @@ from django.contrib.auth.decorators import login_required
 User = get_user_model()
 
 POSTS_COUNT = 10
+COMMENTS_COUNT = 20
+SUGGESTIONS_COUNT = 5
+STATS_COLUMNS = {
+    'posts': 'Посты',
+    'comments': 'Комментарии',
+    'followers_gained': 'Новые подписчики',
+    'followers_lost': 'Отписались',
+}
+SEARCH_MODELS = {
+    'posts': Post,
+    'comments': Comment,
+}
 
 
 def pagination(request, queryset):
@@ -21,26 +41,55 @@ def pagination(request, queryset):
     return page_obj
 
 
+def render_feed(request, template_name, context):
+    """Render a feed page with the ``FEED_TEMPLATE_ENGINE`` templates."""
+    return render(request, template_name, context,
+                  using=settings.FEED_TEMPLATE_ENGINE)
+
+
+def stream_url(feed, **params):
+    """URL of the new posts stream of a feed (see posts.stream)."""
+    if not settings.STREAM_URL:
+        return None
+    return f'{settings.STREAM_URL}?{urlencode({"feed": feed, **params})}'
+
+
 def index(request):
     queryset = Post.objects.all()
     page_obj = pagination(request=request, queryset=queryset)
     context = {
         'page_obj': page_obj,
+        'feed_version': feed_version(),
+        'stream_url': stream_url('index'),
     }
-    return render(request, 'posts/index.html', context)
+    return render_feed(request, 'posts/index.html', context)
+
+
+def trending(request):
+    """Posts and groups with the most activity lately."""
+    board = leaderboard()
+    context = {
+        'posts': in_order(
+            Post.objects.select_related('author', 'group'), board['posts']
+        ),
+        'groups': in_order(Group.objects.all(), board['groups']),
+    }
+    return render(request, 'posts/trending.html', context)
 
 
 def group_posts(request, slug=None):
     """View function for a group page"""
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    posts = group.posts.select_related('author')
     page_obj = pagination(request, posts)
+    resolve(request.user, posts=page_obj)
     context = {
         'page_obj': page_obj,
         'group': group,
         'posts': posts,
+        'stream_url': stream_url('group', slug=group.slug),
     }
-    return render(request, 'posts/group_list.html', context)
+    return render_feed(request, 'posts/group_list.html', context)
 
 
 def profile(request, username):
@@ -48,34 +97,112 @@ def profile(request, username):
     posts = author.posts.all()
     count = posts.count()
     page_obj = pagination(request, posts)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author
-    )
+    resolve(request.user, posts=page_obj, authors=[author])
     context = {
         'page_obj': page_obj,
         'author': author,
         'count': count,
-        'following': following,
+        'following': author.viewer_follows,
     }
-    return render(request, 'posts/profile.html', context)
+    if request.user == author:
+        context['suggestions'] = author.follow_suggestions.select_related(
+            'author'
+        )[:SUGGESTIONS_COUNT]
+    return render_feed(request, 'posts/profile.html', context)
+
+
+def render_stats(request, rows, counters, context):
+    """Daily counters of a group or an author from the rollup tables."""
+    form = StatsPeriodForm(request.GET)
+    days, totals = [], {}
+    if form.is_valid():
+        days, totals = period(rows, form.cleaned_data['since'],
+                              form.cleaned_data['until'], counters)
+    context.update({
+        'form': form,
+        'columns': [STATS_COLUMNS[field] for field in counters],
+        'days': [
+            (day['day'], [day[field] for field in counters])
+            for day in days
+        ],
+        'totals': [totals.get(field, 0) for field in counters],
+    })
+    return render(request, 'posts/stats.html', context)
+
+
+def group_stats(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return render_stats(request, group.daily_stats, GROUP_COUNTERS, {
+        'title': group.title,
+        'back_url': reverse('posts:group_list', args=[group.slug]),
+    })
+
+
+def profile_stats(request, username):
+    author = get_object_or_404(User, username=username)
+    return render_stats(request, author.daily_stats, AUTHOR_COUNTERS, {
+        'title': author.get_full_name() or author.username,
+        'back_url': reverse('posts:profile', args=[author.username]),
+    })
+
+
+def comments_page(post_id, cursor=None):
+    """One keyset page of post comments with their authors."""
+    queryset = Comment.objects.filter(post_id=post_id).select_related('author')
+    return keyset_page(queryset, cursor, COMMENTS_COUNT)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id
+    )
     author = post.author
     all_posts = author.posts.all()
     count = all_posts.count()
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments, comments_cursor = comments_page(post.id)
     context = {
         'post': post,
+        'post_id': post.id,
         'count': count,
         'form': form,
         'comments': comments,
+        'comments_cursor': comments_cursor,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    """HTML fragment with the next page of comments ("load more")."""
+    comments, comments_cursor = comments_page(
+        post_id, request.GET.get('after')
+    )
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+        'comments_cursor': comments_cursor,
+    }
+    return render(request, 'includes/comments_list.html', context)
+
+
+def search_posts(request):
+    """Ranked full-text search over posts or comments."""
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('type')
+    if kind not in SEARCH_MODELS:
+        kind = 'posts'
+    results, next_cursor = get_backend().search(
+        SEARCH_MODELS[kind], query, request.GET.get('after')
+    )
+    context = {
+        'query': query,
+        'type': kind,
+        'results': results,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST, request.FILES or None)
@@ -129,12 +256,15 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     """List of posts by favorite authors."""
+    mark_seen(request)
     queryset = Post.objects.filter(author__following__user=request.user)
     page_obj = pagination(request=request, queryset=queryset)
     context = {
         'page_obj': page_obj,
+        'feed_version': feed_version(),
+        'stream_url': stream_url('follow'),
     }
-    return render(request, 'posts/follow.html', context)
+    return render_feed(request, 'posts/follow.html', context)
 
 
 @login_required
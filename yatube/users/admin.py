@@ -1,3 +1,62 @@
-# from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-# Register your models here.
+from .deletion import schedule_deletion
+from .models import AccountDeletion, OutboxMessage, User
+from .tasks import delete_account
+
+
+class UserAdmin(BaseUserAdmin):
+    """Deleting a user schedules a background deletion.
+
+    The stock admin would collect and delete the whole history of the
+    user in the request, and list every object on the confirmation page.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        summary = [
+            f'{user}: {user.posts.count()} posts, '
+            f'{user.comments.count()} comments '
+            '(deleted in the background)'
+            for user in objs
+        ]
+        return summary, {}, set(), []
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, [obj])
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            deletion = schedule_deletion(user, requested_by=request.user)
+            delete_account.enqueue(
+                (deletion.pk,), dedup_key=f'account_deletion:{deletion.pk}'
+            )
+            self.message_user(
+                request,
+                f'{user} is deactivated and will be deleted shortly.',
+                messages.INFO
+            )
+
+
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = ('username', 'stage', 'follows_deleted',
+                    'comments_deleted', 'posts_deleted', 'images_deleted',
+                    'created', 'finished')
+    list_filter = ('stage',)
+    readonly_fields = ('user', 'username', 'requested_by', 'stage',
+                       'follows_deleted', 'comments_deleted',
+                       'posts_deleted', 'images_deleted', 'created',
+                       'finished')
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts',
+                    'send_after', 'created')
+    list_filter = ('status',)
+    search_fields = ('recipients',)
+
+
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
+admin.site.register(AccountDeletion, AccountDeletionAdmin)
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
@@ -0,0 +1,135 @@
+"""Account deletion in bounded batches.
+
+Deleting a prolific user in one go makes the deletion collector load
+every post, comment and follow of the account and hold the write lock
+until all of it is gone. Instead the account is deactivated right away
+and its content is removed stage by stage, one transaction per batch,
+by the ``process_account_deletions`` command. Every batch commits on its
+own, so feeds, profile counters and the search index shrink as it goes.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_image
+
+from posts.models import (
+    AuthorDailyStats, Comment, FeedMarker, Follow, FollowSuggestion, Post,
+)
+from .models import AccountDeletion, User
+
+BATCH_SIZE = 500
+
+COUNTERS = {
+    AccountDeletion.FOLLOWS: 'follows_deleted',
+    AccountDeletion.COMMENTS: 'comments_deleted',
+    AccountDeletion.POST_COMMENTS: 'comments_deleted',
+    AccountDeletion.POSTS: 'posts_deleted',
+}
+
+
+def schedule_deletion(user, requested_by=None):
+    """Deactivate ``user`` now and queue the removal of the account."""
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        user.is_active = False
+        deletion, _ = AccountDeletion.objects.get_or_create(
+            user=user,
+            defaults={
+                'username': user.get_username(),
+                'requested_by': requested_by,
+            }
+        )
+    return deletion
+
+
+def stage_queryset(stage, user_id):
+    if stage == AccountDeletion.FOLLOWS:
+        return Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id))
+    if stage == AccountDeletion.SUGGESTIONS:
+        return FollowSuggestion.objects.filter(
+            Q(user_id=user_id) | Q(author_id=user_id)
+        )
+    if stage == AccountDeletion.DAILY_STATS:
+        # After the posts and comments, whose deletion updates them.
+        return AuthorDailyStats.objects.filter(author_id=user_id)
+    if stage == AccountDeletion.COMMENTS:
+        return Comment.objects.filter(author_id=user_id)
+    if stage == AccountDeletion.POST_COMMENTS:
+        # Other people's comments would otherwise all cascade at once
+        # with the posts they belong to.
+        return Comment.objects.filter(post__author_id=user_id)
+    return Post.objects.filter(author_id=user_id)
+
+
+def delete_images(names):
+    """Delete image files and their thumbnails unless still in use.
+
+    Imported images are content-addressed, so posts may share a file.
+    """
+    in_use = set(
+        Post.objects.filter(image__in=names).values_list('image', flat=True)
+    )
+    unused = set(names) - in_use
+    for name in unused:
+        delete_image(name)
+    return len(unused)
+
+
+def delete_batch(deletion, batch_size=BATCH_SIZE):
+    """Delete one batch of the current stage and record the progress.
+
+    Returns the number of rows deleted; a short batch moves the
+    deletion to the next stage.
+    """
+    stage = deletion.stage
+    if stage == AccountDeletion.DONE:
+        return 0
+    with transaction.atomic():
+        if stage == AccountDeletion.ACCOUNT:
+            # The unread counter is one row; what's left to cascade is
+            # bounded like this.
+            FeedMarker.objects.filter(user_id=deletion.user_id).delete()
+            User.objects.filter(pk=deletion.user_id).delete()
+            deletion.user = None
+            deletion.stage = AccountDeletion.DONE
+            deletion.finished = timezone.now()
+            deletion.save(update_fields=['user', 'stage', 'finished'])
+            return 1
+        queryset = stage_queryset(stage, deletion.user_id)
+        pks = list(
+            queryset.order_by().values_list('pk', flat=True)[:batch_size]
+        )
+        images = []
+        if stage == AccountDeletion.POSTS:
+            images = list(
+                Post.objects.filter(pk__in=pks).exclude(image='')
+                .values_list('image', flat=True)
+            )
+        if pks:
+            queryset.model.objects.filter(pk__in=pks).delete()
+        counter = COUNTERS.get(stage)
+        updates = {counter: F(counter) + len(pks)} if counter else {}
+        if len(pks) < batch_size:
+            stages = [value for value, _ in AccountDeletion.STAGES]
+            updates['stage'] = stages[stages.index(stage) + 1]
+        if updates:
+            AccountDeletion.objects.filter(pk=deletion.pk).update(**updates)
+    if images:
+        AccountDeletion.objects.filter(pk=deletion.pk).update(
+            images_deleted=F('images_deleted') + delete_images(images)
+        )
+    deletion.refresh_from_db()
+    return len(pks)
+
+
+def process(deletion, batch_size=BATCH_SIZE, progress=None):
+    """Run ``deletion`` to the end, calling ``progress`` after each batch.
+
+    The stage and the counters are committed together with each batch,
+    so an interrupted deletion resumes where it stopped.
+    """
+    while deletion.stage != AccountDeletion.DONE:
+        delete_batch(deletion, batch_size)
+        if progress is not None:
+            progress(deletion)
+    return deletion
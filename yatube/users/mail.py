@@ -0,0 +1,182 @@
+"""Email outbox.
+
+``OutboxEmailBackend`` stores messages in the ``OutboxMessage`` table, in
+the transaction of the caller, instead of talking to a mail server. The
+``deliver_outbox`` task (or the ``send_outbox`` command) later hands them
+to the backend named by ``OUTBOX_EMAIL_BACKEND`` in batches over a single
+connection, at most ``OUTBOX_RATE_LIMIT`` messages a second.
+"""
+import base64
+import json
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection as db_connection
+from django.db import transaction
+from django.utils import timezone
+
+from core.queue import task
+from .models import OutboxMessage
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 60
+
+
+def serialize(message):
+    attachments = []
+    for attachment in message.attachments:
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append(
+            (filename, base64.b64encode(content).decode(), mimetype)
+        )
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': attachments,
+    }
+
+
+def deserialize(data):
+    message = EmailMultiAlternatives(
+        data['subject'], data['body'], data['from_email'],
+        to=data['to'], cc=data['cc'], bcc=data['bcc'],
+        reply_to=data['reply_to'], headers=data['headers'],
+        alternatives=data['alternatives'],
+    )
+    for filename, content, mimetype in data['attachments']:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Queue messages for ``deliver_outbox`` instead of sending them."""
+
+    def send_messages(self, email_messages):
+        messages = [
+            OutboxMessage(
+                subject=message.subject,
+                recipients=', '.join(message.recipients()),
+                data=json.dumps(serialize(message)),
+            )
+            for message in email_messages if message.recipients()
+        ]
+        OutboxMessage.objects.bulk_create(messages)
+        if messages:
+            deliver_outbox.enqueue(dedup_key='deliver_outbox')
+        return len(messages)
+
+
+class Throttle:
+    """Spaces calls to at most ``rate`` a second."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_call = 0
+
+    def wait(self):
+        now = time.monotonic()
+        if now < self.next_call:
+            time.sleep(self.next_call - now)
+            now = self.next_call
+        self.next_call = now + self.interval
+
+
+def claim(limit):
+    """Mark up to ``limit`` due messages as being sent."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'TASK_TIMEOUT', 3600))
+    with transaction.atomic():
+        OutboxMessage.objects.filter(
+            status=OutboxMessage.SENDING, started__lt=stale
+        ).update(status=OutboxMessage.PENDING)
+        pks = list(
+            OutboxMessage.objects.select_for_update(
+                skip_locked=db_connection.features
+                .has_select_for_update_skip_locked
+            )
+            .filter(status=OutboxMessage.PENDING, send_after__lte=now)
+            .order_by('send_after')
+            .values_list('pk', flat=True)[:limit]
+        )
+        OutboxMessage.objects.filter(pk__in=pks).update(
+            status=OutboxMessage.SENDING, started=now
+        )
+    return list(OutboxMessage.objects.filter(pk__in=pks).order_by('pk'))
+
+
+def retry(message, error):
+    message.attempts += 1
+    message.last_error = error
+    if message.attempts >= MAX_ATTEMPTS:
+        message.status = OutboxMessage.FAILED
+    else:
+        message.status = OutboxMessage.PENDING
+        message.send_after = timezone.now() + timedelta(
+            seconds=RETRY_DELAY * 2 ** (message.attempts - 1)
+        )
+    message.save(update_fields=[
+        'attempts', 'last_error', 'status', 'send_after'
+    ])
+
+
+def send_outbox(batch_size=BATCH_SIZE, rate=None):
+    """Deliver every due message; returns the number sent and failed.
+
+    Sent messages are deleted batch by batch, so a crash can repeat at
+    most one batch.
+    """
+    if rate is None:
+        rate = getattr(settings, 'OUTBOX_RATE_LIMIT', None)
+    throttle = Throttle(rate)
+    sent = failed = 0
+    with get_connection(settings.OUTBOX_EMAIL_BACKEND) as connection:
+        while True:
+            batch = claim(batch_size)
+            if not batch:
+                break
+            delivered = []
+            unsent = {message.pk for message in batch}
+            try:
+                for message in batch:
+                    throttle.wait()
+                    try:
+                        connection.send_messages(
+                            [deserialize(json.loads(message.data))]
+                        )
+                    except Exception:
+                        retry(message, traceback.format_exc())
+                        unsent.discard(message.pk)
+                        failed += 1
+                        # The connection may be broken; start a fresh one.
+                        connection.close()
+                        connection.open()
+                    else:
+                        delivered.append(message.pk)
+                        unsent.discard(message.pk)
+            finally:
+                OutboxMessage.objects.filter(pk__in=delivered).delete()
+                # Left over when the mail server can't be reached at all.
+                OutboxMessage.objects.filter(pk__in=unsent).update(
+                    status=OutboxMessage.PENDING
+                )
+            sent += len(delivered)
+    return sent, failed
+
+
+@task
+def deliver_outbox():
+    send_outbox()
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from users.deletion import BATCH_SIZE, process
+from users.models import AccountDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete the content of accounts scheduled for deletion in bounded '
+        'batches, then the accounts themselves. Safe to interrupt: the next '
+        'run resumes each deletion at the stage where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Process at most this many accounts.'
+        )
+
+    def handle(self, *args, **options):
+        pending = AccountDeletion.objects.exclude(
+            stage=AccountDeletion.DONE
+        )[:options['limit']]
+        for deletion in pending:
+            process(deletion, options['batch_size'], self.report)
+            self.stdout.write(self.style.SUCCESS(
+                f'{deletion.username}: deleted'
+            ))
+
+    def report(self, deletion):
+        self.stdout.write(
+            f'{deletion.username}: {deletion.get_stage_display()}, '
+            f'{deletion.follows_deleted} follows, '
+            f'{deletion.comments_deleted} comments, '
+            f'{deletion.posts_deleted} posts, '
+            f'{deletion.images_deleted} images deleted'
+        )
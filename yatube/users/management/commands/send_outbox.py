@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.mail import BATCH_SIZE, send_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued emails through OUTBOX_EMAIL_BACKEND in batches '
+        'over one connection. Usually the deliver_outbox task does this; '
+        'the command is for cron or for draining a backlog by hand.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--rate', type=float, default=None,
+            help='Messages per second (default: OUTBOX_RATE_LIMIT).'
+        )
+        parser.add_argument(
+            '--loop', type=float, default=None, metavar='SECONDS',
+            help='Keep draining, polling every SECONDS.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_outbox(options['batch_size'], options['rate'])
+            if sent or failed:
+                self.stdout.write(f'{sent} sent, {failed} failed')
+            if options['loop'] is None:
+                return
+            time.sleep(options['loop'])
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='accountdeletion',
+            name='stage',
+            field=models.CharField(choices=[('follows', 'follows'), ('suggestions', 'follow suggestions'), ('comments', 'comments of the user'), ('post_comments', 'comments on posts of the user'), ('posts', 'posts'), ('daily_stats', 'daily statistics'), ('account', 'account'), ('done', 'done')], default='follows', max_length=20),
+        ),
+    ]
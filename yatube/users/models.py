@@ -1,3 +1,87 @@
-# from django.db import models
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+User = get_user_model()
+
+
+class AccountDeletion(models.Model):
+    """A user account being deleted in the background, stage by stage.
+
+    The row outlives the user (``user`` becomes NULL) as a record of
+    what was removed.
+    """
+    FOLLOWS = 'follows'
+    SUGGESTIONS = 'suggestions'
+    COMMENTS = 'comments'
+    POST_COMMENTS = 'post_comments'
+    POSTS = 'posts'
+    DAILY_STATS = 'daily_stats'
+    ACCOUNT = 'account'
+    DONE = 'done'
+    STAGES = (
+        (FOLLOWS, 'follows'),
+        (SUGGESTIONS, 'follow suggestions'),
+        (COMMENTS, 'comments of the user'),
+        (POST_COMMENTS, 'comments on posts of the user'),
+        (POSTS, 'posts'),
+        (DAILY_STATS, 'daily statistics'),
+        (ACCOUNT, 'account'),
+        (DONE, 'done'),
+    )
+
+    user = models.OneToOneField(User,
+                                on_delete=models.SET_NULL,
+                                null=True,
+                                related_name='deletion')
+    username = models.CharField(max_length=150)
+    requested_by = models.ForeignKey(User,
+                                     on_delete=models.SET_NULL,
+                                     null=True,
+                                     blank=True,
+                                     related_name='+')
+    stage = models.CharField(max_length=20, choices=STAGES, default=FOLLOWS)
+    follows_deleted = models.PositiveIntegerField(default=0)
+    comments_deleted = models.PositiveIntegerField(default=0)
+    posts_deleted = models.PositiveIntegerField(default=0)
+    images_deleted = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('created',)
+
+    def __str__(self):
+        return f'{self.username}: {self.get_stage_display()}'
+
+
+class OutboxMessage(models.Model):
+    """An email waiting to be delivered by ``users.mail.send_outbox``."""
+    PENDING = 'pending'
+    SENDING = 'sending'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'pending'),
+        (SENDING, 'sending'),
+        (FAILED, 'failed'),
+    )
+
+    subject = models.TextField()
+    recipients = models.TextField()
+    data = models.TextField(help_text='The serialized message')
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    send_after = models.DateTimeField(default=timezone.now)
+    started = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'send_after'],
+                         name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipients}'
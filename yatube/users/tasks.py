@@ -0,0 +1,12 @@
+from core.queue import task
+from .deletion import process
+from .mail import deliver_outbox  # noqa: F401 registered for the worker
+from .models import AccountDeletion
+
+
+@task(retries=5)
+def delete_account(deletion_id):
+    """Run an account deletion; a retry resumes where it failed."""
+    deletion = AccountDeletion.objects.filter(pk=deletion_id).first()
+    if deletion is not None:
+        process(deletion)
@@ -0,0 +1,130 @@
+from io import StringIO
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import (
+    AuthorDailyStats, Comment, FeedMarker, Follow, FollowSuggestion, Post,
+)
+from ..deletion import delete_batch, process, schedule_deletion
+from ..models import AccountDeletion, User
+
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x00\x00\x00\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x01\x00\x00'
+)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR))
+class AccountDeletionTests(TestCase):
+    def setUp(self):
+        self.addCleanup(shutil.rmtree, settings.MEDIA_ROOT, True)
+        self.user = User.objects.create_user(username='leaving')
+        self.other = User.objects.create_user(username='staying')
+        self.posts = Post.objects.bulk_create(
+            Post(author=self.user, text=f'Post {i}') for i in range(5)
+        )
+        self.post = Post.objects.filter(author=self.user).first()
+        self.post.image.save('leaving.gif', ContentFile(SMALL_GIF))
+        Comment.objects.bulk_create(
+            Comment(author=author, post=self.post, text='Comment')
+            for author in (self.user, self.other, self.other)
+        )
+        Follow.objects.create(user=self.user, author=self.other)
+        Follow.objects.create(user=self.other, author=self.user)
+        self.other_post = Post.objects.create(author=self.other, text='Mine')
+        FollowSuggestion.objects.bulk_create(
+            FollowSuggestion(user=user, author=author, score=1,
+                             computed=timezone.now())
+            for user, author in ((self.user, self.other),
+                                 (self.other, self.user))
+        )
+        FeedMarker.objects.create(user=self.user, unread=1)
+
+    def test_schedule_deactivates_without_deleting(self):
+        deletion = schedule_deletion(self.user)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(deletion.stage, AccountDeletion.FOLLOWS)
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 5)
+        self.assertEqual(schedule_deletion(self.user), deletion)
+
+    def test_batches_are_bounded(self):
+        deletion = schedule_deletion(self.user)
+        deletion.stage = AccountDeletion.POSTS
+        deletion.save()
+        self.assertEqual(delete_batch(deletion, batch_size=2), 2)
+        self.assertEqual(deletion.stage, AccountDeletion.POSTS)
+        self.assertEqual(deletion.posts_deleted, 2)
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 3)
+
+    def test_process_deletes_history_and_account(self):
+        image = self.post.image.path
+        deletion = process(schedule_deletion(self.user), batch_size=2)
+        self.assertEqual(deletion.stage, AccountDeletion.DONE)
+        self.assertIsNotNone(deletion.finished)
+        self.assertIsNone(deletion.user_id)
+        self.assertEqual(
+            (deletion.follows_deleted, deletion.comments_deleted,
+             deletion.posts_deleted, deletion.images_deleted),
+            (2, 3, 5, 1)
+        )
+        self.assertFalse(User.objects.filter(username='leaving').exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(list(Post.objects.all()), [self.other_post])
+        self.assertFalse(Comment.objects.exists())
+        with self.assertRaises(FileNotFoundError):
+            open(image)
+
+    def test_derived_rows_are_deleted_before_the_account(self):
+        deletion = schedule_deletion(self.user)
+        self.assertTrue(AuthorDailyStats.objects.filter(
+            author=self.user
+        ).exists())
+        while deletion.stage != AccountDeletion.ACCOUNT:
+            delete_batch(deletion, batch_size=1)
+        self.assertFalse(FollowSuggestion.objects.exists())
+        self.assertFalse(AuthorDailyStats.objects.filter(
+            author=self.user
+        ).exists())
+        delete_batch(deletion)
+        self.assertFalse(FeedMarker.objects.exists())
+        self.assertEqual(deletion.stage, AccountDeletion.DONE)
+
+    def test_shared_image_is_kept(self):
+        Post.objects.filter(pk=self.other_post.pk).update(
+            image=self.post.image.name
+        )
+        deletion = process(schedule_deletion(self.user))
+        self.assertEqual(deletion.images_deleted, 0)
+        self.other_post.refresh_from_db()
+        self.assertTrue(self.other_post.image.storage.exists(
+            self.other_post.image.name
+        ))
+
+    def test_command_processes_pending_deletions(self):
+        schedule_deletion(self.user)
+        call_command('process_account_deletions', stdout=StringIO())
+        self.assertFalse(User.objects.filter(username='leaving').exists())
+
+    def test_admin_delete_schedules_deletion(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=[self.user.pk])
+        response = self.client.get(url)
+        self.assertContains(response, '5 posts, 1 comments')
+        self.client.post(url, {'post': 'yes'})
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.deletion.requested_by, admin)
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 5)
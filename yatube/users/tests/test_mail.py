@@ -0,0 +1,86 @@
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from ..mail import deserialize, send_outbox, serialize
+from ..models import OutboxMessage, User
+
+
+@override_settings(
+    EMAIL_BACKEND='users.mail.OutboxEmailBackend',
+    OUTBOX_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    OUTBOX_RATE_LIMIT=None,
+)
+class OutboxTests(TestCase):
+    def test_signup_mail_goes_through_outbox(self):
+        self.client.post(reverse('users:signup'), {
+            'username': 'newcomer',
+            'email': 'newcomer@example.com',
+            'password1': 'Unguessable-42',
+            'password2': 'Unguessable-42',
+        })
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            OutboxMessage.objects.get().recipients, 'newcomer@example.com'
+        )
+        self.assertTrue(Task.objects.filter(name__endswith='outbox').exists())
+        call_command('run_tasks', '--once', '--workers', '0',
+                     stdout=StringIO())
+        self.assertEqual(mail.outbox[0].to, ['newcomer@example.com'])
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_password_reset_mail_is_queued(self):
+        User.objects.create_user(
+            'forgetful', 'forgetful@example.com', 'Unguessable-42'
+        )
+        self.client.post(reverse('users:password_reset_form'), {
+            'email': 'forgetful@example.com',
+        })
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_drain_sends_in_batches(self):
+        for i in range(5):
+            mail.send_mail(f'Subject {i}', 'Body', None, ['to@example.com'])
+        self.assertEqual(send_outbox(batch_size=2), (5, 0))
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            [f'Subject {i}' for i in range(5)]
+        )
+
+    def test_failed_message_is_retried_later(self):
+        mail.send_mail('Subject', 'Body', None, ['to@example.com'])
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=SMTPException('unavailable')
+        ):
+            self.assertEqual(send_outbox(), (0, 1))
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, OutboxMessage.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.send_after, timezone.now())
+        self.assertIn('unavailable', message.last_error)
+        self.assertEqual(send_outbox(), (0, 0))
+
+    def test_message_round_trip(self):
+        message = mail.EmailMultiAlternatives(
+            'Subject', 'Body', 'from@example.com', ['to@example.com'],
+            cc=['cc@example.com'], headers={'X-Tag': 'welcome'}
+        )
+        message.attach_alternative('<p>Body</p>', 'text/html')
+        message.attach('note.txt', 'Привет', 'text/plain')
+        restored = deserialize(serialize(message))
+        self.assertEqual(restored.recipients(), message.recipients())
+        self.assertEqual(restored.extra_headers, {'X-Tag': 'welcome'})
+        self.assertEqual(restored.alternatives, [('<p>Body</p>', 'text/html')])
+        self.assertEqual(
+            restored.attachments,
+            [('note.txt', 'Привет', 'text/plain')]
+        )
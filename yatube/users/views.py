@@ -1,21 +1,25 @@
+from django.core.mail import send_mail
+from django.db import transaction
 from django.views.generic import CreateView
 
 from django.urls import reverse_lazy
 from .forms import CreationForm
 
-from django.core.mail import send_mail
-
-
-send_mail(
-    'Тема письма',
-    'Текст письма.',
-    'from@example.com',
-    ['to@example.com'],
-    fail_silently=False,
-)
-
 
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+    @transaction.atomic
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        # Goes to the outbox together with the new account.
+        send_mail(
+            'Добро пожаловать в Yatube',
+            f'Здравствуйте, {self.object.get_username()}! '
+            'Спасибо за регистрацию.',
+            None,
+            [self.object.email] if self.object.email else [],
+        )
+        return response
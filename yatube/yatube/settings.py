@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -37,9 +38,12 @@ ALLOWED_HOSTS = [
 
 # Application definition
 
+# Web workers (YATUBE_ROLE=web) don't serve /api/ and never load DRF
+# and djoser; the default role serves everything.
+YATUBE_ROLE = os.getenv('YATUBE_ROLE', 'all')
+SERVE_API = YATUBE_ROLE != 'web'
+
 INSTALLED_APPS = [
-    'api.apps.ApiConfig',
-    'blogs.apps.BlogsConfig',
     'posts.apps.PostsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
@@ -51,12 +55,24 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
     'sorl.thumbnail',
-    'djoser',
     # 'debug_toolbar',
 ]
 
+if SERVE_API:
+    INSTALLED_APPS += [
+        'api.apps.ApiConfig',
+        'rest_framework',
+        'djoser',
+    ]
+
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.ProfilerMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -103,24 +119,75 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.unread.unread',
             ]
         },
-    }
+    },
+    {
+        # Jinja2 versions of the feed pages, see core.jinja2.
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'jinja2')],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'core.jinja2.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'core.context_processors.year.year',
+                'core.context_processors.unread.unread',
+            ],
+        },
+    },
 ]
 
+# Template engine of the feed pages (index, follow, group and profile):
+# "django" or the faster "jinja2".
+FEED_TEMPLATE_ENGINE = os.getenv('FEED_TEMPLATE_ENGINE', 'django')
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# core.db.backends.sqlite3 applies WAL mode, busy_timeout and cache
+# pragmas to every connection and retries writes on "database is locked";
+# see its module docstring for the OPTIONS it understands.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Read replicas as "alias=weight" pairs, e.g. "replica1=2,replica2=1".
+# Locally they are SQLite copies of the primary: `manage.py sync_replicas`.
+DATABASE_REPLICAS = {}
+for replica in filter(None, os.environ.get('DB_REPLICAS', '').split(',')):
+    alias, _, weight = replica.partition('=')
+    DATABASE_REPLICAS[alias] = int(weight or 1)
+    DATABASES[alias] = {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.{alias}.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'read_only': True},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+# Views that may read from a replica on GET requests.
+REPLICA_READ_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+)
+REPLICA_READ_NAMESPACES = ('api',)
+# A client that wrote reads from the primary for this many seconds.
+REPLICA_PIN_SECONDS = 5
+REPLICA_HEALTH_CHECK_INTERVAL = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -164,15 +231,124 @@ PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(PROJECT_ROOT, 'static')
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+# collectstatic names files after their content hash, rewrites CSS
+# references and writes .gz and .br siblings (see core.static).
+STATICFILES_STORAGE = 'core.static.CompressedManifestStorage'
+# Serve STATIC_ROOT from core.middleware.StaticFilesMiddleware, with
+# immutable caching of the hashed names.
+SERVE_STATIC = os.getenv('SERVE_STATIC', '1') == '1'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Mail is written to an outbox table and delivered by the task queue
+# through OUTBOX_EMAIL_BACKEND, see users.mail.
+EMAIL_BACKEND = 'users.mail.OutboxEmailBackend'
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+OUTBOX_RATE_LIMIT = 10
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
+
+# Share of requests that get a Server-Timing header and a line on the
+# yatube.performance logger; 0 turns core.middleware.PerformanceMiddleware
+# off entirely.
+PERFORMANCE_SAMPLE_RATE = float(os.getenv('PERFORMANCE_SAMPLE_RATE', '0'))
+
+# Queries slower than this many milliseconds are logged with their plan
+# on yatube.slow_queries. Off unless set: 0 turns
+# core.middleware.SlowQueryMiddleware off entirely.
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '0'))
+
+# Path of the new posts stream served by `manage.py run_stream`; the
+# proxy routes it to that process. Off unless set: empty hides the
+# "new posts" banner and its EventSource.
+STREAM_URL = os.getenv('STREAM_URL', '')
+
+# Trending posts and groups, see posts.trending: seconds for a score to
+# halve, length of the top lists and seconds they are cached for.
+TRENDING_HALF_LIFE = 6 * 3600
+TRENDING_SIZE = 10
+TRENDING_REFRESH = 60
+
+# Default and longest date range of the statistics pages, days.
+STATS_DAYS = 30
+STATS_MAX_DAYS = 366
+
+# Caches shared by the worker processes of a host, in SQLite files (see
+# core.cache.backends.sqlite for the OPTIONS). Sessions have their own
+# file so that fragment churn can't evict them; they are also kept in
+# the database, which is only read on a cache miss.
+CACHE_DIR = os.getenv(
+    'CACHE_DIR', os.path.join(tempfile.gettempdir(), 'yatube-cache')
+)
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.backends.sqlite.SQLiteCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'default.sqlite3'),
+        'OPTIONS': {'MAX_SIZE': 64 * 1024 * 1024},
+    },
+    'sessions': {
+        'BACKEND': 'core.cache.backends.sqlite.SQLiteCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'sessions.sqlite3'),
+        'OPTIONS': {'MAX_SIZE': 32 * 1024 * 1024},
+    },
+}
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+# Thumbnail metadata is read through this cache, the database is the
+# fallback.
+THUMBNAIL_CACHE = 'default'
+
+TEST_RUNNER = 'core.testing.TestRunner'
+
+# Metrics are off unless METRICS_DIR is set. Each worker process then
+# writes its metrics to a file there and /metrics adds them up. Use a
+# directory local to the host.
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+# Besides staff users, /metrics is readable by these client addresses
+# (comma-separated). Behind a reverse proxy every client has the proxy's
+# address: use METRICS_TOKEN there instead.
+METRICS_ALLOWED_IPS = list(
+    filter(None, os.getenv('METRICS_ALLOWED_IPS', '').split(','))
+)
+# A scraper sending "Authorization: Bearer <token>" may read /metrics.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+THUMBNAIL_BACKEND = 'core.thumbnails.TimedThumbnailBackend'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yatube.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'yatube.slow_queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'yatube.stream': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'yatube.tasks': {
+            'handlers': ['console'],
+            'level': 'ERROR',
+            'propagate': False,
+        },
+    },
+}
@@ -18,6 +18,8 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import metrics
+
 
 urlpatterns = [
     # импорт правил из приложения posts
@@ -26,8 +28,13 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('debug/', include('core.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
 
+if settings.SERVE_API:
+    urlpatterns += [path('api/', include('api.urls'))]
+
 
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
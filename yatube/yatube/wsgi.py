@@ -5,12 +5,22 @@ It exposes the WSGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
+
+Unless WSGI_WARMUP=0, URLs, templates and the cache are loaded here, so
+that a preloading server (gunicorn --preload) does it once before forking.
 """
 
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.db import connections
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if os.environ.get('WSGI_WARMUP', '1') == '1':
+    from core.warmup import warm_up
+    warm_up()
+    # Forked workers must not share database connections.
+    connections.close_all()